@@ -5,7 +5,7 @@ import sys
 import traceback
 import bluesky as bs
 
-if (bs.settings.is_gui or bs.settings.is_headless) and __name__ == "__main__":
+if (bs.settings.is_gui or bs.settings.is_headless or bs.settings.is_batch) and __name__ == "__main__":
     print("   *****   BlueSky Open ATM simulator *****")
     print("Distributed under GNU General Public License v3")
 
@@ -32,6 +32,20 @@ def start():
     # Catch import errors
     try: 
 
+        # Run the benchmark suite, or the scenarios of a batch file, in headless
+        # simulation processes, which each initialize their own bluesky modules
+        if bs.settings.is_benchsuite:
+
+            from bluesky.simulation.headless import benchsuite
+            benchsuite.run()
+            return
+
+        if bs.settings.is_batch:
+
+            from bluesky.simulation.headless import batch
+            batch.run(bs.settings.batchfile)
+            return
+
         # Initialize bluesky modules
         bs.init()
 
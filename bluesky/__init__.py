@@ -36,7 +36,9 @@ def init():
     if settings.is_sim:
         from bluesky.traffic import Traffic
 
-        if settings.gui == 'pygame':
+        if settings.is_batch:
+            from bluesky.simulation.headless import Simulation, ScreenIO as Screen
+        elif settings.gui == 'pygame':
             from bluesky.ui.pygame import Screen
             from bluesky.simulation.pygame import Simulation
         else:
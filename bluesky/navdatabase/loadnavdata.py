@@ -9,6 +9,7 @@ from bluesky import settings
 from bluesky.tools import cachefile
 from .load_navdata_txt import load_navdata_txt
 from .load_visuals_txt import load_coastline_txt, navdata_load_rwythresholds
+from .spatialindex import SpatialIndex
 
 if settings.gui == 'qtgl':
     from .load_visuals_txt import load_aptsurface_txt
@@ -17,7 +18,7 @@ if settings.gui == 'qtgl':
 # Cache versions: increment these to the current date if the source data is updated
 # or other reasons why the cache needs to be updated
 coast_version = 'v20170101'
-navdb_version = 'v20170101'
+navdb_version = 'v20261018'
 aptsurf_version = 'v20171116'
 
 ## Default settings
@@ -83,6 +84,10 @@ def load_navdata():
             wptdata, aptdata, awydata, firdata, codata = load_navdata_txt()
             rwythresholds = navdata_load_rwythresholds()
 
+            # Spatial indices of waypoints and airports, cached with the data
+            wptdata['wpindex'] = SpatialIndex(wptdata['wplat'], wptdata['wplon'])
+            aptdata['apindex'] = SpatialIndex(aptdata['aplat'], aptdata['aplon'])
+
             cache.dump(wptdata)
             cache.dump(awydata)
             cache.dump(aptdata)
@@ -57,6 +57,7 @@ class Navdatabase:
         self.wpvar    = wptdata['wpvar']      # magn variation [deg]
         self.wpfreq   = wptdata['wpfreq']       # frequency [kHz/MHz]
         self.wpdesc   = wptdata['wpdesc']     # description
+        self.wpindex  = wptdata['wpindex']    # spatial index
 
         # Get airway legs data
         self.awfromwpid = awydata['awfromwpid']  # identifier (string)
@@ -79,6 +80,7 @@ class Navdatabase:
         self.aptype    = aptdata['aptype']    # type (int, 1=large, 2=medium, 3=small)
         self.aptco     = aptdata['apco']      # two char country code (string)
         self.aptelev   = aptdata['apelev']    # field elevation in meters [m] above mean sea level
+        self.aptindex  = aptdata['apindex']   # spatial index
 
         # Get FIR data
         self.fir      = firdata['fir']        # fir name
@@ -95,6 +97,10 @@ class Navdatabase:
 
         self.rwythresholds = rwythresholds
 
+        # Hash index of the names: name -> list of indices with this name
+        self.wpnameidx  = nameindex(self.wpid)
+        self.aptnameidx = nameindex(self.aptid)
+
     def defwpt(self,name=None,lat=None,lon=None,wptype=None):
 
         # Prevent polluting the database: check arguments
@@ -106,7 +112,7 @@ class Navdatabase:
         # No data: give info on waypoint
         elif lat==None or lon==None:
             reflat, reflon = bs.scr.getviewctr()
-            if self.wpid.count(name.upper()) > 0:
+            if name.upper() in self.wpnameidx:
                 i = self.getwpidx(name.upper(),reflat,reflon)
                 txt = self.wpid[i]+" : "+str(self.wplat[i])+","+str(self.wplon[i])
                 if len(self.wptype[i]+self.wpco[i])>0:
@@ -119,6 +125,7 @@ class Navdatabase:
 
         # Still here? So there is data, then we add this waypoint
         self.wpid.append(name.upper())
+        self.wpnameidx.setdefault(name.upper(), []).append(len(self.wpid) - 1)
         self.wplat = np.append(self.wplat,lat)
         self.wplon = np.append(self.wplon,lon)
 
@@ -139,82 +146,41 @@ class Navdatabase:
 
     def getwpidx(self, txt, reflat=999999., reflon=999999):
         """Get waypoint index to access data"""
-        name = txt.upper()
-        try:
-            i = self.wpid.index(name)
-        except:
+        idx = self.wpnameidx.get(txt.upper())
+        if idx is None:
             return -1
 
         # if no pos is specified, get first occurence
-        if not reflat < 99999.:
-            return i
+        if not reflat < 99999. or len(idx) == 1:
+            return idx[0]
 
-        # If pos is specified check for more and return closest
-        else:
-            idx = []
-            idx.append(i)
-            found = True
-            while i < len(self.wpid) - 1 and found:
-                try:
-                    i = self.wpid.index(name, i + 1)
-                    idx.append(i)
-                except:
-                    found = False
-            if len(idx) == 1:
-                return idx[0]
-            else:
-                imin = idx[0]
-                dmin = geo.kwikdist(reflat, reflon, self.wplat[imin], self.wplon[imin])
-                for i in idx[1:]:
-                    d = geo.kwikdist(reflat, reflon, self.wplat[i], self.wplon[i])
-                    if d < dmin:
-                        imin = i
-                        dmin = d
-                return imin
+        # If pos is specified return closest
+        d = geo.kwikdist(reflat, reflon, self.wplat[idx], self.wplon[idx])
+        return idx[np.argmin(d)]
 
     def getwpindices(self, txt, reflat=999999., reflon=999999,crit=1852.0):
         """Get waypoint index to access data"""
-        name = txt.upper()
-        try:
-            i = self.wpid.index(name)
-        except:
+        idx = self.wpnameidx.get(txt.upper())
+        if idx is None:
             return [-1]
 
         # if no pos is specified, get first occurence
-        if not reflat < 99999.:
-            return [i]
+        if not reflat < 99999. or len(idx) == 1:
+            return [idx[0]]
 
-        # If pos is specified check for more and return closest
-        else:
-            idx = findall(self.wpid,name) # find indices of al occurences
+        # If pos is specified return closest
+        d = geo.kwikdist(reflat, reflon, self.wplat[idx], self.wplon[idx])
+        imin = idx[np.argmin(d)]
 
-            if len(idx) == 1:
-                return [idx[0]]
-            else:
-                imin = idx[0]
-                dmin = geo.kwikdist(reflat, reflon, self.wplat[imin], self.wplon[imin])
-                for i in idx[1:]:
-                    d = geo.kwikdist(reflat, reflon, self.wplat[i], self.wplon[i])
-                    if d < dmin:
-                        imin = i
-                        dmin = d
-                # Find co-located
-                indices = [imin]
-                for i in idx:
-                    if i!=imin:
-                        dist = nm*geo.kwikdist(self.wplat[i], self.wplon[i], \
-                                            self.wplat[imin], self.wplon[imin])
-                        if dist<=crit:
-                            indices.append(i)
-
-                return indices
+        # Find co-located
+        dist = nm * geo.kwikdist(self.wplat[idx], self.wplon[idx],
+                                 self.wplat[imin], self.wplon[imin])
+        return [imin] + [i for i, di in zip(idx, dist) if i != imin and di <= crit]
 
     def getaptidx(self, txt):
         """Get waypoint index to access data"""
-        try:
-            return self.aptid.index(txt.upper())
-        except:
-            return -1
+        idx = self.aptnameidx.get(txt.upper())
+        return -1 if idx is None else idx[0]
 
     def getinear(self, wlat, wlon, lat, lon):  # lat,lon in degrees
         # t0 = time.clock()
@@ -229,11 +195,27 @@ class Navdatabase:
 
     def getwpinear(self, lat, lon):  # lat,lon in degrees
         """Get closest waypoint index"""
-        return self.getinear(self.wplat, self.wplon, lat, lon)
+        return self.wpindex.knearest(self.wplat, self.wplon, lat, lon)[0]
 
     def getapinear(self, lat, lon):  # lat,lon in degrees
         """Get closest airport index"""
-        return self.getinear(self.aptlat, self.aptlon, lat, lon)
+        return self.aptindex.knearest(self.aptlat, self.aptlon, lat, lon)[0]
+
+    def getwpknear(self, lat, lon, k):  # lat,lon in degrees
+        """Get indices of the k closest waypoints, closest first"""
+        return list(self.wpindex.knearest(self.wplat, self.wplon, lat, lon, k))
+
+    def getapknear(self, lat, lon, k):  # lat,lon in degrees
+        """Get indices of the k closest airports, closest first"""
+        return list(self.aptindex.knearest(self.aptlat, self.aptlon, lat, lon, k))
+
+    def getwpinradius(self, lat, lon, dist):  # lat,lon in degrees, dist in nm
+        """Get indices of the waypoints within dist of lat,lon"""
+        return list(self.wpindex.radius(self.wplat, self.wplon, lat, lon, dist))
+
+    def getapinradius(self, lat, lon, dist):  # lat,lon in degrees, dist in nm
+        """Get indices of the airports within dist of lat,lon"""
+        return list(self.aptindex.radius(self.aptlat, self.aptlon, lat, lon, dist))
 
     def getinside(self, wlat, wlon, lat0, lat1, lon0, lon1):
         """Get indices inside given box"""
@@ -249,10 +231,14 @@ class Navdatabase:
 
     def getwpinside(self, lat0, lat1, lon0, lon1):
         """Get waypoint indices inside box"""
+        if lat0 < lat1:
+            return list(self.wpindex.inside(self.wplat, self.wplon, lat0, lat1, lon0, lon1))
         return self.getinside(self.wplat, self.wplon, lat0, lat1, lon0, lon1)
 
     def getapinside(self, lat0, lat1, lon0, lon1):
         """Get airport indicex inside box"""
+        if lat0 < lat1:
+            return list(self.aptindex.inside(self.aptlat, self.aptlon, lat0, lat1, lon0, lon1))
         return self.getinside(self.aptlat, self.aptlon, lat0, lat1, lon0, lon1)
 
     # returns all runways of given airport
@@ -374,3 +360,11 @@ class Navdatabase:
                     connect.append(newitem)
 
         return connect # return list of [awid,wpid]
+
+
+def nameindex(names):
+    """Return a dict with the list of indices of each name in names"""
+    index = dict()
+    for i, name in enumerate(names):
+        index.setdefault(name, []).append(i)
+    return index
@@ -0,0 +1,120 @@
+''' Grid-based spatial index for the points of the navigation database.
+
+    The points are sorted by the lat/lon grid cell that contains them, and
+    an offset table gives the first point of each cell, so that the points
+    in a range of cells on one row of the grid are one contiguous slice.
+    Queries collect the points of the cells that overlap the query area, and
+    only compute distances for these candidates.
+
+    Distances use the same flat-earth approximation as
+    Navdatabase.getinear: the longitude difference is scaled with the cosine
+    of the reference latitude. The index is built for a fixed set of points;
+    points that are added later (with DEFWPT) are always included as
+    candidates. '''
+from math import cos, radians, ceil
+import numpy as np
+
+
+class SpatialIndex(object):
+    ''' Grid index of the points with latitudes lat and longitudes lon,
+        with square cells of cellsize degrees. '''
+    def __init__(self, lat, lon, cellsize=1.0):
+        self.cellsize = cellsize
+        self.nlat     = int(ceil(180.0 / cellsize))
+        self.nlon     = int(ceil(360.0 / cellsize))
+        self.n        = len(lat)
+
+        cell          = self.cellidx(np.asarray(lat), np.asarray(lon))
+        self.order    = np.argsort(cell, kind='stable')
+        self.lat      = np.asarray(lat, dtype=float)[self.order]
+        self.lon      = np.asarray(lon, dtype=float)[self.order]
+        self.cellstart = np.searchsorted(cell[self.order],
+                                         np.arange(self.nlat * self.nlon + 1))
+
+    def cellidx(self, lat, lon):
+        ''' Return the cell index of the points lat, lon. '''
+        i = np.clip(((lat + 90.0) / self.cellsize).astype(int), 0, self.nlat - 1)
+        j = np.clip((((lon + 180.0) % 360.0) / self.cellsize).astype(int), 0, self.nlon - 1)
+        return i * self.nlon + j
+
+    def candidates(self, lat0, lat1, lon0, lon1):
+        ''' Return the positions in the sorted arrays of the points in the
+            cells that overlap the box lat0-lat1, lon0-lon1. Longitudes may
+            be outside -180..180, for boxes that cross the date line. '''
+        i0 = max(0, int((lat0 + 90.0) / self.cellsize))
+        i1 = min(self.nlat - 1, int((lat1 + 90.0) / self.cellsize))
+        if lon1 - lon0 >= 360.0:
+            lonranges = [(0, self.nlon - 1)]
+        else:
+            j0 = int(np.floor((lon0 + 180.0) / self.cellsize))
+            j1 = int(np.floor((lon1 + 180.0) / self.cellsize))
+            if j0 < 0:
+                lonranges = [(0, j1), (j0 + self.nlon, self.nlon - 1)]
+            elif j1 >= self.nlon:
+                lonranges = [(j0, self.nlon - 1), (0, j1 - self.nlon)]
+            else:
+                lonranges = [(j0, j1)]
+        slices = [np.arange(self.cellstart[i * self.nlon + j0],
+                            self.cellstart[i * self.nlon + min(j1, self.nlon - 1) + 1])
+                  for i in range(i0, i1 + 1) for j0, j1 in lonranges if j0 <= j1]
+        return np.concatenate(slices) if slices else np.array([], dtype=int)
+
+    def gather(self, pos, wlat, wlon):
+        ''' Return the original indices and positions of candidates pos,
+            extended with the points that were added after indexing. '''
+        tail = np.arange(self.n, len(wlat))
+        idx  = np.concatenate((self.order[pos], tail))
+        lat  = np.concatenate((self.lat[pos], wlat[self.n:]))
+        lon  = np.concatenate((self.lon[pos], wlon[self.n:]))
+        return idx, lat, lon
+
+    @staticmethod
+    def dist2(plat, plon, lat, lon):
+        ''' Squared flat-earth distance [deg^2] of the points to lat, lon. '''
+        f    = cos(radians(lat))
+        dlat = (plat - lat + 180.) % 360. - 180.
+        dlon = f * ((plon - lon + 180.) % 360. - 180.)
+        return dlat * dlat + dlon * dlon
+
+    def search(self, wlat, wlon, lat, lon, r):
+        ''' Return the indices and squared distances of the candidate points
+            within r degrees (flat-earth) of lat, lon. '''
+        f = cos(radians(lat))
+        dlon = 360.0 if f * 180.0 <= r else r / f
+        pos = self.candidates(lat - r, lat + r, lon - dlon, lon + dlon)
+        idx, plat, plon = self.gather(pos, wlat, wlon)
+        return idx, self.dist2(plat, plon, lat, lon)
+
+    def knearest(self, wlat, wlon, lat, lon, k=1):
+        ''' Return the indices of the k points nearest to lat, lon, sorted by
+            distance. wlat and wlon are the current point arrays. '''
+        k = min(k, len(wlat))
+        if k == 0:
+            return np.array([], dtype=int)
+        r = self.cellsize
+        while True:
+            idx, d2 = self.search(wlat, wlon, lat, lon, r)
+            # Done when the k nearest candidates are all within the search
+            # radius, or when the whole earth was searched
+            if len(idx) >= k:
+                sel = np.lexsort((idx, d2))[:k]
+                if d2[sel[-1]] <= r * r or r >= 180.0:
+                    return idx[sel]
+            elif r >= 180.0:
+                return idx[np.lexsort((idx, d2))]
+            r *= 2.0
+
+    def radius(self, wlat, wlon, lat, lon, dist):
+        ''' Return the indices of the points within dist [nm] of lat, lon,
+            in ascending order. '''
+        r = dist / 60.0
+        idx, d2 = self.search(wlat, wlon, lat, lon, r)
+        return np.sort(idx[d2 <= r * r])
+
+    def inside(self, wlat, wlon, lat0, lat1, lon0, lon1):
+        ''' Return the indices of the points inside the box lat0 < lat < lat1,
+            lon0 < lon < lon1, in ascending order. '''
+        pos = self.candidates(lat0, lat1, lon0, lon1)
+        idx, plat, plon = self.gather(pos, wlat, wlon)
+        sel = (plat > lat0) & (plat < lat1) & (plon > lon0) & (plon < lon1)
+        return np.sort(idx[sel])
@@ -0,0 +1,145 @@
+''' Compact (version 2) encoding of the ACDATA stream.
+
+    Version 1 ACDATA messages contain the full float64 state of all aircraft,
+    the callsign list, and the conflict indices as a list of lists. Version 2
+    messages are either keyframes or delta frames. A keyframe contains the
+    callsign table, and the aircraft state fields in float32 (positions) or
+    float16 precision. A delta frame contains, for each field that changed
+    since the last keyframe, the float16 difference with the keyframe.
+    Keyframes are sent once every keyframe_interval messages, and when the
+    callsign table changes (create/delete). Because delta frames only refer
+    to the last keyframe, a client that misses a delta frame is not affected,
+    and a client that misses a keyframe is up to date at the next keyframe.
+    Conflicts are sent as an index array with the ownship of each conflict.
+    An encoder can send a selection of the aircraft, for instance only the
+    aircraft in the view of one client.
+    A version 2 message is marked with version=2, messages without version
+    are version 1 messages. '''
+from itertools import chain
+import numpy as np
+
+# Aircraft state fields of a version 2 message, and the precision with which
+# they are sent in a keyframe
+acfields = (('lat', np.float32), ('lon', np.float32), ('alt', np.float32),
+            ('tas', np.float16), ('cas', np.float16), ('trk', np.float16),
+            ('vs', np.float16), ('asasn', np.float16), ('asase', np.float16))
+
+# Per-aircraft trail fields, only sent when trails are switched on
+trailfields = (('traillastlat', np.float32), ('traillastlon', np.float32))
+
+# Fields of a version 1 message that are sent unchanged
+scalarfields = ('simt', 'nconf_tot', 'nlos_tot', 'nconf_exp', 'nlos_exp',
+                'nconf_cur', 'nlos_cur', 'translvl', 'vmin', 'vmax', 'swtrails',
+                'traillat0', 'traillon0', 'traillat1', 'traillon1')
+
+
+class ACDataEncoder(object):
+    ''' Encoder of a version 2 ACDATA stream. It keeps the callsign table and
+        the fields of the last keyframe, to send only what has changed. '''
+    keyframe_interval = 5
+
+    def __init__(self):
+        self.ids    = None
+        self.keyseq = 0
+        self.key    = dict()
+        self.count  = 0
+
+    def encode(self, data, idx=None):
+        ''' Encode version 1 ACDATA dict data as a version 2 message. When
+            index array idx is given, only the selected aircraft are sent. '''
+        ids = data['id'] if idx is None else [data['id'][i] for i in idx]
+        keyframe = (self.count % self.keyframe_interval == 0 or self.ids != ids)
+        self.count += 1
+
+        msg = {name: data[name] for name in scalarfields}
+        msg['version'] = 2
+        msg['ntraf']   = len(ids)
+
+        # Keyframes contain the callsign table
+        if keyframe:
+            self.ids = list(ids)
+            self.keyseq += 1
+            self.key = dict()
+            msg['id'] = self.ids
+        msg['keyseq'] = self.keyseq
+
+        # Aircraft state fields, or their difference with the keyframe
+        if not data['swtrails']:
+            for name, _ in trailfields:
+                self.key.pop(name, None)
+        for name, dtype in (acfields + trailfields if data['swtrails'] else acfields):
+            value = np.asarray(data[name]) if idx is None else np.asarray(data[name])[idx]
+            if name not in self.key:
+                msg[name] = self.key[name] = value.astype(dtype)
+            else:
+                # Difference in keyframe precision, so that unchanged
+                # fields are left out
+                value = value.astype(dtype).astype(np.float32)
+                delta = (value - self.key[name]).astype(np.float16)
+                if delta.any():
+                    msg['d' + name] = delta
+
+        # Conflicts: cpa positions, and the ownship index of each conflict
+        ntraf   = len(data['iconf'])
+        nconf   = np.fromiter(map(len, data['iconf']), dtype=np.int32, count=ntraf)
+        confown = np.zeros(len(data['confcpalat']), dtype=np.int32)
+        confidx = np.fromiter(chain.from_iterable(data['iconf']), dtype=np.int32,
+                              count=nconf.sum())
+        confown[confidx] = np.repeat(np.arange(ntraf, dtype=np.int32), nconf)
+        confcpalat = np.asarray(data['confcpalat'], dtype=np.float32)
+        confcpalon = np.asarray(data['confcpalon'], dtype=np.float32)
+        if idx is not None:
+            # Only conflicts of selected aircraft, with their new index
+            newidx = np.full(ntraf, -1, dtype=np.int32)
+            newidx[idx] = np.arange(len(idx), dtype=np.int32)
+            confown = newidx[confown]
+            sel = confown >= 0
+            confown, confcpalat, confcpalon = confown[sel], confcpalat[sel], confcpalon[sel]
+        msg['confcpalat'] = np.array(confcpalat)
+        msg['confcpalon'] = np.array(confcpalon)
+        msg['confown']    = confown
+        return msg
+
+
+class ACDataDecoder(object):
+    ''' Decoder of a version 2 ACDATA stream. It keeps the callsign table and
+        the fields of the last keyframe, to complete the delta frames. '''
+    def __init__(self):
+        self.ids    = []
+        self.keyseq = 0
+        self.key    = dict()
+        self.last   = dict()
+
+    def decode(self, msg):
+        ''' Decode an ACDATA message to a version 1 dict. Version 1 messages
+            are returned unchanged. '''
+        if msg.get('version', 1) < 2:
+            return msg
+        ntraf = msg['ntraf']
+        data  = {name: msg[name] for name in scalarfields}
+
+        if 'id' in msg:
+            self.ids, self.keyseq, self.key = msg['id'], msg['keyseq'], dict()
+        uptodate = (self.keyseq == msg['keyseq'])
+        data['id'] = self.ids if uptodate else ntraf * ['']
+
+        for name, _ in acfields + trailfields:
+            if name in msg:
+                self.key[name] = msg[name].astype(np.float32)
+            key = self.key.get(name)
+            if uptodate and key is not None:
+                value = key + msg['d' + name] if 'd' + name in msg else key
+            else:
+                # Without the keyframe of this message, keep the last values
+                value = self.last.get(name)
+            if value is None or len(value) != ntraf:
+                value = np.zeros(ntraf, dtype=np.float32)
+            data[name] = self.last[name] = value
+
+        # Conflicts
+        data['confcpalat'] = msg['confcpalat']
+        data['confcpalon'] = msg['confcpalon']
+        data['iconf'] = [[] for _ in range(ntraf)]
+        for confidx, own in enumerate(msg['confown'].tolist()):
+            data['iconf'][own].append(confidx)
+        return data
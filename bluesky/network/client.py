@@ -5,7 +5,7 @@ import msgpack
 import bluesky
 from bluesky.tools import Signal
 from bluesky.network.discovery import Discovery
-from bluesky.network.npcodec import encode_ndarray, decode_ndarray
+from bluesky.network.npcodec import encode_ndarray, decode_ndarray, unpack_frames
 
 
 class Client(object):
@@ -106,11 +106,17 @@ class Client(object):
                     self.event(eventname, pydata, self.sender_id)
 
             if socks.get(self.stream_in) == zmq.POLLIN:
-                msg = self.stream_in.recv_multipart()
-
-                strmname = msg[0][:-5]
-                sender_id = msg[0][-5:]
-                pydata = msgpack.unpackb(msg[1], object_hook=decode_ndarray, encoding='utf-8')
+                # Array frames are received without copying, and decoded
+                # directly on the frame buffers
+                msg = self.stream_in.recv_multipart(copy=False)
+
+                topic = msg[0].bytes
+                strmname = topic[:-5]
+                sender_id = topic[-5:]
+                # Streams to this client only have the client id in their name
+                if strmname.endswith(self.client_id):
+                    strmname = strmname[:-5]
+                pydata = unpack_frames(msg[1:])
                 self.stream(strmname, pydata, sender_id)
 
             # If we are in discovery mode, parse this message
@@ -5,7 +5,10 @@ import msgpack
 import bluesky
 from bluesky import stack
 from bluesky.tools import Timer
-from bluesky.network.npcodec import encode_ndarray, decode_ndarray
+from bluesky.network.npcodec import encode_ndarray, decode_ndarray, pack_frames
+
+# Register settings defaults
+bluesky.settings.set_variable_defaults(stream_frames=True)
 
 
 class Node(object):
@@ -79,4 +82,11 @@ class Node(object):
         self.event_io.send_multipart(target + [eventname, pydata])
 
     def send_stream(self, name, data):
-        self.stream_out.send_multipart([name + self.node_id, msgpack.packb(data, default=encode_ndarray, use_bin_type=True)])
+        ''' Send stream data. When the stream_frames setting is enabled, numpy
+            arrays in data are copied once, and sent as separate frames.
+            Otherwise the data is packed in a single msgpack frame, which can
+            also be read by older clients. '''
+        if bluesky.settings.stream_frames:
+            self.stream_out.send_multipart([name + self.node_id] + pack_frames(data), copy=False)
+        else:
+            self.stream_out.send_multipart([name + self.node_id, msgpack.packb(data, default=encode_ndarray, use_bin_type=True)])
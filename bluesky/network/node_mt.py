@@ -2,9 +2,13 @@
 from threading import Thread
 import zmq
 import msgpack
+import bluesky
 from bluesky import stack
 from bluesky.tools import Timer
-from bluesky.network.npcodec import encode_ndarray, decode_ndarray
+from bluesky.network.npcodec import encode_ndarray, decode_ndarray, pack_frames
+
+# Register settings defaults
+bluesky.settings.set_variable_defaults(stream_frames=True)
 
 class IOThread(Thread):
     ''' Separate thread for node I/O. '''
@@ -39,7 +43,7 @@ class IOThread(Thread):
                     break
                 fe_event.send_multipart(msg)
             if poll_socks.get(be_stream) == zmq.POLLIN:
-                fe_stream.send_multipart(be_stream.recv_multipart())
+                fe_stream.send_multipart(be_stream.recv_multipart(copy=False), copy=False)
 
 
 class Node(object):
@@ -122,4 +126,7 @@ class Node(object):
         self.event_io.send_multipart([stack.sender() or b'*', name, msgpack.packb(data, default=encode_ndarray, use_bin_type=True)])
 
     def send_stream(self, name, data):
-        self.stream_out.send_multipart([name + self.node_id, msgpack.packb(data, default=encode_ndarray, use_bin_type=True)])
+        if bluesky.settings.stream_frames:
+            self.stream_out.send_multipart([name + self.node_id] + pack_frames(data), copy=False)
+        else:
+            self.stream_out.send_multipart([name + self.node_id, msgpack.packb(data, default=encode_ndarray, use_bin_type=True)])
@@ -1,3 +1,4 @@
+import msgpack
 import numpy as np
 
 def encode_ndarray(o):
@@ -14,3 +15,38 @@ def decode_ndarray(o):
     if o.get(b'numpy'):
         return np.fromstring(o[b'data'], dtype=np.dtype(o[b'type'])).reshape(o[b'shape'])
     return o
+
+def pack_frames(data):
+    ''' Pack data in a list of message frames: a msgpack header frame,
+        followed by one frame with the raw buffer of each numpy array in data.
+        The frames get their own copy of each array: when they are sent with
+        copy=False, ZMQ transmits them directly from this memory, possibly
+        after the simulation has changed the original arrays in place. '''
+    buffers = []
+
+    def encode_frame(o):
+        if isinstance(o, np.ndarray):
+            buffers.append(np.array(o, order='C'))
+            return {b'numpy': True,
+                    b'type': o.dtype.str,
+                    b'shape': o.shape,
+                    b'frame': len(buffers)}
+        return o
+
+    header = msgpack.packb(data, default=encode_frame, use_bin_type=True)
+    return [header] + buffers
+
+def unpack_frames(frames):
+    ''' Unpack a list of message frames created by pack_frames. Frames can be
+        bytes or zmq.Frame objects. Arrays are created directly on the frame
+        buffers, and are therefore read-only. A single frame with a plain
+        msgpack (encode_ndarray) message is also accepted. '''
+    buffers = [getattr(frame, 'buffer', frame) for frame in frames]
+
+    def decode_frame(o):
+        if o.get(b'numpy') and b'frame' in o:
+            return np.frombuffer(buffers[o[b'frame']],
+                dtype=np.dtype(o[b'type'])).reshape(o[b'shape'])
+        return decode_ndarray(o)
+
+    return msgpack.unpackb(buffers[0], object_hook=decode_frame, raw=False)
@@ -8,6 +8,7 @@ import msgpack
 
 # Local imports
 import bluesky as bs
+from bluesky.stack import split_scenarios
 
 from .discovery import Discovery
 
@@ -27,16 +28,6 @@ bs.settings.set_variable_defaults(max_nnodes=cpu_count(),
                                   event_port=9000, stream_port=9001,
                                   enable_discovery=False)
 
-def split_scenarios(scentime, scencmd):
-    ''' Split the contents of a batch file into individual scenarios. '''
-    start = 0
-    for i in range(1, len(scencmd) + 1):
-        if i == len(scencmd) or scencmd[i][:4] == 'SCEN':
-            scenname = scencmd[start].split()[1].strip()
-            yield dict(name=scenname, scentime=scentime[start:i], scencmd=scencmd[start:i])
-            start = i
-
-
 class Server(ServerBase):
     ''' Implementation of the BlueSky simulation server. '''
     def __init__(self):
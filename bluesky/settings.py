@@ -42,6 +42,8 @@ def init():
                 configfile = sys.argv[i + 1]
             elif sys.argv[i] == '--scenfile':
                 globals()['scenfile'] = sys.argv[i + 1]
+            elif sys.argv[i] == '--batch':
+                globals()['batchfile'] = sys.argv[i + 1]
 
     # Create config file if it doesn't exist yet. Ask for gui settings if bluesky
     # was started with BlueSky.py
@@ -139,8 +141,12 @@ initialized = init()
 # or, in case of the pygame version, both.
 is_client = ('--client' in sys.argv)
 is_headless = ('--headless' in sys.argv)
-is_sim = ('--node' in sys.argv) or gui == 'pygame'
-is_gui = not (is_sim or is_headless) or gui == 'pygame'
+# A batch run, or a run of the benchmark suite, starts its own headless
+# simulation processes, see bluesky.simulation.headless.batch/benchsuite
+is_benchsuite = ('--benchsuite' in sys.argv)
+is_batch = ('--batch' in sys.argv) or is_benchsuite
+is_sim = ('--node' in sys.argv) or gui == 'pygame' or is_batch
+is_gui = not (is_sim or is_headless) or (gui == 'pygame' and not is_batch)
 start_server = not (is_client or is_sim or gui == 'pygame')
 if ('--discoverable' in sys.argv or is_headless):
     enable_discovery = True
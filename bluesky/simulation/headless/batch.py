@@ -0,0 +1,161 @@
+""" Headless batch runner: runs the scenarios of a batch file in fast time, in
+    a pool of headless simulation processes.
+
+    Usage: python BlueSky_qtgl.py --batch batchfile.scn
+
+    A batch file contains one or more scenarios, each starting with a SCEN
+    command. Each worker process initializes BlueSky once, when it gets its
+    first scenario, and takes the next scenario from the pool queue as soon
+    as it has finished the previous one. When the initialization fails, each
+    scenario of that worker is reported with the initialization error. The longest scenarios are handed out first, so that the
+    shortest ones fill up the gaps at the end of the batch. The number of
+    worker processes is limited by the max_nnodes setting.
+
+    A scenario that doesn't end by itself is stopped at the sim time limit
+    (batch_max_simt) or the wall-clock limit (batch_max_walltime), so that
+    it cannot block its worker. """
+import os
+import time
+from datetime import datetime
+from multiprocessing import Pool, cpu_count
+
+# Local imports
+import bluesky as bs
+from bluesky import settings
+
+# Register settings defaults
+settings.set_variable_defaults(max_nnodes=cpu_count(), scenario_path='scenario',
+                               log_path='output',
+                               batch_max_simt=24 * 3600.,   # [s] per scenario
+                               batch_max_walltime=3600.)    # [s] per scenario
+
+
+# Error of the initialization of this worker process, None when it is not
+# initialized yet
+initerror = None
+
+
+def initworker():
+    ''' Initialize BlueSky with a headless simulation in this worker
+        process, the first time it is called. Returns the initialization
+        error, or an empty string when BlueSky is initialized. '''
+    global initerror
+    if initerror is None:
+        try:
+            bs.init()
+            # Process the commands that are stacked at initialization, so
+            # that their output is not attributed to the first scenario
+            bs.stack.process()
+            initerror = ''
+        except Exception as e:
+            initerror = 'Initialization failed: %s: %s' % (type(e).__name__, e)
+    return initerror
+
+
+def runscenario(scen):
+    ''' Run one scenario in this worker process, and return its timing and
+        output. Log files of the scenario are written to scen['logpath']. '''
+    from bluesky import stack
+    from bluesky.tools import datalog
+
+    result = dict(name=scen['name'], logpath=scen['logpath'], error='')
+    # BlueSky is initialized here and not in a pool initializer: a pool keeps
+    # replacing workers whose initializer fails, and never returns
+    result['error'] = initworker()
+    if result['error']:
+        result.update(walltime=0.0, simt=0.0, nsteps=0, stepspersec=0.0,
+                      echo=[], logfiles=[])
+        return result
+
+    if not os.path.isdir(scen['logpath']):
+        os.makedirs(scen['logpath'])
+    settings.log_path = scen['logpath']
+
+    t0 = time.time()
+    try:
+        bs.sim.reset()
+        bs.sim.maxsimt     = settings.batch_max_simt
+        bs.sim.maxwalltime = settings.batch_max_walltime
+        stack.set_scendata(scen['scentime'], scen['scencmd'])
+        bs.sim.run()
+        if bs.sim.stopreason:
+            result['error'] = 'Stopped: ' + bs.sim.stopreason
+        # Write and close the logs of this scenario
+        datalog.reset()
+    except Exception as e:
+        result['error'] = '%s: %s' % (type(e).__name__, e)
+    walltime = time.time() - t0
+
+    result.update(walltime=walltime, simt=bs.sim.simt, nsteps=bs.sim.nsteps,
+                  stepspersec=bs.sim.nsteps / max(walltime, 1e-9),
+                  echo=list(bs.scr.echotext),
+                  logfiles=sorted(os.path.join(scen['logpath'], f)
+                                  for f in os.listdir(scen['logpath'])))
+    return result
+
+
+def loadbatch(fname):
+    ''' Read a batch file, and split it in scenarios. '''
+    from bluesky import stack
+
+    # Look for the file in the scenario folder if it is not found directly
+    if not os.path.isfile(fname):
+        fname = os.path.join(settings.scenario_path, fname)
+    if not os.path.splitext(fname)[1]:
+        fname += '.scn'
+
+    scentime, scencmd = stack.readscn(fname)
+    return list(stack.split_scenarios(scentime.tolist(), scencmd))
+
+
+def run(fname, nnodes=None):
+    ''' Run all scenarios in batch file fname. Prints the results, and
+        writes them to batch_results.csv in the output folder of the batch.
+        Returns a list with the results of each scenario. '''
+    scenarios = loadbatch(fname)
+    if not scenarios:
+        print('No scenarios defined in batch file!')
+        return []
+
+    # Each scenario writes its logs in its own folder
+    timestamp = datetime.now().strftime('%Y%m%d_%H-%M-%S')
+    batchname = os.path.splitext(os.path.basename(fname))[0]
+    outpath   = os.path.join(settings.log_path, '%s_%s' % (batchname, timestamp))
+    for i, scen in enumerate(scenarios):
+        scen['logpath'] = os.path.join(outpath, '%03d_%s' % (i, scen['name']))
+
+    # Hand out the longest scenarios first
+    scenarios.sort(key=lambda scen: scen['scentime'][-1], reverse=True)
+
+    nnodes = min(nnodes or settings.max_nnodes, cpu_count(), len(scenarios))
+    print('Running {} scenarios on {} nodes'.format(len(scenarios), nnodes))
+
+    results = []
+    t0 = time.time()
+    pool = Pool(nnodes)
+    try:
+        for result in pool.imap_unordered(runscenario, scenarios, chunksize=1):
+            print('{name}: {nsteps} steps in {walltime:.2f} s ({stepspersec:.0f} steps/s) {error}'.format(**result))
+            results.append(result)
+    finally:
+        pool.close()
+        pool.join()
+
+    print('Batch finished in %.2f s, results in %s' % (time.time() - t0, outpath))
+    results.sort(key=lambda result: result['logpath'])
+    writeresults(os.path.join(outpath, 'batch_results.csv'), results)
+    return results
+
+
+def writeresults(fname, results):
+    ''' Write a table with the results of a batch run. '''
+    if not os.path.isdir(os.path.dirname(fname)):
+        os.makedirs(os.path.dirname(fname))
+    with open(fname, 'w') as f:
+        f.write('# scenario, wall time [s], sim time [s], steps, steps/s, log path, logs, error\n')
+        for result in results:
+            f.write('%s,%.3f,%.2f,%d,%.1f,%s,%s,"%s"\n' % (
+                result['name'], result['walltime'], result['simt'], result['nsteps'],
+                result['stepspersec'], result['logpath'],
+                ';'.join(os.path.basename(f) for f in result['logfiles']),
+                result['error'].replace('"', "'")))
@@ -0,0 +1,179 @@
+""" Benchmark suite: runs synthetic traffic at a range of densities with each
+    combination of conflict detection method, conflict resolution method and
+    performance model, in fast time, without gui.
+
+    Usage: python BlueSky_qtgl.py --benchsuite
+
+    Traffic is generated with a fixed random seed in a square area, so each
+    run of the suite simulates exactly the same cases. For each case the
+    number of simulation steps per second, the peak memory use of the
+    simulation process, and the time per step of each subsystem (see
+    bluesky.tools.profiler) are written to a results file with a fixed
+    layout, which can be compared between commits with diff.
+
+    The performance model is selected when bluesky.traffic is imported, and
+    the peak memory use can only be measured per process, so each case
+    initializes BlueSky in a fresh worker process. A case that fails to
+    initialize, for instance because its performance model is not available,
+    is recorded with an error. The cases are run one after the other, so
+    that their timings don't affect each other. """
+import os
+import sys
+import time
+import random
+from multiprocessing import Pool
+import numpy as np
+
+# Local imports
+import bluesky as bs
+from bluesky import settings
+from bluesky.tools import profiler
+from bluesky.tools.aero import ft, kts
+
+try:
+    import resource
+except ImportError:
+    # Peak memory use is only available on unix systems
+    resource = None
+
+# Register settings defaults
+settings.set_variable_defaults(
+    log_path='output',
+    bench_densities=[5, 20, 80],  # [aircraft per 10000 nm2]
+    bench_size=300.0,             # [nm] Side of the square traffic area
+    bench_duration=120.0,         # [s] Simulated time per case
+    bench_seed=1,
+    bench_cd=['STATEBASED', 'SPATIAL'],
+    bench_cr=['OFF', 'MVP', 'EBY', 'SSD', 'SWARM'],
+    bench_perf=['bluesky', 'bada', 'nap'],
+    bench_actype='B744',
+    bench_results='benchsuite.csv')
+
+# Subsystems of which the time per step is reported, in the order of the
+# results file
+subsystems = list(dict.fromkeys(name for name, _, _ in profiler.subsystems))
+
+
+def maketraffic(ntraf, seed):
+    ''' Create ntraf aircraft at random positions, headings, altitudes and
+        speeds in the benchmark area around 52N 4E. '''
+    # The same traffic for each case with this seed
+    rng = np.random.RandomState(seed)
+    random.seed(seed)
+    np.random.seed(seed)
+
+    dlat  = settings.bench_size / 60.0
+    dlon  = dlat / np.cos(np.radians(52.0))
+    acid  = ['BS%05d' % i for i in range(ntraf)]
+    aclat = 52.0 + (rng.rand(ntraf) - 0.5) * dlat
+    aclon = 4.0 + (rng.rand(ntraf) - 0.5) * dlon
+    achdg = rng.randint(0, 360, ntraf).astype(float)
+    acalt = rng.randint(100, 400, ntraf) * 100.0 * ft
+    acspd = rng.randint(250, 350, ntraf) * kts
+    bs.traf.cre(acid, settings.bench_actype, aclat, aclon, achdg, acalt, acspd)
+
+
+def runcase(case):
+    ''' Initialize BlueSky with the performance model of this case, and a
+        headless simulation, in this fresh worker process. Then run the case,
+        and return its results. '''
+    result = dict(case, nsteps=0, stepspersec=0.0, memory=0.0, error='')
+    try:
+        settings.performance_model = case['perf']
+        bs.init()
+        bs.stack.process()
+        bs.sim.reset()
+        for setmethod, method in ((bs.traf.asas.SetCDmethod, case['cd']),
+                                  (bs.traf.asas.SetCRmethod, case['cr'])):
+            res = setmethod(method)
+            if isinstance(res, tuple) and not res[0]:
+                # Unavailable method, or a CD/CR combination that doesn't fit
+                result['error'] = res[1].split('\n')[0]
+                return result
+        bs.traf.asas.toggle(True)
+        maketraffic(case['ntraf'], settings.bench_seed)
+        if bs.traf.ntraf < case['ntraf']:
+            result['error'] = 'Could not create the traffic'
+            return result
+
+        bs.sim.fastforward(settings.bench_duration)
+        profiler.start()
+        t0 = time.perf_counter()
+        bs.sim.run()
+        walltime = time.perf_counter() - t0
+        profiler.stop()
+    except Exception as e:
+        profiler.stop()
+        result['error'] = '%s: %s' % (type(e).__name__, e)
+        return result
+
+    result['nsteps'] = bs.sim.nsteps
+    result['stepspersec'] = bs.sim.nsteps / max(walltime, 1e-9)
+    if resource:
+        # Peak resident memory of this process [MB]. ru_maxrss is in kB,
+        # but in bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result['memory'] = maxrss / (1024.0 ** 2 if sys.platform == 'darwin' else 1024.0)
+    timings = {res['name']: res['perstep'] for res in profiler.results()}
+    result['timings'] = [timings.get(name, 0.0) for name in subsystems]
+    return result
+
+
+def makecases():
+    ''' Return the list of benchmark cases of the suite, per performance
+        model. '''
+    area = settings.bench_size ** 2
+    cases = dict()
+    for perf in settings.bench_perf:
+        cases[perf] = [dict(perf=perf, density=density,
+                            ntraf=int(round(density * area / 1e4)), cd=cd, cr=cr)
+                       for density in settings.bench_densities
+                       for cd in settings.bench_cd
+                       for cr in settings.bench_cr]
+    return cases
+
+
+def run(fname=None):
+    ''' Run all cases of the benchmark suite. Prints the results, and writes
+        them to fname (by default bench_results in the output folder).
+        Returns a list with the results of each case. '''
+    fname = fname or os.path.join(settings.log_path, settings.bench_results)
+    results = []
+    for perf, cases in makecases().items():
+        print('Running {} benchmark cases with performance model {}'.format(len(cases), perf))
+        # A fresh worker process per case, so that the peak memory use and
+        # the CD/CR methods of one case don't carry over to the next. BlueSky
+        # is initialized in runcase and not in a pool initializer: a pool
+        # keeps replacing workers whose initializer fails, and never returns
+        pool = Pool(1, maxtasksperchild=1)
+        try:
+            for result in pool.imap(runcase, cases):
+                print('{perf} {ntraf} aircraft {cd}/{cr}: {nsteps} steps, '
+                      '{stepspersec:.1f} steps/s {error}'.format(**result))
+                results.append(result)
+        finally:
+            pool.close()
+            pool.join()
+
+    writeresults(fname, results)
+    print('Benchmark results written to', fname)
+    return results
+
+
+def writeresults(fname, results):
+    ''' Write a table with the results of the benchmark suite. '''
+    if os.path.dirname(fname) and not os.path.isdir(os.path.dirname(fname)):
+        os.makedirs(os.path.dirname(fname))
+    with open(fname, 'w') as f:
+        f.write('# BlueSky benchmark suite, %.0f s per case, area %.0f x %.0f nm, seed %d\n' %
+                (settings.bench_duration, settings.bench_size, settings.bench_size,
+                 settings.bench_seed))
+        f.write('# perf, density [ac/10000nm2], aircraft, cd, cr, steps, steps/s, '
+                'peak memory [MB], ' +
+                ', '.join(name + ' [ms/step]' for name in subsystems) + ', error\n')
+        for r in results:
+            f.write('%s,%g,%d,%s,%s,%d,%.1f,%.1f,%s,"%s"\n' % (
+                r['perf'], r['density'], r['ntraf'], r['cd'], r['cr'],
+                r['nsteps'], r['stepspersec'], r['memory'],
+                ','.join('%.3f' % (1e3 * t) for t in r.get('timings', [0.0] * len(subsystems))),
+                r['error'].replace('"', "'")))
@@ -0,0 +1,98 @@
+""" ScreenIO is a screen proxy on the simulation side for headless batch runs.
+    Display commands are accepted and ignored, echoed text is collected. """
+import numpy as np
+
+# Local imports
+import bluesky as bs
+
+
+class ScreenIO(object):
+    """Class within a headless sim which stands in for the GUI"""
+
+    def __init__(self):
+        # Screen state defaults
+        self.def_pan     = (0.0, 0.0)
+        self.def_zoom    = 1.0
+
+        # Timing bookkeeping counter
+        self.samplecount = 0
+
+        # Echoed text of the current scenario
+        self.echotext    = []
+
+    def update(self):
+        if bs.sim.state == bs.OP:
+            self.samplecount += 1
+
+    def reset(self):
+        self.samplecount = 0
+        self.echotext    = []
+
+    def echo(self, text='', flags=0):
+        if text:
+            self.echotext.append(text)
+
+    def cmdline(self, text):
+        pass
+
+    def getviewctr(self):
+        return self.def_pan
+
+    def getviewbounds(self):
+        lat, lon = self.def_pan
+        lat0 = lat - 1.0 / self.def_zoom
+        lat1 = lat + 1.0 / self.def_zoom
+        lon0 = lon - 1.0 / (self.def_zoom * np.cos(np.radians(lat)))
+        lon1 = lon + 1.0 / (self.def_zoom * np.cos(np.radians(lat)))
+        return lat0, lat1, lon0, lon1
+
+    def zoom(self, zoom, absolute=True):
+        self.def_zoom = zoom * (1.0 if absolute else self.def_zoom)
+
+    def pan(self, *args):
+        ''' Move center of display, relative of to absolute position lat,lon '''
+        lat, lon = self.def_pan
+        if args[0] == "LEFT":
+            lon -= 0.5
+        elif args[0] == "RIGHT":
+            lon += 0.5
+        elif args[0] == "UP":
+            lat += 0.5
+        elif args[0] == "DOWN":
+            lat -= 0.5
+        else:
+            lat, lon = args
+        self.def_pan = (lat, lon)
+
+    def shownd(self, acid):
+        pass
+
+    def symbol(self):
+        pass
+
+    def feature(self, switch, argument=None):
+        pass
+
+    def trails(self, sw):
+        pass
+
+    def showroute(self, acid):
+        return True
+
+    def addnavwpt(self, name, lat, lon):
+        return True
+
+    def show_file_dialog(self):
+        return ''
+
+    def show_cmd_doc(self, cmd=''):
+        pass
+
+    def filteralt(self, *args):
+        pass
+
+    def objappend(self, objtype, objname, data):
+        pass
+
+    def event(self, eventname, eventdata, sender_rte):
+        return False
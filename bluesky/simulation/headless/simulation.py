@@ -0,0 +1,186 @@
+""" Headless simulation, used by the batch runner. It runs in fast time, without
+    gui and network I/O. """
+import time
+
+# Local imports
+import bluesky as bs
+from bluesky import settings, stack
+from bluesky.tools import datalog, areafilter, plugin
+from bluesky.tools.misc import txt2tim, tim2txt
+
+onedayinsec = 24 * 3600  # [s] time of one day in seconds for clock time
+
+# Register settings defaults
+settings.set_variable_defaults(simdt=0.05)
+
+
+class Simulation(object):
+    ''' The headless simulation object. '''
+    def __init__(self):
+        self.state       = bs.INIT
+        self.running     = True
+
+        # Starting simulation time [seconds]
+        self.simt        = 0.0
+
+        # Simulation timestep [seconds]
+        self.simdt       = settings.simdt
+
+        # Simulation timestep multiplier: has no effect in fast time
+        self.dtmult      = 1.0
+
+        # Simulated clock time
+        self.deltclock   = 0.0
+        self.simtclock   = self.simt
+
+        # A headless simulation always runs in fast time
+        self.ffmode      = True
+        self.ffstop      = None
+
+        # Number of timesteps of the current scenario
+        self.nsteps      = 0
+
+        # Limits of a run: sim time [s] and wall-clock time [s], None for
+        # no limit. stopreason tells which limit stopped the last run.
+        self.maxsimt     = None
+        self.maxwalltime = None
+        self.stopreason  = ''
+
+    def step(self):
+        ''' Perform a simulation timestep. '''
+        if self.state == bs.OP:
+            # Plugins pre-update
+            plugin.preupdate(self.simt)
+
+        # Update screen logic
+        bs.scr.update()
+
+        # Simulation starts as soon as there is traffic, or pending commands
+        if self.state == bs.INIT:
+            if bs.traf.ntraf > 0 or stack.get_scenlen() > 0:
+                self.op()
+
+        if self.state == bs.OP:
+            stack.checkfile(self.simt)
+
+        # Always update stack
+        stack.process()
+
+        if self.state == bs.OP:
+
+            bs.traf.update(self.simt, self.simdt)
+
+            # Update plugins
+            plugin.update(self.simt)
+
+            # Update loggers
+            datalog.postupdate()
+
+            # Update time for the next timestep
+            self.simt += self.simdt
+            self.nsteps += 1
+
+            # Update clock
+            self.simtclock = (self.deltclock + self.simt) % onedayinsec
+
+    def run(self):
+        ''' Run the loaded scenario until it is paused (HOLD) or stopped
+            (QUIT), until the end of a fast-forward period, until there
+            are no aircraft and no scenario commands left, or until the sim
+            time or wall-clock time limit is reached. '''
+        self.stopreason = ''
+        tstop = None if self.maxwalltime is None else time.time() + self.maxwalltime
+        self.step()
+        while self.state == bs.OP and self.running:
+            self.step()
+            if self.ffstop is not None and self.simt >= self.ffstop:
+                self.pause()
+            elif bs.traf.ntraf == 0 and stack.get_scenlen() == 0:
+                self.pause()
+            elif self.maxsimt is not None and self.simt >= self.maxsimt:
+                self.stopreason = 'sim time limit of %.0f s reached' % self.maxsimt
+                self.pause()
+            elif tstop is not None and time.time() >= tstop:
+                self.stopreason = 'wall-clock limit of %.0f s reached' % self.maxwalltime
+                self.pause()
+
+    def stop(self):
+        self.state = bs.END
+        datalog.reset()
+
+        # Close savefile which may be open for recording
+        bs.stack.saveclose()  # Close reording file if it is on
+
+    def quit(self):
+        self.running = False
+        datalog.reset()
+
+    def op(self):
+        self.state  = bs.OP
+
+    def pause(self):
+        self.state = bs.HOLD
+
+    def reset(self):
+        self.simt      = 0.0
+        self.deltclock = 0.0
+        self.simtclock = self.simt
+        self.state     = bs.INIT
+        self.ffstop    = None
+        self.nsteps    = 0
+        plugin.reset()
+        bs.navdb.reset()
+        bs.traf.reset()
+        stack.reset()
+        datalog.reset()
+        areafilter.reset()
+        bs.scr.reset()
+
+    def setDt(self, dt):
+        self.simdt = abs(dt)
+
+    def setDtMultiplier(self, mult):
+        self.dtmult = mult
+
+    def setFixdt(self, flag, nsec=None):
+        if flag:
+            self.fastforward(nsec)
+
+    def fastforward(self, nsec=None):
+        self.ffstop = None if nsec is None else self.simt + nsec
+
+    def benchmark(self, fname='IC', dt=300.0):
+        return False, 'BENCHMARK is not available in a batch run'
+
+    def batch(self, filename):
+        return False, 'BATCH is not available in a batch run'
+
+    def addnodes(self, count=1):
+        return False, 'ADDNODES is not available in a batch run'
+
+    def setclock(self, txt=""):
+        """ Set simulated clock time offset"""
+        if txt == "":
+            pass  # avoid error message, just give time
+
+        elif txt.upper() == "RUN":
+            self.deltclock = 0.0
+            self.simtclock = self.simt
+
+        elif txt.upper() == "REAL":
+            tclock = time.localtime()
+            self.simtclock = tclock.tm_hour * 3600. + tclock.tm_min * 60. + tclock.tm_sec
+            self.deltclock = self.simtclock - self.simt
+
+        elif txt.upper() == "UTC":
+            utclock = time.gmtime()
+            self.simtclock = utclock.tm_hour * 3600. + utclock.tm_min * 60. + utclock.tm_sec
+            self.deltclock = self.simtclock - self.simt
+
+        elif txt.replace(":", "").replace(".", "").isdigit():
+            self.simtclock = txt2tim(txt)
+            self.deltclock = self.simtclock - self.simt
+        else:
+            return False, "Time syntax error"
+
+        return True, "Time is now " + tim2txt(self.simtclock)
@@ -4,8 +4,12 @@ import numpy as np
 
 # Local imports
 import bluesky as bs
-from bluesky import stack
+from bluesky import settings, stack
 from bluesky.tools import Timer
+from bluesky.network.acdata import ACDataEncoder
+
+# Register settings defaults
+settings.set_variable_defaults(acdata_version=1, viewfilter_margin=0.25)
 
 
 class ScreenIO(object):
@@ -31,9 +35,20 @@ class ScreenIO(object):
         self.client_pan  = dict()
         self.client_zoom = dict()
         self.client_ar   = dict()
+        # Altitude filter default, and overrides per client
+        self.def_filteralt    = None
+        self.client_filteralt = dict()
 
         self.route_acid  = None
 
+        # Encoder of the broadcast ACDATA stream, when it is sent in the
+        # compact format (acdata_version = 2)
+        self.acdata      = ACDataEncoder()
+        # Encoders of the compact ACDATA streams of clients that announced
+        # they can decode them, and the clients that have a view filter
+        self.client_acdata = dict()
+        self.client_viewfilter = set()
+
         # Timing bookkeeping counters
         self.prevtime    = 0.0
         self.samplecount = 0
@@ -57,6 +72,13 @@ class ScreenIO(object):
         self.samplecount = 0
         self.prevcount   = 0
         self.prevtime    = 0.0
+        self.def_filteralt = None
+        self.client_filteralt.clear()
+
+        # Clients announce their ACDATA version again after the reset, and
+        # get a new keyframe
+        self.client_acdata.clear()
+        self.client_viewfilter.clear()
 
         # Communicate reset to gui
         bs.sim.send_event(b'RESET', b'ALL')
@@ -71,9 +93,9 @@ class ScreenIO(object):
     def getviewctr(self):
         return self.client_pan.get(stack.sender()) or self.def_pan
 
-    def getviewbounds(self):
+    def getviewbounds(self, sender=None):
         # Get appropriate lat/lon/zoom/aspect ratio
-        sender   = stack.sender()
+        sender   = sender or stack.sender()
         lat, lon = self.client_pan.get(sender) or self.def_pan
         zoom     = self.client_zoom.get(sender) or self.def_zoom
         ar       = self.client_ar.get(sender) or 1.0
@@ -157,8 +179,31 @@ class ScreenIO(object):
         bs.sim.send_event(b'SHOWDIALOG', dict(dialog='DOC', args=cmd))
 
     def filteralt(self, *args):
+        # Keep the filter for the view filters of the clients
+        filt   = tuple(args[1:3]) if args[0] and len(args) >= 3 else None
+        sender = stack.sender()
+        if sender:
+            self.client_filteralt[sender] = filt
+        else:
+            self.def_filteralt = filt
+            self.client_filteralt.clear()
         bs.sim.send_event(b'DISPLAYFLAG', dict(flag='FILTERALT', args=args))
 
+    def getviewfilter(self, client_id):
+        ''' Return the indices of the aircraft in the view of a client, plus a
+            margin of viewfilter_margin times the view size, and within its
+            altitude filter. '''
+        lat0, lat1, lon0, lon1 = self.getviewbounds(client_id)
+        dlat = 0.5 * (1.0 + 2.0 * settings.viewfilter_margin) * (lat1 - lat0)
+        dlon = 0.5 * (1.0 + 2.0 * settings.viewfilter_margin) * (lon1 - lon0)
+        lonctr = 0.5 * (lon0 + lon1)
+        inview = (np.abs(bs.traf.lat - 0.5 * (lat0 + lat1)) <= dlat) * \
+                 (np.abs((bs.traf.lon - lonctr + 180.0) % 360.0 - 180.0) <= dlon)
+        filt = self.client_filteralt.get(client_id, self.def_filteralt)
+        if filt:
+            inview *= (bs.traf.alt >= filt[0]) * (bs.traf.alt <= filt[1])
+        return np.flatnonzero(inview)
+
     def objappend(self, objtype, objname, data):
         """Add a drawing object to the radar screen using the following inputs:
            objtype: "LINE"/"POLY" /"BOX"/"CIRCLE" = string with type of object
@@ -177,6 +222,36 @@ class ScreenIO(object):
             self.client_ar[sender_rte[-1]]   = eventdata['ar']
             return True
 
+        if eventname == b'ACDATAVERSION':
+            # A client announces the highest ACDATA version it can decode.
+            # Clients that decode version 2 get their own compact stream,
+            # with topic ACDATA + client id. The reply tells the client which
+            # stream to subscribe to.
+            # Clients that leave this node announce version 1.
+            if eventdata.get('version', 1) >= 2:
+                self.client_acdata.setdefault(sender_rte[-1], ACDataEncoder())
+            else:
+                self.client_acdata.pop(sender_rte[-1], None)
+                self.client_viewfilter.discard(sender_rte[-1])
+                self.client_filteralt.pop(sender_rte[-1], None)
+            version = 2 if sender_rte[-1] in self.client_acdata else 1
+            bs.sim.send_event(b'ACDATAVERSION', dict(version=version), target=sender_rte)
+            return True
+
+        if eventname == b'VIEWFILTER':
+            # A client with its own compact ACDATA stream switches on or off
+            # that only the aircraft in its view are sent
+            if eventdata.get('enabled'):
+                self.client_acdata.setdefault(sender_rte[-1], ACDataEncoder())
+                self.client_viewfilter.add(sender_rte[-1])
+                if 'pan' in eventdata:
+                    self.client_pan[sender_rte[-1]]  = eventdata['pan']
+                    self.client_zoom[sender_rte[-1]] = eventdata['zoom']
+                    self.client_ar[sender_rte[-1]]   = eventdata['ar']
+            else:
+                self.client_viewfilter.discard(sender_rte[-1])
+            return True
+
         return False
 
     # =========================================================================
@@ -239,6 +314,16 @@ class ScreenIO(object):
             data['asasn']  = np.zeros(bs.traf.ntraf, dtype=np.float32)
             data['asase']  = np.zeros(bs.traf.ntraf, dtype=np.float32)
 
+        # Clients that decode version 2 get their own compact stream, with
+        # only the aircraft in their view when they have a view filter
+        for client_id, encoder in self.client_acdata.items():
+            idx = self.getviewfilter(client_id) if client_id in self.client_viewfilter else None
+            bs.sim.send_stream(b'ACDATA' + client_id, encoder.encode(data, idx))
+
+        # The broadcast stream is sent in version 1, which all clients can
+        # decode, unless acdata_version is set to 2
+        if settings.acdata_version >= 2:
+            data = self.acdata.encode(data)
         bs.sim.send_stream(b'ACDATA', data)
 
     def send_route_data(self):
@@ -254,12 +339,12 @@ class ScreenIO(object):
                 data['aclat']  = bs.traf.lat[idx]
                 data['aclon']  = bs.traf.lon[idx]
 
-                data['wplat']  = route.wplat
-                data['wplon']  = route.wplon
+                data['wplat']  = route.wplat.tolist()
+                data['wplon']  = route.wplon.tolist()
 
-                data['wpalt']  = route.wpalt
-                data['wpspd']  = route.wpspd
+                data['wpalt']  = route.wpalt.tolist()
+                data['wpspd']  = route.wpspd.tolist()
 
-                data['wpname'] = route.wpname
+                data['wpname'] = route.wpname.tolist()
 
             bs.sim.send_stream(b'ROUTEDATA', data)  # Send route data to GUI
@@ -19,9 +19,10 @@ import re
 import os
 import os.path
 import subprocess
+import hashlib
 import numpy as np
 import bluesky as bs
-from bluesky.tools import geo, areafilter, plugin, plotter
+from bluesky.tools import geo, areafilter, plugin, plotter, cachefile, profiler
 from bluesky.tools.aero import kts, ft, fpm, tas2cas, density
 from bluesky.tools.misc import txt2alt, tim2txt, cmdsplit
 from bluesky.tools.calculator import calculator
@@ -117,8 +118,13 @@ scenfile  = "" # Currently used scenario file (for reading)
 scenname  = "" # Currently used scenario name (for reading)
 scentime  = [] # Times of the commands from the read scenario file
 scencmd   = [] # Commands from the scenario file
+scenidx   = 0  # Index of the next scenario command to be stacked
 sender_rte = None  # bs net route to sender
 
+# Version of the cached scenario files: increment this to the current date
+# if the format of the cache changes
+scncache_version = 'v20261018'
+
 # When SAVEIC is used, we will also have a recoding scenario file handle
 savefile = None # File object of recording scenario file
 defexcl = ["PAN","ZOOM","HOLD","POS","INSEDIT","SAVEIC","QUIT"] # Commands to be excluded, default
@@ -283,8 +289,8 @@ def init():
         ],
         "CRE": [
 # <<<<<<< HEAD
-            "CRE acid,type,lat,lon,hdg,alt,spd,mass",
-            "txt,txt,latlon,hdg,alt,spd,float",
+            "CRE acid,type,lat,lon,hdg,alt,spd,[mass]",
+            "txt,txt,latlon,hdg,alt,spd,[float]",
             bs.traf.create,
 # =======
 #             "CRE acid,type,lat,lon,hdg,alt,spd",
@@ -294,6 +300,12 @@ def init():
 # >>>>>>> upstream/master
             "Create an aircraft"
         ],
+        "CREBATCH": [
+            "CREBATCH acid,type,lat,lon,hdg,alt,spd,[acid,type,lat,lon,hdg,alt,spd,...]",
+            "txt,txt,latlon,hdg,alt,spd,...,...,...,...,...,...",  # all 6 args are repeated
+            lambda *args: bs.traf.cre(*[list(args[i::7]) for i in range(7)]),
+            "Create multiple aircraft in one batch"
+        ],
         "CRECONFS": [
             "CRECONFS id, type, targetid, dpsi, cpa, tlos_hor, dH, tlos_ver, spd",
             "txt,txt,acid,hdg,float,time,[alt,time,spd]",
@@ -481,7 +493,7 @@ def init():
         "MCRE": [
             "MCRE n, [type/*, alt/*, spd/*, dest/*]",
             "int,[txt,alt,spd,txt]",
-            bs.traf.create,
+            bs.traf.mcre,
             "Multiple random create of n aircraft in current view"
         ],
         # "METRIC": [
@@ -580,6 +592,12 @@ def init():
             bs.traf.asas.SetPrio,
             "Define priority rules (right of way) for conflict resolution"
         ],
+        "PROFILE": [
+            "PROFILE START/STOP/DUMP [fname.csv/fname.json]/PLUGIN [name]",
+            "[txt,string]",
+            profiler.profile,
+            "Time the subsystems of each simulation step, and print or save the timings"
+        ],
         "QUIT": [
             "QUIT",
             "",
@@ -732,6 +750,12 @@ def init():
             bs.traf.wind.add,
             "Define a wind vector as part of the 2D or 3D wind field"
         ],
+        "WINDGRID": [
+            "WINDGRID filename",
+            "string",
+            bs.traf.wind.loadgrid,
+            "Load a regular lat/lon/alt wind grid from a CSV or NumPy table (lat,lon,alt,dir,spd)"
+        ],
         "ZONEDH": [
             "ZONEDH [height]",
             "[float]",
@@ -793,14 +817,30 @@ def get_scenname():
 
 def get_scendata():
     ''' Return the scenario data that was loaded from a scenario file. '''
-    return scentime, scencmd
+    return scentime[scenidx:], scencmd[scenidx:]
 
 
 def set_scendata(newtime, newcmd):
     ''' Set the scenario data. This is used by the batch logic. '''
-    global scentime, scencmd
+    global scentime, scencmd, scenidx
     scentime = newtime
     scencmd  = newcmd
+    scenidx  = 0
+
+
+def get_scenlen():
+    ''' Return the number of scenario commands that still have to be stacked. '''
+    return len(scencmd) - scenidx
+
+
+def split_scenarios(scentime, scencmd):
+    ''' Split the contents of a batch file into individual scenarios. '''
+    start = 0
+    for i in range(1, len(scencmd) + 1):
+        if i == len(scencmd) or scencmd[i][:4] == 'SCEN':
+            scenname = scencmd[start].split()[1].strip()
+            yield dict(name=scenname, scentime=scentime[start:i], scencmd=scencmd[start:i])
+            start = i
 
 
 def scenarioinit(name):
@@ -959,10 +999,11 @@ def setSeed(value):
 
 def reset():
     ''' Reset the stack. '''
-    global scentime, scencmd, scenname, saveexcl, defexcl
+    global scentime, scencmd, scenidx, scenname, saveexcl, defexcl
 
     scentime = []
     scencmd  = []
+    scenidx  = 0
     scenname = ''
 
     saveclose()
@@ -984,27 +1025,19 @@ def sched_cmd(time, args, relative=False):
     # insert time at idx in scentime, insert cmd at idx in scencmd
     if relative:
         time += bs.sim.simt
-    # in case there is no scentime yet, only extend
-
-    if len(scentime) == 0:
-        scentime.extend([time])
-        scencmd.extend([tostack])
-    else:
-        try:
-            idx = scentime.index(next(sctime for sctime in scentime if sctime > time))
-
-            scentime.insert(idx, time)
-            scencmd.insert(idx, tostack)
-        except:
-            scentime.extend([time])
-            scencmd.extend([tostack])
 
+    # Only search the commands that have not been stacked yet, when there
+    # is no later command, append at the end
+    idx = next((i for i in range(scenidx, len(scentime)) if scentime[i] > time),
+               len(scentime))
+    scentime.insert(idx, time)
+    scencmd.insert(idx, tostack)
 
     return True
 
 
 def openfile(fname, *args, mergeWithExisting=False):
-    global scentime, scencmd
+    global scentime, scencmd, scenidx
 
     orgfname = fname # Save original filename for if path spalitting fails (relative path)
 
@@ -1045,45 +1078,88 @@ def openfile(fname, *args, mergeWithExisting=False):
             return False, "Error: cannot find file: " + fname_full
 
     # Split scenario file line in times and commands
+    newtime, newcmd = readscn(fname_full, arglst)
+    newtime = (newtime + t_offset).tolist()
+
     if not mergeWithExisting:
         # When a scenario file is read with PCALL the resulting commands
         # need to be merged with the existing commands. Otherwise the
         # old scenario commands are cleared.
-        scentime = []
-        scencmd  = []
-
-    with open(fname_full, 'r') as fscen:
-        for line in fscen:
-
-            # Replace arguments if specified: %0 by first argument, %1 by seconds, %2
-            for iarg, txtarg in enumerate(arglst):
-                line = line.replace("%"+str(iarg),arglst[iarg])
-
-            # Skip emtpy lines and comments
-            if len(line.strip()) > 12 and line[0] != "#":
-                # Try reading timestamp and command
-                try:
-                    icmdline = line.index('>')
-                    tstamp   = line[:icmdline]
-                    ttxt     = tstamp.strip().split(':')
-                    ihr      = int(ttxt[0]) * 3600.0
-                    imin     = int(ttxt[1]) * 60.0
-                    xsec     = float(ttxt[2])
-                    scentime.append(ihr + imin + xsec + t_offset)
-                    scencmd.append(line[icmdline + 1:].strip("\n"))
-                except:
-                    if not(len(line.strip()) > 0 and line.strip()[0] == "#"):
-                        print("except this:"+line)
-                    pass  # nice try, we will just ignore this syntax error
-
-    if mergeWithExisting:
+        scentime, scencmd, scenidx = newtime, newcmd, 0
+    else:
         # If we are merging we need to sort the resulting command list
+        scentime = scentime[scenidx:] + newtime
+        scencmd  = scencmd[scenidx:] + newcmd
+        scenidx  = 0
         scentime, scencmd = [list(x) for x in zip(*sorted(
             zip(scentime, scencmd), key=lambda pair: pair[0]))]
 
     return True
 
 
+def readscn(fname, arglst=None):
+    """ Read a scenario file, and return an array with the times of the
+        commands relative to the start of the file, and a list of commands.
+        Without arguments, the parsed scenario is cached, the cache is
+        renewed when the modification time or size of the file changes. """
+    if arglst:
+        with open(fname, 'r') as fscen:
+            text = fscen.read()
+
+        # Replace arguments if specified: %0 by first argument, %1 by seconds, %2
+        for iarg, txtarg in enumerate(arglst):
+            text = text.replace("%" + str(iarg), txtarg)
+
+        return parsescn(text)
+
+    fstat = os.stat(fname)
+    cachename = 'scn_' + hashlib.md5(os.path.abspath(fname).encode()).hexdigest() + '.p'
+    with cachefile.openfile(cachename, (scncache_version, fstat.st_mtime, fstat.st_size)) as cache:
+        try:
+            newtime = cache.load()
+            newcmd  = cache.load()
+        except Exception as e:
+            # Missing, outdated, truncated or otherwise damaged cache file
+            print(e.args[0] if isinstance(e, cachefile.CacheError) else
+                  'Damaged cache file %s: %s' % (cache.fname, e))
+            # Close the cache file if it was opened for reading, so that the
+            # new cache is written to a new file
+            if cache.file:
+                cache.file.close()
+                cache.file = None
+            with open(fname, 'r') as fscen:
+                newtime, newcmd = parsescn(fscen.read())
+            cache.dump(newtime)
+            cache.dump(newcmd)
+
+    return newtime, newcmd
+
+
+def parsescn(text):
+    """ Split the lines of a scenario file in times and commands. """
+    newtime = []
+    newcmd  = []
+    for line in text.split('\n'):
+        # Skip emtpy lines and comments
+        if len(line.strip()) > 12 and line[0] != "#":
+            # Try reading timestamp and command
+            try:
+                icmdline = line.index('>')
+                tstamp   = line[:icmdline]
+                ttxt     = tstamp.strip().split(':')
+                ihr      = int(ttxt[0]) * 3600.0
+                imin     = int(ttxt[1]) * 60.0
+                xsec     = float(ttxt[2])
+                newtime.append(ihr + imin + xsec)
+                newcmd.append(line[icmdline + 1:])
+            except:
+                if not(len(line.strip()) > 0 and line.strip()[0] == "#"):
+                    print("except this:"+line)
+                pass  # nice try, we will just ignore this syntax error
+
+    return np.array(newtime), newcmd
+
+
 def ic(filename=''):
     ''' Function implementing the IC stack command. '''
     global scenfile, scenname
@@ -1114,11 +1190,17 @@ def ic(filename=''):
 
 
 def checkfile(simt):
-    ''' Check if commands from the scenario buffer need to be stacked. '''
-    while len(scencmd) > 0 and simt >= scentime[0]:
-        stack(scencmd[0])
-        del scencmd[0]
-        del scentime[0]
+    ''' Check if commands from the scenario buffer need to be stacked.
+        All commands that are due are stacked together, so consecutive CRE
+        commands with the same time are created in one batch by process(). '''
+    global scentime, scencmd, scenidx
+    while scenidx < len(scencmd) and simt >= scentime[scenidx]:
+        stack(scencmd[scenidx])
+        scenidx += 1
+
+    # Clear the scenario buffer when all commands have been stacked
+    if scenidx and scenidx == len(scencmd):
+        scentime, scencmd, scenidx = [], [], 0
 
 
 def saveic(fname=None):
@@ -1287,6 +1369,41 @@ def saveclose():
 # (.*)          : parse the rest of the string as the second return value
 re_getarg = re.compile(r'"?((?<=")[^"]*|(?<!")[^\s,]*)"?\s*,?\s*(.*)')
 
+# Cache of compiled argument signatures, see argsignature()
+sigcache = dict()
+
+
+def argsignature(argtypes, argisopt):
+    ''' Returns the compiled signature of a list of argument types: for each
+        argument a tuple with its alternative types and the fast numeric
+        parser of its first alternative (None for a repeat marker "..."),
+        and the number of arguments up to the last mandatory one.
+        Signatures are compiled once and kept in sigcache. '''
+    key = (tuple(argtypes), tuple(argisopt))
+    sig = sigcache.get(key)
+    if sig is None:
+        argalts = []
+        for argtype in argtypes:
+            if argtype[:3] == '...':
+                argalts.append(None)
+            else:
+                alts = tuple(argtype.strip().split('/'))
+                argalts.append((alts, numparsers.get(alts[0])))
+        nmandatory = max([i + 1 for i, isopt in enumerate(argisopt) if not isopt] or [0])
+        sig = sigcache[key] = (tuple(argalts), nmandatory)
+    return sig
+
+
+# Fast conversion of plain numeric arguments. Arguments that do not convert
+# (FL250, M0.8, 090T, empty or wildcard) are handled by Argparser.parse_arg.
+numparsers = {'float': float,
+              'int':   int,
+              'hdg':   float,
+              'vspd':  lambda txt: fpm * float(txt),
+              'alt':   lambda txt: ft * float(txt),
+              'spd':   lambda txt: float(txt) if 0.1 < float(txt) < 1.0 else kts * float(txt)}
+
+
 def getnextarg(line):
     ''' Returns the next argument in "line", and the remaining text in "line".
         separators are comma and (multiple) whitespace, except when an argument
@@ -1301,6 +1418,10 @@ def process():
     """process and empty command stack"""
     global sender_rte
 
+    # Parsed arguments of consecutive CRE commands, these aircraft are
+    # created in one batch
+    crebatch = []
+
     # Process stack of commands
     for (line, sender_rte) in cmdstack:
         # debug print ("stack is processing:",line)
@@ -1324,6 +1445,11 @@ def process():
         cmd, args = getnextarg(line)
         orgcmd    = cmd.upper()
         cmd       = cmdsynon.get(orgcmd) or orgcmd
+
+        # Create the batch of aircraft before processing any other command
+        if crebatch and cmd != 'CRE':
+            createbatch(crebatch)
+
         stackfun  = cmddict.get(cmd)
         # If no function is found for 'cmd', check if cmd is actually an aircraft id
         if not stackfun and orgcmd in bs.traf.id:
@@ -1349,6 +1475,10 @@ def process():
             # flag: indicates sucess
             # text: optional error message
             if parser.parse():
+                if cmd == 'CRE' and function == bs.traf.create:
+                    crebatch.append(parser.arglist)
+                    continue
+
                 results = function(*parser.arglist)  # * = unpack list to call arguments
                 if isinstance(results, bool):  # Only flag is returned
                     if not results:
@@ -1399,9 +1529,22 @@ def process():
         #**********************************************************************
 
     # End of for-loop of cmdstack
+    if crebatch:
+        createbatch(crebatch)
     del cmdstack[:]
 
 
+def createbatch(arglists):
+    """ Create the aircraft of a series of parsed CRE commands in one batch,
+        and empty the list of parsed arguments. """
+    # Arguments per aircraft to lists per argument, mass is optional
+    args = zip(*[arglist + [None] * (8 - len(arglist)) for arglist in arglists])
+    results = bs.traf.cre(*[list(arg) for arg in args])
+    del arglists[:]
+    if isinstance(results, tuple) and not results[0]:
+        bs.scr.echo("Syntax error: CRE: " + results[1], bs.BS_FUNERR)
+
+
 class Argparser:
     # Global variables
     reflat    = -999.  # Reference latitude for searching in nav db
@@ -1412,6 +1555,7 @@ class Argparser:
     def __init__(self, argtypes, argisopt, argstring, argdefaults=None):
         self.argtypes    = argtypes
         self.argisopt    = argisopt
+        self.signature   = argsignature(argtypes, argisopt)
         self.argdefaults = list(argdefaults or [])
         self.argstring   = argstring
         self.arglist     = []
@@ -1423,17 +1567,30 @@ class Argparser:
                                # for a function that acts on an aircraft.
 
     def parse(self):
+        argalts, nmandatory = self.signature
         curtype = 0
         # Iterate over list of argument types & arguments
-        while curtype < len(self.argtypes) and self.argstring:
+        while curtype < len(argalts) and self.argstring:
             # Optional repeat with "...", e.g. for lat/lon list for polygon
-            if self.argtypes[curtype][:3] == '...':
-                repeatsize = len(self.argtypes) - curtype
+            if argalts[curtype] is None:
+                repeatsize = len(argalts) - curtype
                 curtype = curtype - repeatsize
-            argtype    = self.argtypes[curtype].strip().split('/')
+            argtype, numparser = argalts[curtype]
 
             # Reset error messages
             self.error = ''
+
+            # Fast path for plain numbers
+            if numparser:
+                curarg, args = getnextarg(self.argstring)
+                try:
+                    self.arglist.append(numparser(curarg))
+                    self.argstring = args
+                    curtype += 1
+                    continue
+                except ValueError:
+                    pass
+
             # Go over all argtypes separated by "/" in this place in the command line
             for i, argtypei in enumerate(argtype):
                 # Try to parse the argument for the given argument type
@@ -1471,7 +1628,7 @@ class Argparser:
             curtype += 1
 
         # Check if at least the number of mandatory arguments is given.
-        if False in self.argisopt[curtype:]:
+        if curtype < nmandatory:
             self.error = "Syntax error: Too few arguments"
             return False
 
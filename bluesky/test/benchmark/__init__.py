@@ -0,0 +1,41 @@
+"""
+Benchmarks for BlueSky.
+
+Benchmarks are written as pytest tests, but are only run when the BENCHMARK
+environment variable is set (make benchmark). Results are printed as a table.
+"""
+from __future__ import print_function
+import os
+import time
+import pytest
+
+
+# Marker to apply to all benchmark modules: pytestmark = benchmark
+benchmark = pytest.mark.skipif(not os.environ.get('BENCHMARK'),
+                               reason='Benchmarks only run with BENCHMARK=true')
+
+
+def timeit(fun, *args, **kwargs):
+    """
+    Calls fun(*args, **kwargs), and returns the wall time in seconds.
+    """
+    t0 = time.perf_counter()
+    fun(*args, **kwargs)
+    return time.perf_counter() - t0
+
+
+def report(title, header, rows):
+    """
+    Prints a benchmark result table.
+
+    Args:
+        title: The benchmark title
+        header: List of column names
+        rows: List of rows, each a list of values
+    """
+    widths = [max(len(str(h)), 12) for h in header]
+    print('\n' + title)
+    print('  '.join(str(h).rjust(w) for h, w in zip(header, widths)))
+    for row in rows:
+        print('  '.join((('%.4g' % v) if isinstance(v, float) else str(v)).rjust(w)
+                        for v, w in zip(row, widths)))
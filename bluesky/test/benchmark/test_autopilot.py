@@ -0,0 +1,28 @@
+"""
+Benchmarks batched waypoint switching against scalar, per-aircraft waypoint
+switching, for many aircraft passing their waypoint in the same FMS update.
+"""
+import numpy as np
+import bluesky as bs
+from bluesky.traffic.autopilot import Autopilot
+from ..traffic.test_autopilot import make_traffic, make_autopilot, ref_switchwp
+from . import benchmark, timeit, report
+
+pytestmark = benchmark
+
+
+def test_switchwp(monkeypatch):
+    rows = []
+    for nreached in (10, 100, 1000, 10000):
+        reftraf, nextwp = make_traffic(nreached, 0)
+        traf, _ = make_traffic(nreached, 0)
+        refap, ap = make_autopilot(reftraf, nextwp), make_autopilot(traf, nextwp)
+        idx = np.arange(nreached)
+
+        monkeypatch.setattr(bs, 'traf', reftraf, raising=False)
+        tscalar = timeit(ref_switchwp, refap, reftraf, idx)
+        monkeypatch.setattr(bs, 'traf', traf)
+        tbatch = timeit(Autopilot.switchwp, ap, idx)
+        rows.append([nreached, 1e3 * tscalar, 1e3 * tbatch, tscalar / tbatch])
+
+    report('Waypoint switching', ['reached', 'scalar [ms]', 'batched [ms]', 'speedup'], rows)
@@ -0,0 +1,40 @@
+"""
+Benchmarks the dense (STATEBASED) and spatially indexed (SPATIAL) conflict
+detection methods for increasing numbers of aircraft.
+"""
+import numpy as np
+from bluesky.tools.trafficarrays import TrafficArrays
+from ..traffic.cdtraffic import make_traffic
+from . import benchmark, timeit, report
+
+pytestmark = benchmark
+
+# Largest number of aircraft for the dense method (N x N matrices)
+DENSE_MAX = 5000
+
+
+def test_cd_scaling():
+    """
+    Times one detection cycle at 1k, 5k and 20k aircraft, at constant
+    traffic density.
+    """
+    from bluesky.traffic.asas import ASAS, StateBasedCD, SpatialCD
+
+    rows = []
+    for ntraf in (1000, 5000, 20000):
+        # Keep density constant: 1000 aircraft per 10 x 10 deg
+        traf = make_traffic(ntraf, 0, area=10.0 * np.sqrt(ntraf / 1000.0))
+        root, TrafficArrays.root = TrafficArrays.root, None
+        asas = ASAS()
+        TrafficArrays.root = root
+        asas.active = np.zeros(ntraf, dtype=bool)
+        asas.uid = np.arange(ntraf)
+
+        tsparse = timeit(SpatialCD.detect, asas, traf, 0.0)
+        nconf = asas.nconf
+        tdense = timeit(StateBasedCD.detect, asas, traf, 0.0) \
+            if ntraf <= DENSE_MAX else float('nan')
+        rows.append([ntraf, nconf, tdense, tsparse])
+
+    report('Conflict detection, one cycle [s]',
+           ['ntraf', 'nconf', 'STATEBASED', 'SPATIAL'], rows)
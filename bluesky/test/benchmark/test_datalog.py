@@ -0,0 +1,60 @@
+"""
+Benchmarks writing of periodic logs in text and binary format.
+"""
+import os
+from types import SimpleNamespace
+import numpy as np
+import bluesky as bs
+from bluesky.tools import datalog
+from . import benchmark, timeit, report
+
+pytestmark = benchmark
+
+
+class SnapParent(object):
+    """ Logged variables similar to SNAPLOG: callsigns and 16 float arrays. """
+    def __init__(self, ntraf):
+        self.id = ['AC%05d' % i for i in range(ntraf)]
+        for i in range(16):
+            setattr(self, 'var%d' % i, np.random.rand(ntraf))
+
+
+def logn(logger, n):
+    for _ in range(n):
+        logger.log()
+        bs.sim.simt += logger.dt
+
+
+def test_datalog_formats(tmp_path):
+    """
+    Logs 20 periods of 5000 aircraft in text and in binary format, and
+    reports the time per log call in the simulation thread, the time per
+    log call including writing by the writer thread, and the file size.
+    """
+    rows = []
+    oldsim, oldpath = getattr(bs, 'sim', None), bs.settings.log_path
+    bs.settings.log_path = str(tmp_path)
+    try:
+        parent = SnapParent(5000)
+        logger = datalog.CSVLogger('BENCHLOG')
+        logger.allvars = [(parent, ['id'] + ['var%d' % i for i in range(16)])]
+        logger.setdt(1.0)
+        for fmt in ('CSV', 'BIN'):
+            bs.sim = SimpleNamespace(simt=0.0)
+            logger.reset()
+            logger.stackio('ON', fmt)
+            fname = logger.file.name
+            tlog = timeit(logn, logger, 20)
+            tflush = timeit(datalog.flush)
+            logger.reset()
+            assert logger.ndropped == 0
+            rows.append([fmt, tlog / 20, (tlog + tflush) / 20, os.path.getsize(fname) / 1e6])
+            if fmt == 'BIN':
+                _, data = datalog.readbinlog(fname)
+                assert len(data['var0']) == 20 * 5000
+    finally:
+        bs.sim, bs.settings.log_path = oldsim, oldpath
+        bs.stack.remove_commands(['BENCHLOG'])
+
+    report('Periodic log, 5000 aircraft, 17 variables',
+           ['format', 'log call [s]', 'written [s]', 'size [MB]'], rows)
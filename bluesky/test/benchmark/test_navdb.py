@@ -0,0 +1,68 @@
+"""
+Benchmarks the spatial index of the navigation database against full scans
+of all waypoints, for nearest-waypoint and box queries, and the name lookups
+against scans of the name lists.
+"""
+import numpy as np
+import bluesky as bs
+from bluesky.navdatabase.spatialindex import SpatialIndex
+from bluesky.tools.position import txt2pos
+from ..navdatabase.test_spatialindex import ref_dist2
+from ..navdatabase.test_nameindex import make_navdb, ref_getwpindices
+from . import benchmark, timeit, report
+
+pytestmark = benchmark
+
+
+def test_queries():
+    rnd = np.random.RandomState(0)
+    rows = []
+    for npoints in (10000, 100000, 300000):
+        wlat, wlon = rnd.uniform(-90., 90., npoints), rnd.uniform(-180., 180., npoints)
+        tbuild = timeit(SpatialIndex, wlat, wlon)
+        index = SpatialIndex(wlat, wlon)
+        qlat, qlon = rnd.uniform(-60., 60., 1000), rnd.uniform(-180., 180., 1000)
+
+        tscan = timeit(lambda: [np.argmin(ref_dist2(wlat, wlon, lat, lon))
+                                for lat, lon in zip(qlat, qlon)])
+        tindex = timeit(lambda: [index.knearest(wlat, wlon, lat, lon)
+                                 for lat, lon in zip(qlat, qlon)])
+        rows.append(['nearest', npoints, 1e3 * tbuild, tscan, tindex, tscan / tindex])
+
+        tscan = timeit(lambda: [np.where((wlat > lat - 1.) * (wlat < lat + 1.) *
+                                         (wlon > lon - 1.) * (wlon < lon + 1.))
+                                for lat, lon in zip(qlat, qlon)])
+        tindex = timeit(lambda: [index.inside(wlat, wlon, lat - 1., lat + 1., lon - 1., lon + 1.)
+                                 for lat, lon in zip(qlat, qlon)])
+        rows.append(['box', npoints, 1e3 * tbuild, tscan, tindex, tscan / tindex])
+
+    report('Navdatabase queries (1000 queries)',
+           ['query', 'points', 'build [ms]', 'scan [s]', 'index [s]', 'speedup'], rows)
+
+
+def test_addwpt(monkeypatch):
+    """ Waypoint name lookups of ADDWPT: txt2pos and Route.addwpt. """
+    rnd = np.random.RandomState(0)
+    navdb = make_navdb(monkeypatch, 200000, 20000, rnd)
+    monkeypatch.setattr(bs, 'navdb', navdb, raising=False)
+    rows = []
+    for nfix in (10, 40, 100):
+        fixes = [navdb.wpid[i] for i in rnd.randint(0, len(navdb.wpid), nfix)]
+        reflat, reflon = 52., 4.
+
+        def scan():
+            for name in fixes:
+                navdb.aptid.count(name), navdb.wpid.count(name)
+                ref_getwpindices(navdb, name, reflat, reflon)
+                ref_getwpindices(navdb, name, reflat, reflon)
+
+        def hashed():
+            for name in fixes:
+                txt2pos(name, reflat, reflon)
+                navdb.getwpidx(name, reflat, reflon)
+
+        tscan, thash = timeit(scan), timeit(hashed)
+        rows.append([nfix, nfix / tscan, nfix / thash, tscan / thash])
+
+    report('ADDWPT name lookups (200000 waypoints)',
+           ['fixes', 'scan [wpt/s]', 'hash [wpt/s]', 'speedup'], rows)
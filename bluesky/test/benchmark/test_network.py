@@ -0,0 +1,109 @@
+"""
+Benchmarks sending of stream data between a node and a client.
+"""
+import msgpack
+import numpy as np
+import zmq
+from bluesky.network.npcodec import encode_ndarray, decode_ndarray, \
+    pack_frames, unpack_frames
+from bluesky.network.acdata import ACDataEncoder, ACDataDecoder
+from . import benchmark, timeit, report
+
+pytestmark = benchmark
+
+
+def acdata(ntraf):
+    """ Stream data similar to ACDATA: callsigns and 14 float arrays. """
+    data = dict(simt=10.0, id=['AC%05d' % i for i in range(ntraf)],
+                inconf=np.zeros(ntraf, dtype=bool),
+                tcpamax=np.zeros(ntraf))
+    for name in ('lat', 'lon', 'alt', 'tas', 'cas', 'gs', 'trk', 'vs',
+                 'asasn', 'asase', 'rpz', 'vmin', 'vmax', 'translvl'):
+        data[name] = np.random.rand(ntraf)
+    return data
+
+
+def send_single(sock_out, sock_in, data, n):
+    for _ in range(n):
+        sock_out.send_multipart([b'ACDATA', msgpack.packb(data, default=encode_ndarray, use_bin_type=True)])
+        msg = sock_in.recv_multipart()
+        msgpack.unpackb(msg[1], object_hook=decode_ndarray, raw=False)
+
+
+def send_frames(sock_out, sock_in, data, n):
+    for _ in range(n):
+        sock_out.send_multipart([b'ACDATA'] + pack_frames(data), copy=False)
+        msg = sock_in.recv_multipart(copy=False)
+        unpack_frames(msg[1:])
+
+
+def test_stream_framing():
+    """
+    Sends 100 ACDATA-like messages of 10000 aircraft over a local TCP
+    connection, packed in a single msgpack frame and in separate array
+    frames, and reports the number of messages per second.
+    """
+    ctx = zmq.Context.instance()
+    sock_out = ctx.socket(zmq.PUSH)
+    sock_in = ctx.socket(zmq.PULL)
+    port = sock_out.bind_to_random_port('tcp://127.0.0.1')
+    sock_in.connect('tcp://127.0.0.1:%d' % port)
+    rows = []
+    try:
+        data = acdata(10000)
+        for name, fun in (('single', send_single), ('frames', send_frames)):
+            fun(sock_out, sock_in, data, 5)
+            t = timeit(fun, sock_out, sock_in, data, 100)
+            rows.append([name, t / 100, 100 / t])
+    finally:
+        sock_out.close(linger=0)
+        sock_in.close(linger=0)
+
+    report('Stream messages, 10000 aircraft, 16 arrays',
+           ['framing', 'message [s]', 'messages/s'], rows)
+
+
+def test_acdata_size():
+    """
+    Encodes 10 ACDATA messages of 10000 aircraft, of which 1000 are in
+    conflict and half are climbing or descending, in version 1 and version 2
+    format, and reports the message size and the encode/decode time.
+    """
+    ntraf = 10000
+    data = dict(simt=10.0, id=['AC%05d' % i for i in range(ntraf)],
+                nconf_tot=0, nlos_tot=0, nconf_exp=0, nlos_exp=0, nconf_cur=0,
+                nlos_cur=0, translvl=1800.0, vmin=100.0, vmax=250.0,
+                swtrails=False, traillat0=[], traillon0=[], traillat1=[],
+                traillon1=[], confcpalat=np.random.rand(1000),
+                confcpalon=np.random.rand(1000),
+                iconf=[[i] if i < 1000 else [] for i in range(ntraf)])
+    for name in ('lat', 'lon', 'alt', 'tas', 'cas', 'trk', 'vs'):
+        data[name] = np.random.rand(ntraf) * 100.0
+    for name in ('asasn', 'asase', 'traillastlat', 'traillastlon'):
+        data[name] = np.zeros(ntraf)
+
+    def nbytes(msg):
+        return sum(len(frame) if isinstance(frame, bytes) else frame.nbytes
+                   for frame in pack_frames(msg))
+
+    def stream(encoder, decoder, n):
+        sizes = []
+        for _ in range(n):
+            for name in ('lat', 'lon', 'trk'):
+                data[name] = data[name] + 0.001
+            data['alt'][:ntraf // 2] += 1.0
+            msg = encoder.encode(data) if encoder else data
+            sizes.append(nbytes(msg))
+            if decoder:
+                decoder.decode(msg)
+        return sizes
+
+    rows = []
+    for name, encoder, decoder in (('version 1', None, None),
+                                   ('version 2', ACDataEncoder(), ACDataDecoder())):
+        sizes = []
+        t = timeit(lambda: sizes.extend(stream(encoder, decoder, 10)))
+        rows.append([name, max(sizes) / 1e3, np.mean(sizes) / 1e3, t / 10])
+
+    report('ACDATA message size, 10000 aircraft',
+           ['format', 'keyframe [kB]', 'mean [kB]', 'coding [s]'], rows)
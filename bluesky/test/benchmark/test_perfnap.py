@@ -0,0 +1,43 @@
+"""
+Benchmarks the NAP flight envelope limits gathered from the compiled table
+against limits selected per type and phase with masks, for a 60-type fleet.
+"""
+from types import SimpleNamespace
+import numpy as np
+from bluesky.traffic.performance.nap import coeff, perfnap
+from bluesky.traffic.performance.nap import phase as ph
+from ..traffic.test_perfnap import ref_limits
+from . import benchmark, timeit, report
+
+pytestmark = benchmark
+
+
+def make_fleet(nap, ntypes, rnd):
+    """ Coefficients of ntypes - 1 fixwing types, perturbed copies of the
+        NAP envelopes, and one rotor type. """
+    envelopes = list(nap.limits_fixwing.values())
+    limits_fixwing = {'T%02d' % i: {key: value * rnd.uniform(0.9, 1.1) for key, value in
+                                    envelopes[i % len(envelopes)].items()}
+                      for i in range(ntypes - 1)}
+    return SimpleNamespace(limits_fixwing=limits_fixwing, actypes_fixwing=list(limits_fixwing),
+                           limits_rotor=nap.limits_rotor, actypes_rotor=nap.actypes_rotor)
+
+
+def test_limits():
+    rnd = np.random.RandomState(0)
+    fleet = make_fleet(coeff.Coefficient(), 60, rnd)
+    typeidx, table = perfnap.compile_limits(fleet)
+    types = fleet.actypes_fixwing + fleet.actypes_rotor
+    rows = []
+    for n in (100, 1000, 10000, 50000):
+        actypes = np.array(types)[rnd.randint(0, len(types), n)]
+        lifttype = np.where(np.isin(actypes, fleet.actypes_rotor), coeff.LIFT_ROTOR,
+                            coeff.LIFT_FIXWING)
+        phases = rnd.randint(ph.NA, ph.GD + 1, n).astype(float)
+        iac = np.array([typeidx[mdl] for mdl in actypes])
+
+        tmask = timeit(ref_limits, fleet, actypes, lifttype, phases)
+        ttable = timeit(lambda: table[iac, phases.astype(int)])
+        rows.append([n, 1e3 * tmask, 1e3 * ttable, tmask / ttable])
+
+    report('NAP limits (60 types)', ['aircraft', 'masks [ms]', 'table [ms]', 'speedup'], rows)
@@ -0,0 +1,27 @@
+"""
+Benchmarks the flight plan calculations of the array-backed routes against
+the calculations per waypoint, and the memory use of the routes.
+"""
+import tracemalloc
+import numpy as np
+from ..traffic.test_routestore import make_route, ref_calcfp
+from . import benchmark, timeit, report
+
+pytestmark = benchmark
+
+
+def test_calcfp():
+    rnd = np.random.RandomState(0)
+    rows = []
+    for nroutes, nwp in ((1000, 10), (1000, 30), (3000, 30)):
+        tracemalloc.start()
+        routes = [make_route(nwp, rnd) for _ in range(nroutes)]
+        memory = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+        tref = timeit(lambda: [ref_calcfp(r) for r in routes])
+        tnew = timeit(lambda: [r.calcfp() for r in routes])
+        rows.append([nroutes, nwp, memory, 1e3 * tref, 1e3 * tnew, tref / tnew])
+        del routes
+
+    report('Flight plan calculations (calcfp)',
+           ['routes', 'waypoints', 'memory [MB]', 'loop [ms]', 'vector [ms]', 'speedup'], rows)
@@ -0,0 +1,125 @@
+"""
+Benchmarks parsing of stack commands that act on an aircraft.
+"""
+from types import SimpleNamespace
+import hashlib
+import importlib
+import os
+import numpy as np
+import bluesky as bs
+from . import benchmark, timeit, report
+
+pytestmark = benchmark
+
+
+def make_fleet(ntraf):
+    """
+    Returns a minimal traffic object with ntraf aircraft, which uses the
+    callsign lookup of Traffic.
+    """
+    from bluesky.traffic import Traffic
+    traf = SimpleNamespace(ntraf=ntraf, id=['AC%05d' % i for i in range(ntraf)],
+                           lat=np.zeros(ntraf), lon=np.zeros(ntraf))
+    traf.idxmap = dict((acid, i) for i, acid in enumerate(traf.id))
+    traf.id2idx = lambda acid: Traffic.id2idx(traf, acid)
+    return traf
+
+
+def parse_all(lines):
+    from bluesky.stack.stack import Argparser
+    for line in lines:
+        assert Argparser(['acid', 'float'], [False, False], line).parse()
+
+
+def test_acid_parsing():
+    """
+    Parses one 'ACID value' command line for each aircraft, with the
+    maintained callsign map and with a linear search in the callsign list.
+    """
+    rows = []
+    oldtraf = getattr(bs, 'traf', None)
+    try:
+        for ntraf in (1000, 10000):
+            bs.traf = traf = make_fleet(ntraf)
+            lines = ['%s 250' % acid for acid in traf.id]
+            tmap = timeit(parse_all, lines)
+
+            traf.id2idx = lambda acid: traf.id.index(acid.upper()) \
+                if acid.upper() in traf.id else -1
+            tlist = timeit(parse_all, lines)
+            rows.append([ntraf, tlist, tmap, ntraf / tmap])
+    finally:
+        bs.traf = oldtraf
+
+    report('Parsing of aircraft commands [s]',
+           ['ntraf', 'list search', 'map', 'cmd/s (map)'], rows)
+
+
+def test_scenario_loading(tmp_path):
+    """
+    Loads a scenario file with 200k commands without and with cache, and
+    stacks all commands with checkfile.
+    """
+    # The stack module is shadowed by its stack function in bluesky.stack
+    st = importlib.import_module('bluesky.stack.stack')
+    fname = str(tmp_path / 'bench.scn')
+    with open(fname, 'w') as fscn:
+        for i in range(200000):
+            fscn.write('%02d:%02d:%05.2f>ECHO %d\n' %
+                       (i // 36000, (i // 600) % 60, (i / 10) % 60, i))
+
+    oldstack = st.stack
+    try:
+        cachename = os.path.join(bs.settings.cache_path, 'scn_' +
+            hashlib.md5(os.path.abspath(fname).encode()).hexdigest() + '.p')
+        tparse = timeit(st.openfile, fname, "ABS")
+        tcache = timeit(st.openfile, fname, "ABS")
+        st.stack = lambda cmdline: None
+        trun = timeit(lambda: [st.checkfile(float(t)) for t in range(20001)])
+        assert not st.scencmd
+    finally:
+        st.stack = oldstack
+        if os.path.isfile(cachename):
+            os.remove(cachename)
+
+    report('Scenario file with 200k commands [s]',
+           ['parse', 'cached', 'checkfile'], [[tparse, tcache, trun]])
+
+
+def test_stack_throughput():
+    """
+    Processes 10k stacked commands of several common shapes for a fleet of
+    1000 aircraft, and reports the number of processed commands per second.
+    """
+    st = importlib.import_module('bluesky.stack.stack')
+    commands = {
+        'BENCHALT': ['BENCHALT acid,alt,[vspd]', 'acid,alt,[vspd]',
+                     lambda idx, alt, vspd=None: True, 'Altitude command'],
+        'BENCHSPD': ['BENCHSPD acid,spd', 'acid,spd',
+                     lambda idx, spd: True, 'Speed command'],
+        'BENCHDEL': ['BENCHDEL acid/txt', 'acid/txt',
+                     lambda idx: True, 'Command with alternative argument types'],
+        'BENCHPOLY': ['BENCHPOLY txt,float,float,...', 'txt,float,float,...',
+                      lambda name, *coords: True, 'Command with repeated arguments']}
+    shapes = [('altitude', 'BENCHALT {} FL250 1500'),
+              ('speed', 'BENCHSPD {} 250'),
+              ('alternatives', 'BENCHDEL {}'),
+              ('repeated', 'BENCHPOLY {} 52 4 52.5 4.5 53 5 52 4')]
+
+    rows = []
+    oldtraf, oldscr = getattr(bs, 'traf', None), getattr(bs, 'scr', None)
+    try:
+        bs.traf = traf = make_fleet(1000)
+        bs.scr = SimpleNamespace(echo=lambda text='', flags=0: None)
+        st.append_commands(commands)
+        for name, fmt in shapes:
+            lines = [fmt.format(traf.id[i % 1000]) for i in range(10000)]
+            st.cmdstack[:] = [(line, None) for line in lines]
+            tproc = timeit(st.process)
+            assert not st.cmdstack
+            rows.append([name, tproc, len(lines) / tproc])
+    finally:
+        st.remove_commands(commands)
+        bs.traf, bs.scr = oldtraf, oldscr
+
+    report('Stack throughput, 10k commands [s]', ['shape', 'process', 'cmd/s'], rows)
@@ -0,0 +1,56 @@
+"""
+Benchmarks the startup time of a simulation node with the NAP performance
+model, and reports the slowest imports, as measured with python -X importtime.
+"""
+import os
+import subprocess
+import sys
+from . import benchmark, report
+
+pytestmark = benchmark
+
+# Imports the NAP performance model, and loads its coefficients
+startup = '''
+import time
+t0 = time.perf_counter()
+from bluesky import settings
+settings.cache_path = %r
+from bluesky.traffic.performance.nap import coeff
+t1 = time.perf_counter()
+c = coeff.Coefficient()
+c.acs_fixwing['A320'], c.limits_fixwing['A320']
+t2 = time.perf_counter()
+print('STARTUP', t1 - t0, t2 - t1)
+'''
+
+
+def run_startup(cache_path):
+    """ Runs the startup in a new interpreter, and returns the import and
+        load times [s], and the import times per module [s]: a list of
+        (module, self, cumulative). """
+    rootdir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', startup % cache_path],
+                            cwd=rootdir, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    timing = [line.split()[1:] for line in result.stdout.splitlines()
+              if line.startswith('STARTUP')][0]
+    modules = []
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and 'cumulative' not in line:
+            tself, tcum, name = line[12:].split('|')
+            modules.append((name.strip(), 1e-6 * int(tself), 1e-6 * int(tcum)))
+    return float(timing[0]), float(timing[1]), modules
+
+
+def test_startup(tmpdir):
+    rows = []
+    for run in ('first', 'cached'):
+        timport, tload, modules = run_startup(str(tmpdir))
+        loaded = set(name for name, _, _ in modules)
+        rows.append([run, timport, tload, timport + tload, 'pandas' in loaded])
+    report('Startup with NAP performance model',
+           ['run', 'import [s]', 'load [s]', 'total [s]', 'pandas'], rows)
+
+    slowest = sorted(modules, key=lambda m: -m[1])[:15]
+    report('Slowest imports (cached run)', ['module', 'self [ms]', 'cumulative [ms]'],
+           [[name, 1e3 * tself, 1e3 * tcum] for name, tself, tcum in slowest])
@@ -0,0 +1,85 @@
+"""
+Benchmarks creation and deletion of aircraft in a tree of TrafficArrays.
+"""
+import numpy as np
+from bluesky.tools.trafficarrays import TrafficArrays, RegisterElementParameters
+from . import benchmark, timeit, report
+
+pytestmark = benchmark
+
+# Number of children and arrays per object, similar to the Traffic tree
+NCHILDREN = 6
+NARRAYS = 20
+
+
+class Arrays(TrafficArrays):
+    """ TrafficArrays object with NARRAYS float arrays and a list. """
+    def __init__(self, nchildren=0):
+        super(Arrays, self).__init__()
+        if nchildren:
+            TrafficArrays.SetRoot(self)
+        with RegisterElementParameters(self):
+            for i in range(NARRAYS):
+                setattr(self, 'arr%d' % i, np.array([]))
+            self.lst = []
+            for i in range(nchildren):
+                setattr(self, 'child%d' % i, type(self)())
+
+
+class AppendArrays(Arrays):
+    """ Reference implementation which copies all arrays on each create
+        and delete. """
+    def create(self, n=1):
+        for v in self.ArrVars:
+            self.Vars[v] = np.append(self.Vars[v], [0.0] * n)
+        self.lst.extend([''] * n)
+
+    def delete(self, idx):
+        for child in self.children:
+            child.delete(idx)
+        for v in self.ArrVars:
+            self.Vars[v] = np.delete(self.Vars[v], idx)
+        del self.lst[idx]
+
+
+def create(root, n):
+    for _ in range(n):
+        root.create()
+        root.create_children()
+
+
+def delete(root, n):
+    for i in range(n):
+        root.delete(i % len(root.lst))
+
+
+def cycle(root, n):
+    """ Alternate deleting and creating one aircraft, and update one array
+        each 100 cycles, like a simulation step would. """
+    for i in range(n):
+        root.delete(i % len(root.lst))
+        root.create()
+        root.create_children()
+        if i % 100 == 0:
+            root.arr0 = root.arr0 + 1.0
+
+
+def test_trafficarrays_create_delete():
+    """
+    Times 10k single creates, 10k delete/create cycles and 10k single
+    deletes.
+    """
+    root = TrafficArrays.root
+    rows = []
+    try:
+        for name, cls in (('np.append', AppendArrays), ('buffered', Arrays)):
+            TrafficArrays.root = None
+            tree = cls(NCHILDREN)
+            rows.append([name, timeit(create, tree, 10000),
+                         timeit(cycle, tree, 10000), timeit(delete, tree, 10000)])
+            assert len(tree.lst) == 0
+    finally:
+        TrafficArrays.root = root
+
+    report('TrafficArrays, 10k aircraft, %d arrays [s]' % (NARRAYS * (NCHILDREN + 1)),
+           ['storage', 'create', 'delete+create', 'delete'], rows)
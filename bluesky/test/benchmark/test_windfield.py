@@ -0,0 +1,38 @@
+"""
+Benchmarks the wind interpolation for many aircraft: inverse-distance
+weighting with and without reuse of the weights, and the gridded wind field.
+"""
+import numpy as np
+from bluesky.tools.aero import ft
+from bluesky.traffic.windfield import Windfield
+from ..traffic.test_windfield import make_windfield, make_positions, ref_getdata
+from . import benchmark, timeit, report
+
+pytestmark = benchmark
+
+
+def test_getdata():
+    rnd = np.random.RandomState(0)
+    wind = make_windfield(300, rnd, nprof=300)
+
+    # Grid of the same area with 0.25 degree and 1000 ft resolution
+    lat, lon, alt = np.arange(49., 55.01, 0.25), np.arange(1., 9.01, 0.25), \
+        np.arange(0., 45001., 1000.) * ft
+    A, LAT, LON = np.meshgrid(alt, lat, lon, indexing='ij')
+    vn, ve = wind.getdata(LAT.ravel(), LON.ravel(), A.ravel())
+    grid = Windfield()
+    grid.setgrid(lat, lon, alt, vn.reshape(A.shape), ve.reshape(A.shape))
+
+    rows = []
+    for nac in (100, 1000, 5000):
+        plat, plon, palt = make_positions(nac, rnd)
+        tref = timeit(ref_getdata, wind, plat, plon, palt)
+        wind.weights = None
+        tidw = timeit(lambda: (wind.getdata(plat, plon, palt), setattr(wind, 'weights', None)))
+        wind.getdata(plat, plon, palt)
+        tcache = timeit(wind.getdata, plat, plon, palt)
+        tgrid = timeit(grid.getdata, plat, plon, palt)
+        rows.append([nac, 1e3 * tref, 1e3 * tidw, 1e3 * tcache, 1e3 * tgrid, tref / tgrid])
+
+    report('Wind interpolation (300 wind profiles)',
+           ['aircraft', 'original [ms]', 'idw [ms]', 'reused [ms]', 'grid [ms]', 'speedup'], rows)
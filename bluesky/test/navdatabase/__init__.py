@@ -0,0 +1,3 @@
+"""
+Tests of the navigation database of BlueSky.
+"""
@@ -0,0 +1,92 @@
+"""
+Tests the name lookups of the navigation database against scans of the
+name lists.
+"""
+from types import SimpleNamespace
+import numpy as np
+import bluesky as bs
+from bluesky.tools import geo
+from bluesky.tools.aero import nm
+from bluesky.tools.misc import findall
+from bluesky.navdatabase import navdatabase
+from bluesky.navdatabase.spatialindex import SpatialIndex
+
+
+def make_navdb(monkeypatch, nwp, napt, rnd):
+    """ Creates a navdatabase with nwp random waypoints and napt random
+        airports, with many duplicate waypoint names. """
+    wpid = ['WP%d' % i for i in rnd.randint(0, nwp // 4, nwp)]
+    wplat, wplon = rnd.uniform(-80., 80., nwp), rnd.uniform(-180., 180., nwp)
+    wptdata = dict(wpid=wpid, wplat=wplat, wplon=wplon, wptype=nwp * ['FIX'],
+                   wpelev=nwp * [0.], wpvar=nwp * [0.], wpfreq=nwp * [0.],
+                   wpdesc=nwp * [''], wpindex=SpatialIndex(wplat, wplon))
+    aplat, aplon = rnd.uniform(-80., 80., napt), rnd.uniform(-180., 180., napt)
+    aptdata = dict(apid=['AP%d' % i for i in rnd.randint(0, napt, napt)],
+                   apname=napt * [''], aplat=aplat, aplon=aplon, apmaxrwy=napt * [0.],
+                   aptype=napt * [1], apco=napt * [''], apelev=napt * [0.],
+                   apindex=SpatialIndex(aplat, aplon))
+    awydata = {key: [] for key in ('awfromwpid', 'awfromlat', 'awfromlon', 'awtowpid',
+                                   'awtolat', 'awtolon', 'awid', 'awndir', 'awlowfl', 'awupfl')}
+    firdata = {key: [] for key in ('fir', 'firlat0', 'firlon0', 'firlat1', 'firlon1')}
+    codata = {key: [] for key in ('coname', 'cocode2', 'cocode3', 'conr')}
+    monkeypatch.setattr(navdatabase, 'load_navdata',
+                        lambda: (wptdata, aptdata, awydata, firdata, codata, {}))
+    monkeypatch.setattr(bs, 'scr', SimpleNamespace(addnavwpt=lambda *args: None,
+                                                   getviewctr=lambda: (0., 0.)),
+                        raising=False)
+    return navdatabase.Navdatabase()
+
+
+def ref_getwpindices(navdb, txt, reflat, reflon, crit=1852.0):
+    """ Waypoint lookup with a scan of the names and a loop over duplicates. """
+    idx = findall(navdb.wpid, txt.upper())
+    if not idx:
+        return [-1]
+    imin, dmin = idx[0], geo.kwikdist(reflat, reflon, navdb.wplat[idx[0]], navdb.wplon[idx[0]])
+    for i in idx[1:]:
+        d = geo.kwikdist(reflat, reflon, navdb.wplat[i], navdb.wplon[i])
+        if d < dmin:
+            imin, dmin = i, d
+    return [imin] + [i for i in idx if i != imin and
+                     nm * geo.kwikdist(navdb.wplat[i], navdb.wplon[i],
+                                       navdb.wplat[imin], navdb.wplon[imin]) <= crit]
+
+
+def test_lookup(monkeypatch):
+    """
+    Expects name lookups to find the first, or the closest, waypoint or
+    airport with that name.
+    """
+    rnd = np.random.RandomState(0)
+    navdb = make_navdb(monkeypatch, 2000, 200, rnd)
+    for name in ['WP%d' % i for i in range(0, 500, 7)] + ['wp3', 'NOWP']:
+        reflat, reflon = rnd.uniform(-80., 80.), rnd.uniform(-180., 180.)
+        ref = ref_getwpindices(navdb, name, reflat, reflon)
+        assert navdb.getwpidx(name, reflat, reflon) == ref[0]
+        assert navdb.getwpindices(name, reflat, reflon) == ref
+        assert navdb.getwpindices(name, reflat, reflon, crit=3e6) == \
+            ref_getwpindices(navdb, name, reflat, reflon, crit=3e6)
+        first = navdb.wpid.index(name.upper()) if name.upper() in navdb.wpid else -1
+        assert navdb.getwpidx(name) == first
+        assert navdb.getwpindices(name) == [first]
+
+    for name in ['AP%d' % i for i in range(200)]:
+        ref = navdb.aptid.index(name) if name in navdb.aptid else -1
+        assert navdb.getaptidx(name.lower()) == ref
+
+
+def test_defwpt(monkeypatch):
+    """
+    Expects waypoints added with DEFWPT to be found by name, and the name
+    index to be rebuilt when the database is reset.
+    """
+    rnd = np.random.RandomState(1)
+    navdb = make_navdb(monkeypatch, 1000, 10, rnd)
+    assert navdb.getwpidx('MYWPT') == -1
+    assert navdb.defwpt('mywpt', 10., 20.)[0]
+    assert navdb.defwpt('WP1', 30., 40.)[0]
+    assert navdb.getwpidx('MYWPT') == len(navdb.wpid) - 2
+    assert navdb.getwpidx('WP1', 30., 40.) == len(navdb.wpid) - 1
+
+    navdb = make_navdb(monkeypatch, 1000, 10, rnd)
+    assert navdb.getwpidx('MYWPT') == -1
@@ -0,0 +1,88 @@
+"""
+Tests the spatial index of the navigation database against full scans of
+all points.
+"""
+import pytest
+import numpy as np
+from bluesky.navdatabase.spatialindex import SpatialIndex
+
+
+def make_points(n, rnd):
+    """ Creates n random points, with extra points near the poles and the
+        date line. """
+    lat = np.concatenate((rnd.uniform(-90., 90., n), rnd.uniform(85., 90., n // 10),
+                          rnd.uniform(-5., 5., n // 10)))
+    lon = np.concatenate((rnd.uniform(-180., 180., n), rnd.uniform(-180., 180., n // 10),
+                          rnd.choice([-180., 180.], n // 10) + rnd.uniform(-2., 2., n // 10)))
+    return lat, (lon + 180.) % 360. - 180.
+
+
+def ref_dist2(wlat, wlon, lat, lon):
+    """ Squared distance as in Navdatabase.getinear. """
+    f = np.cos(np.radians(lat))
+    dlat = (wlat - lat + 180.) % 360. - 180.
+    dlon = f * ((wlon - lon + 180.) % 360. - 180.)
+    return dlat * dlat + dlon * dlon
+
+
+# Query positions: random, near the date line, and at the poles
+queries = [(10., 20.), (-45.5, 179.9), (0.3, -179.95), (89.9, 0.), (-90., 45.), (52., 4.)]
+
+
+@pytest.mark.parametrize('cellsize', (0.5, 1.0, 5.0))
+def test_knearest(cellsize):
+    """
+    Expects the k nearest points to be equal to those found with a full scan.
+    """
+    rnd = np.random.RandomState(1)
+    wlat, wlon = make_points(5000, rnd)
+    index = SpatialIndex(wlat, wlon, cellsize)
+    for lat, lon in queries + list(zip(rnd.uniform(-90, 90, 20), rnd.uniform(-180, 180, 20))):
+        d2 = ref_dist2(wlat, wlon, lat, lon)
+        assert index.knearest(wlat, wlon, lat, lon)[0] == np.argmin(d2)
+        for k in (5, 50):
+            assert list(index.knearest(wlat, wlon, lat, lon, k)) == \
+                list(np.lexsort((np.arange(len(d2)), d2))[:k])
+
+
+def test_radius_inside():
+    """
+    Expects radius and box queries to be equal to those found with a full scan.
+    """
+    rnd = np.random.RandomState(2)
+    wlat, wlon = make_points(5000, rnd)
+    index = SpatialIndex(wlat, wlon)
+    for lat, lon in queries:
+        for dist in (10., 100., 1000.):
+            r = dist / 60.
+            ref = np.flatnonzero(ref_dist2(wlat, wlon, lat, lon) <= r * r)
+            assert list(index.radius(wlat, wlon, lat, lon, dist)) == list(ref)
+
+    for lat0, lat1, lon0, lon1 in ((10., 20., -5., 5.), (-90., 90., -180., 180.),
+                                   (85., 90., 170., 180.), (-1.3, 2.7, -179.5, 179.5),
+                                   (30., 30.5, 7.2, 7.3)):
+        ref = np.where((wlat > lat0) * (wlat < lat1) * (wlon > lon0) * (wlon < lon1))[0]
+        assert list(index.inside(wlat, wlon, lat0, lat1, lon0, lon1)) == list(ref)
+
+
+def test_added_points():
+    """
+    Expects points added after the index was built to be found.
+    """
+    rnd = np.random.RandomState(3)
+    wlat, wlon = make_points(1000, rnd)
+    index = SpatialIndex(wlat, wlon)
+    wlat, wlon = np.append(wlat, [12.345, -60.]), np.append(wlon, [67.89, 179.99])
+    assert index.knearest(wlat, wlon, 12.345, 67.89)[0] == len(wlat) - 2
+    assert index.knearest(wlat, wlon, -60., -179.99)[0] == len(wlat) - 1
+    assert len(wlat) - 2 in index.radius(wlat, wlon, 12.3, 67.9, 5.)
+    assert len(wlat) - 1 in index.inside(wlat, wlon, -61., -59., 179., 180.)
+
+
+def test_empty():
+    """
+    Expects queries on an empty index to return no points.
+    """
+    index = SpatialIndex(np.array([]), np.array([]))
+    assert len(index.knearest(np.array([]), np.array([]), 0., 0., 3)) == 0
+    assert len(index.inside(np.array([]), np.array([]), -1., 1., -1., 1.)) == 0
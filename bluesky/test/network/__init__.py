@@ -0,0 +1,3 @@
+"""
+Tests of the network layer of BlueSky.
+"""
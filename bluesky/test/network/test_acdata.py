@@ -0,0 +1,169 @@
+"""
+Tests the compact encoding of the ACDATA stream
+"""
+from types import SimpleNamespace
+import numpy as np
+import bluesky as bs
+from bluesky.network.acdata import ACDataEncoder, ACDataDecoder, acfields
+
+
+def acdata(ntraf):
+    """ Version 1 ACDATA dict with two conflicts of aircraft 1 and one of 3. """
+    data = dict(simt=10.0, id=['AC%04d' % i for i in range(ntraf)],
+                nconf_tot=3, nlos_tot=0, nconf_exp=0, nlos_exp=0,
+                nconf_cur=3, nlos_cur=0, translvl=1800.0, vmin=100.0,
+                vmax=250.0, swtrails=False, traillat0=[], traillon0=[],
+                traillat1=[], traillon1=[],
+                traillastlat=np.zeros(ntraf), traillastlon=np.zeros(ntraf),
+                confcpalat=np.array([52.0, 52.1, 52.2]),
+                confcpalon=np.array([4.0, 4.1, 4.2]),
+                iconf=[[] for _ in range(ntraf)])
+    for name, _ in acfields:
+        data[name] = np.random.rand(ntraf) * 100.0
+    data['iconf'][1] = [0, 2]
+    data['iconf'][3] = [1]
+    return data
+
+
+def check(data, ref):
+    assert data['id'] == ref['id']
+    assert data['iconf'] == ref['iconf']
+    assert data['vmax'] == ref['vmax']
+    for name, dtype in acfields:
+        assert np.allclose(data[name], ref[name], rtol=10 * np.finfo(dtype).eps, atol=1e-4)
+
+
+def test_acdata_roundtrip():
+    """
+    Encodes and decodes three messages, where the third has an aircraft
+    deleted.
+
+    Expects the first and third message to be keyframes with callsigns,
+    the second to contain only the difference of the changed field, and
+    all messages to be decoded to the original data in reduced precision.
+    """
+    encoder, decoder = ACDataEncoder(), ACDataDecoder()
+    ref = acdata(5)
+    msg = encoder.encode(ref)
+    assert msg['version'] == 2 and 'id' in msg
+    check(decoder.decode(msg), ref)
+
+    ref['lat'] = ref['lat'] + 0.01
+    msg = encoder.encode(ref)
+    assert 'id' not in msg and 'lat' not in msg and 'dlat' in msg
+    assert 'lon' not in msg and 'dlon' not in msg
+    check(decoder.decode(msg), ref)
+
+    for name, _ in acfields:
+        ref[name] = ref[name][:4]
+    del ref['id'][4]
+    del ref['iconf'][4]
+    msg = encoder.encode(ref)
+    assert 'id' in msg
+    check(decoder.decode(msg), ref)
+
+
+def test_acdata_missed():
+    """
+    Decodes messages after missing the keyframe with a new callsign table.
+
+    Expects empty callsigns and the last known positions until the next
+    keyframe.
+    """
+    encoder, decoder = ACDataEncoder(), ACDataDecoder()
+    ref = acdata(5)
+    lat = decoder.decode(encoder.encode(ref))['lat']
+    ref['id'][0] = 'NEW'
+    ref['lat'] = ref['lat'] + 1.0
+    encoder.encode(ref)
+    data = decoder.decode(encoder.encode(ref))
+    assert data['id'] == 5 * ['']
+    assert np.array_equal(data['lat'], lat)
+    for _ in range(encoder.keyframe_interval):
+        data = decoder.decode(encoder.encode(ref))
+    assert data['id'] == ref['id']
+
+
+def test_acdata_version1():
+    """
+    Decodes a message without version.
+    """
+    ref = acdata(5)
+    assert ACDataDecoder().decode(ref) is ref
+
+
+def test_acdata_selection():
+    """
+    Encodes a selection of aircraft 1 and 2.
+
+    Expects only the selected aircraft, and only the conflicts of aircraft 1,
+    with their new ownship index.
+    """
+    ref = acdata(5)
+    data = ACDataDecoder().decode(ACDataEncoder().encode(ref, np.array([1, 2])))
+    assert data['id'] == ['AC0001', 'AC0002']
+    assert data['iconf'] == [[0, 1], []]
+    assert np.allclose(data['confcpalat'], [52.0, 52.2])
+    assert np.allclose(data['lat'], ref['lat'][1:3])
+
+
+def test_viewfilter(monkeypatch):
+    """
+    Registers a client view of +-1 degree latitude around 52N 4E, and filters on
+    altitude.
+
+    Expects the aircraft in view plus margin, and below the altitude filter
+    top, to be selected.
+    """
+    from bluesky.simulation.qtgl.screenio import ScreenIO
+    monkeypatch.setattr(bs, 'sim', SimpleNamespace(send_event=lambda *args, **kwargs: None),
+                        raising=False)
+    monkeypatch.setattr(bs, 'traf', SimpleNamespace(
+        lat=np.array([52.0, 53.2, 53.6, 52.0, 52.0, -52.0]),
+        lon=np.array([4.0, 4.0, 4.0, 5.8, 4.0, 4.0]),
+        alt=np.array([1000.0, 1000.0, 1000.0, 1000.0, 9000.0, 1000.0])), raising=False)
+    scr = ScreenIO()
+    assert scr.event(b'VIEWFILTER', dict(enabled=True, pan=(52.0, 4.0), zoom=1.0, ar=1.0),
+                     [b'CLIENT'])
+    assert b'CLIENT' in scr.client_acdata
+    assert scr.getviewfilter(b'CLIENT').tolist() == [0, 1, 3, 4]
+    scr.filteralt(True, 0.0, 5000.0)
+    assert scr.getviewfilter(b'CLIENT').tolist() == [0, 1, 3]
+    scr.event(b'VIEWFILTER', dict(enabled=False), [b'CLIENT'])
+    assert b'CLIENT' in scr.client_acdata and not scr.client_viewfilter
+
+
+def test_acdata_version(monkeypatch):
+    """
+    Announces the ACDATA version of two clients.
+
+    Expects only the client that decodes version 2 to get its own stream,
+    both clients to be told which stream they get, and the broadcast stream
+    to be version 1 by default.
+    """
+    from bluesky.simulation.qtgl import screenio
+    events = []
+    monkeypatch.setattr(bs, 'sim', SimpleNamespace(
+        send_event=lambda name, data=None, target=None: events.append((name, data, target))),
+        raising=False)
+    assert screenio.settings.acdata_version == 1
+    scr = screenio.ScreenIO()
+    assert scr.event(b'ACDATAVERSION', dict(version=2), [b'NEW'])
+    assert scr.event(b'ACDATAVERSION', dict(version=1), [b'OLD'])
+    assert list(scr.client_acdata) == [b'NEW']
+    assert events[-2:] == [(b'ACDATAVERSION', dict(version=2), [b'NEW']),
+                           (b'ACDATAVERSION', dict(version=1), [b'OLD'])]
+
+    # A client that leaves the node announces version 1
+    scr.event(b'VIEWFILTER', dict(enabled=True), [b'NEW'])
+    monkeypatch.setattr(screenio.stack, 'sender', lambda: b'NEW')
+    scr.filteralt(True, 0.0, 5000.0)
+    assert scr.client_filteralt
+    scr.event(b'ACDATAVERSION', dict(version=1), [b'NEW'])
+    assert not scr.client_acdata and not scr.client_viewfilter
+    assert not scr.client_filteralt
+
+    # A reset forgets all clients
+    scr.event(b'VIEWFILTER', dict(enabled=True), [b'NEW'])
+    scr.reset()
+    assert not scr.client_acdata and not scr.client_viewfilter
@@ -0,0 +1,74 @@
+"""
+Tests the multipart numpy message framing
+"""
+import msgpack
+import numpy as np
+import zmq
+from bluesky.network.npcodec import encode_ndarray, pack_frames, unpack_frames
+
+
+def acdata(ntraf):
+    """ Stream data similar to ACDATA. """
+    return dict(simt=10.0, id=['AC%04d' % i for i in range(ntraf)],
+                lat=np.linspace(50.0, 53.0, ntraf),
+                alt=np.arange(ntraf, dtype=np.float32),
+                inconf=np.zeros(ntraf, dtype=bool),
+                iconf=np.arange(6, dtype=np.int64).reshape(3, 2))
+
+
+def check(data, ref):
+    assert data.keys() == ref.keys()
+    for key, value in ref.items():
+        if isinstance(value, np.ndarray):
+            assert data[key].dtype == value.dtype
+            assert data[key].shape == value.shape
+            assert np.array_equal(data[key], value)
+        else:
+            assert data[key] == value
+
+
+def test_frames_roundtrip():
+    """
+    Packs stream data in frames, and unpacks it again.
+
+    Expects one header frame and one frame per array, with a copy of the
+    arrays, and all values read back unchanged after the original arrays
+    are changed in place.
+    """
+    ref = acdata(5)
+    lat = ref['lat']
+    frames = pack_frames(ref)
+    assert len(frames) == 5
+    assert not np.shares_memory(frames[1], lat)
+    ref['lat'] = lat.copy()
+    lat += 1.0
+    check(unpack_frames(frames), ref)
+
+
+def test_frames_single_payload():
+    """
+    Unpacks a message that is packed in a single frame, as sent by nodes
+    without multipart framing.
+    """
+    ref = acdata(5)
+    check(unpack_frames([msgpack.packb(ref, default=encode_ndarray, use_bin_type=True)]), ref)
+
+
+def test_frames_zmq():
+    """
+    Sends the frames over a ZMQ socket pair without copying them.
+    """
+    ctx = zmq.Context.instance()
+    sock_out = ctx.socket(zmq.PAIR)
+    sock_in = ctx.socket(zmq.PAIR)
+    try:
+        sock_out.bind('inproc://test_npcodec')
+        sock_in.connect('inproc://test_npcodec')
+        ref = acdata(10000)
+        sock_out.send_multipart([b'ACDATA'] + pack_frames(ref), copy=False)
+        msg = sock_in.recv_multipart(copy=False)
+        assert msg[0].bytes == b'ACDATA'
+        check(unpack_frames(msg[1:]), ref)
+    finally:
+        sock_out.close(linger=0)
+        sock_in.close(linger=0)
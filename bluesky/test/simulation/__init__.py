@@ -0,0 +1,3 @@
+"""
+Tests of the headless simulation and the batch runner of BlueSky.
+"""
@@ -0,0 +1,112 @@
+"""
+Tests the headless batch runner: splitting a batch file in scenarios, the
+run limits of the headless simulation, and the results of a batch.
+"""
+import csv
+from types import SimpleNamespace
+import bluesky as bs
+from bluesky import stack
+from bluesky.tools import plugin
+from bluesky.simulation.headless import batch
+from bluesky.simulation.headless.simulation import Simulation
+
+
+def test_split_scenarios():
+    """
+    Expects a batch file to be split at each SCEN command.
+    """
+    scentime = [0.0, 0.0, 10.0, 0.0, 5.0, 60.0]
+    scencmd = ['SCEN FIRST', 'CRE A', 'HOLD', 'SCEN SECOND', 'CRE B', 'QUIT']
+    scens = list(stack.split_scenarios(scentime, scencmd))
+
+    assert [s['name'] for s in scens] == ['FIRST', 'SECOND']
+    assert scens[0]['scencmd'] == ['SCEN FIRST', 'CRE A', 'HOLD']
+    assert scens[1]['scentime'] == [0.0, 5.0, 60.0]
+
+
+def make_sim(monkeypatch):
+    """ Creates a headless simulation with one aircraft that flies
+        forever, and no scenario commands. """
+    monkeypatch.setattr(bs, 'traf', SimpleNamespace(ntraf=1, update=lambda simt, simdt: None),
+                        raising=False)
+    monkeypatch.setattr(bs, 'scr', SimpleNamespace(update=lambda: None), raising=False)
+    monkeypatch.setattr(stack, 'checkfile', lambda simt: None)
+    monkeypatch.setattr(stack, 'process', lambda: None)
+    monkeypatch.setattr(stack, 'get_scenlen', lambda: 0)
+    monkeypatch.setattr(plugin, 'preupdate', lambda simt: None, raising=False)
+    monkeypatch.setattr(plugin, 'update', lambda simt: None, raising=False)
+    monkeypatch.setattr(batch.settings, 'simdt', 1.0, raising=False)
+    return Simulation()
+
+
+def test_run_limits(monkeypatch):
+    """
+    Expects a scenario that doesn't end by itself to be stopped at the sim
+    time limit and at the wall-clock limit.
+    """
+    sim = make_sim(monkeypatch)
+    sim.maxsimt = 100.0
+    sim.run()
+    assert sim.simt == 100.0
+    assert sim.state == bs.HOLD and 'sim time' in sim.stopreason
+
+    sim.reset = lambda: None
+    sim.op()
+    sim.maxsimt, sim.maxwalltime = None, 0.0
+    sim.run()
+    assert sim.simt == 102.0
+    assert sim.state == bs.HOLD and 'wall-clock' in sim.stopreason
+
+
+def test_results(tmp_path, monkeypatch):
+    """
+    Expects the result of a scenario that is stopped at a limit to report
+    this as its error, and the results file to contain one row per scenario.
+    """
+    def run():
+        fakesim.simt, fakesim.nsteps = 50.0, 1000
+        fakesim.stopreason = 'sim time limit of 50 s reached'
+
+    fakesim = SimpleNamespace(reset=lambda: None, run=run, simt=0.0, nsteps=0)
+    monkeypatch.setattr(batch, 'initerror', '')
+    monkeypatch.setattr(bs, 'sim', fakesim, raising=False)
+    monkeypatch.setattr(bs, 'scr', SimpleNamespace(echotext=['Starting scenario A']), raising=False)
+    monkeypatch.setattr(stack, 'set_scendata', lambda scentime, scencmd: None)
+    monkeypatch.setattr(batch.settings, 'log_path', str(tmp_path))
+    monkeypatch.setattr(batch.settings, 'batch_max_simt', 50.0)
+
+    scen = dict(name='A', scentime=[0.0], scencmd=['SCEN A'], logpath=str(tmp_path / 'A'))
+    result = batch.runscenario(scen)
+    assert result['error'] == 'Stopped: sim time limit of 50 s reached'
+    assert result['nsteps'] == 1000 and result['echo'] == ['Starting scenario A']
+
+    other = dict(result, name='B', error='', logfiles=['x.log', 'y.log'])
+    fname = str(tmp_path / 'out' / 'batch_results.csv')
+    batch.writeresults(fname, [result, other])
+    with open(fname) as f:
+        rows = [row for row in csv.reader(f) if not row[0].startswith('#')]
+    assert [row[0] for row in rows] == ['A', 'B']
+    assert rows[0][2] == '50.00' and rows[0][3] == '1000'
+    assert rows[0][7] == result['error'] and rows[1][6] == 'x.log;y.log'
+
+
+def test_init_error(tmp_path, monkeypatch):
+    """
+    Expects a worker that fails to initialize BlueSky to try it only once,
+    and to report the error for each of its scenarios.
+    """
+    calls = []
+
+    def init():
+        calls.append(True)
+        raise FileNotFoundError('navdata not found')
+
+    monkeypatch.setattr(batch, 'initerror', None)
+    monkeypatch.setattr(bs, 'init', init)
+    for name in 'AB':
+        scen = dict(name=name, scentime=[0.0], scencmd=['SCEN ' + name],
+                    logpath=str(tmp_path / name))
+        result = batch.runscenario(scen)
+        assert result['error'] == 'Initialization failed: FileNotFoundError: navdata not found'
+        assert result['nsteps'] == 0 and result['logfiles'] == []
+    assert len(calls) == 1
@@ -0,0 +1,68 @@
+"""
+Tests the cases and the results file of the benchmark suite.
+"""
+import csv
+import bluesky as bs
+from bluesky import settings
+from bluesky.simulation.headless import benchsuite
+
+
+def test_makecases():
+    """
+    Expects a case per density and CD/CR combination, per performance model.
+    """
+    cases = benchsuite.makecases()
+
+    assert list(cases) == settings.bench_perf
+    for perf, percases in cases.items():
+        assert len(percases) == len(settings.bench_densities) * \
+            len(settings.bench_cd) * len(settings.bench_cr)
+        assert all(case['perf'] == perf for case in percases)
+    assert 'SPATIAL' in {case['cd'] for case in cases[settings.bench_perf[0]]}
+
+
+def test_writeresults(tmpdir):
+    """
+    Expects a row per case with as many columns as the header, also for
+    cases that failed.
+    """
+    nsub = len(benchsuite.subsystems)
+    case = dict(perf='nap', density=20, ntraf=180, cd='STATEBASED', cr='MVP')
+    results = [dict(case, nsteps=2400, stepspersec=812.34, memory=95.25,
+                    timings=[1e-4] * nsub, error=''),
+               dict(case, cd='SPATIAL', cr='SWARM', nsteps=0, stepspersec=0.0,
+                    memory=0.0, error='SPATIAL can\'t be used with "SWARM"')]
+    fname = str(tmpdir.join('results', 'bench.csv'))
+    benchsuite.writeresults(fname, results)
+
+    with open(fname) as f:
+        lines = f.read().splitlines()
+    assert lines[0].startswith('#') and lines[1].startswith('#')
+    header = lines[1][1:].split(',')
+    rows = list(csv.reader(lines[2:]))
+
+    assert len(rows) == 2
+    assert all(len(row) == len(header) == 9 + nsub for row in rows)
+    assert rows[0][:8] == ['nap', '20', '180', 'STATEBASED', 'MVP', '2400', '812.3', '95.2']
+    assert rows[0][8:8 + nsub] == ['0.100'] * nsub
+    assert rows[1][3:5] == ['SPATIAL', 'SWARM']
+    assert rows[1][-1] == "SPATIAL can't be used with 'SWARM'"
+
+
+def test_unavailable_perf(tmpdir, monkeypatch):
+    """
+    Expects the suite to finish, and to record an error for each case of a
+    performance model that fails to initialize.
+    """
+    def init():
+        raise ImportError('BADA performance model files not found')
+
+    monkeypatch.setattr(bs, 'init', init)
+    monkeypatch.setattr(settings, 'bench_perf', ['bada'])
+    monkeypatch.setattr(settings, 'bench_densities', [5])
+    monkeypatch.setattr(settings, 'bench_cr', ['OFF', 'MVP'])
+    results = benchsuite.run(str(tmpdir.join('bench.csv')))
+
+    assert len(results) == 2 * len(settings.bench_cd)
+    assert all(r['nsteps'] == 0 and r['error'] ==
+               'ImportError: BADA performance model files not found' for r in results)
@@ -0,0 +1,3 @@
+"""
+Tests of the command stack of BlueSky.
+"""
@@ -0,0 +1,42 @@
+"""
+Tests reading scenario files through the scenario cache.
+"""
+import glob
+import importlib
+import os
+from bluesky import settings
+
+# The stack module is shadowed by its stack function in bluesky.stack
+st = importlib.import_module('bluesky.stack.stack')
+
+
+def test_damaged_cache(tmp_path, monkeypatch):
+    """
+    Expects a scenario with a truncated cache file to be parsed again, and
+    the cache file to be written anew.
+    """
+    monkeypatch.setattr(settings, 'cache_path', str(tmp_path / 'cache'))
+    os.makedirs(settings.cache_path)
+    fname = str(tmp_path / 'test.scn')
+    with open(fname, 'w') as fscn:
+        for i in range(100):
+            fscn.write('00:%02d:%05.2f>ECHO %d\n' % (i // 60, i % 60, i))
+
+    scentime, scencmd = st.readscn(fname)
+    cachename, = glob.glob(os.path.join(settings.cache_path, 'scn_*.p'))
+    assert len(scentime) == len(scencmd) == 100
+
+    parsescn = st.parsescn
+    # Cut off the end of the command list, so that the times load and the
+    # commands don't, and then the start of the file
+    for size in (os.path.getsize(cachename) - 10, 0):
+        with open(cachename, 'r+b') as f:
+            f.truncate(size)
+        newtime, newcmd = st.readscn(fname)
+        assert list(newtime) == list(scentime) and newcmd == scencmd
+
+        # The rewritten cache file is read without parsing the scenario
+        monkeypatch.setattr(st, 'parsescn', None)
+        newtime, newcmd = st.readscn(fname)
+        assert list(newtime) == list(scentime) and newcmd == scencmd
+        monkeypatch.setattr(st, 'parsescn', parsescn)
@@ -0,0 +1,3 @@
+"""
+Tests of the tools of BlueSky.
+"""
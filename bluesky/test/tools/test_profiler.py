@@ -0,0 +1,59 @@
+"""
+Tests the simulation step profiler
+"""
+import json
+import time
+import bluesky as bs
+from bluesky.tools import profiler
+
+
+class Sub(object):
+    """ Subsystem with an update function that takes 1 ms. """
+    def update(self, *args):
+        time.sleep(0.001)
+
+
+class Traffic(object):
+    """ Minimal traffic object, updating its subsystems. """
+    def __init__(self):
+        self.ap = Sub()
+        self.asas = Sub()
+
+    def update(self, simt, simdt):
+        self.ap.update(simt)
+        self.asas.update(simt)
+
+
+def test_profiler(tmp_path, monkeypatch):
+    """
+    Profiles five steps of a traffic object with two subsystems, and writes
+    the timings to CSV and JSON files.
+
+    Expects the subsystems to be timed at 1 ms per step while the profiler
+    runs, and the original update functions to be restored afterwards.
+    """
+    monkeypatch.setattr(bs, 'traf', Traffic(), raising=False)
+    monkeypatch.setattr(bs.settings, 'log_path', str(tmp_path))
+    assert profiler.profile('START')[0]
+    assert 'update' in vars(bs.traf.ap)
+    for _ in range(5):
+        bs.traf.update(0.0, 0.05)
+    ok, text = profiler.profile('STOP')
+    assert '5 steps' in text
+    assert 'update' not in vars(bs.traf.ap) and 'update' not in vars(bs.traf)
+
+    # Steps after stopping are not timed
+    bs.traf.update(0.0, 0.05)
+    res = {r['name']: r for r in profiler.results()}
+    assert res['traffic']['calls'] == 5
+    assert res['traf.ap']['calls'] == 5
+    assert 0.9e-3 < res['traf.asas']['perstep'] < 0.1
+    assert res['traffic']['total'] >= res['traf.ap']['total'] + res['traf.asas']['total']
+
+    profiler.profile('DUMP', 'steps.csv')
+    profiler.profile('DUMP', 'steps.json')
+    lines = (tmp_path / 'steps.csv').read_text().splitlines()
+    assert lines[0].startswith('#') and len(lines) == len(res) + 1
+    data = json.loads((tmp_path / 'steps.json').read_text())
+    assert data['steps'] == 5
+    assert {r['name'] for r in data['subsystems']} == set(res)
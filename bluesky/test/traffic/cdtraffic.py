@@ -0,0 +1,40 @@
+"""
+Traffic-like objects for the conflict detection and resolution tests and
+benchmarks.
+"""
+from types import SimpleNamespace
+import numpy as np
+from bluesky.tools.aero import ft, kts
+
+
+class FakeRoute(object):
+    """ Route without waypoints, so ResumeNav doesn't do a recovery. """
+    @staticmethod
+    def findact(idx):
+        return -1
+
+
+def make_traffic(ntraf, seed, area=2.0):
+    """
+    Creates a traffic-like object with ntraf aircraft in an area of
+    area x area degrees, with perfect ADS-B perception.
+    """
+    rnd = np.random.RandomState(seed)
+    traf = SimpleNamespace()
+    traf.ntraf = ntraf
+    traf.id = ['AC%05d' % i for i in range(ntraf)]
+    traf.lat = 52.0 + (rnd.rand(ntraf) - 0.5) * area
+    traf.lon = 4.0 + (rnd.rand(ntraf) - 0.5) * area
+    traf.alt = rnd.randint(200, 280, ntraf) * 100.0 * ft
+    traf.trk = rnd.rand(ntraf) * 360.0
+    traf.gs = (250.0 + rnd.rand(ntraf) * 200.0) * kts
+    traf.vs = np.where(rnd.rand(ntraf) < 0.3, rnd.randn(ntraf) * 10.0, 0.0)
+    rad = np.radians(traf.trk)
+    traf.gsnorth = traf.gs * np.cos(rad)
+    traf.gseast = traf.gs * np.sin(rad)
+    traf.adsb = SimpleNamespace(lat=traf.lat, lon=traf.lon, alt=traf.alt,
+                                trk=traf.trk, gs=traf.gs, vs=traf.vs,
+                                transnoise=False, truncated=False)
+    traf.ap = SimpleNamespace(route=[FakeRoute()] * ntraf)
+    traf.id2idx = lambda acid: traf.id.index(acid) if acid in traf.id else -1
+    return traf
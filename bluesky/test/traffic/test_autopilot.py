@@ -0,0 +1,182 @@
+"""
+Tests the batched waypoint switching of the autopilot against the scalar,
+per-aircraft waypoint switching that it replaces.
+"""
+from types import SimpleNamespace
+import pytest
+import numpy as np
+import bluesky as bs
+from bluesky.tools.aero import ft, nm, kts, cas2mach, mach2cas
+from bluesky.traffic.autopilot import Autopilot
+from bluesky.traffic.route import Route
+
+
+def make_route(nextwp):
+    """ Creates a route of which the next waypoint has the data in nextwp,
+        or a route without next waypoint if lnavon in nextwp is False. """
+    lat, lon, alt, spd, xtoalt, toalt, lnavon, flyby, _ = nextwp
+    route = Route()
+    if lnavon:
+        route.addwpt_data(False, 0, 'PREV', lat - 0.1, lon, 0, -999., -999., True)
+    route.addwpt_data(False, route.nwp, 'NEXT', lat, lon, 0, alt, spd, flyby)
+    route.nwp = len(route.wpname)
+    route.wpxtoalt[-1] = xtoalt
+    route.wptoalt[-1] = toalt
+    route.iactwp = 0
+    return route
+
+
+def make_traffic(ntraf, seed):
+    """
+    Creates a traffic-like object with ntraf aircraft flying to their active
+    waypoint, and the next waypoint of each aircraft.
+    """
+    rnd = np.random.RandomState(seed)
+    traf = SimpleNamespace(ntraf=ntraf)
+    traf.lat = 52.0 + rnd.rand(ntraf)
+    traf.lon = 4.0 + rnd.rand(ntraf)
+    traf.coslat = np.cos(np.radians(traf.lat))
+    traf.alt = rnd.randint(10, 380, ntraf) * 100.0 * ft
+    traf.tas = (150.0 + rnd.rand(ntraf) * 300.0) * kts
+    traf.gs = traf.tas * rnd.choice([0.1, 1.0], ntraf)
+    # Float 0/1 arrays, like Traffic.create and the performance models make
+    traf.abco = (traf.alt > 30000.0 * ft).astype(float)
+    traf.belco = 1.0 - traf.abco
+    traf.swlnav = rnd.rand(ntraf) < 0.9
+    traf.swvnav = traf.swlnav & (rnd.rand(ntraf) < 0.8)
+    traf.selspd = (250.0 + rnd.rand(ntraf) * 50.0) * kts
+    traf.actwp = SimpleNamespace(
+        lat=traf.lat + rnd.rand(ntraf) - 0.5, lon=traf.lon + rnd.rand(ntraf) - 0.5,
+        spd=np.where(rnd.rand(ntraf) < 0.5, -999.0, 280.0 * kts),
+        nextaltco=rnd.randint(0, 300, ntraf) * 100.0 * ft,
+        xtoalt=np.zeros(ntraf), next_qdr=np.zeros(ntraf), flyby=np.ones(ntraf),
+        turndist=rnd.rand(ntraf) * 5.0 * nm, vs=np.zeros(ntraf))
+
+    nextwp = [(52.0 + rnd.rand(), 4.0 + rnd.rand(),
+               rnd.choice([-999.0, rnd.randint(0, 380) * 100.0 * ft]),
+               rnd.choice([-999.0, 0.78, 290.0 * kts]),
+               rnd.rand() * 100.0 * nm,
+               rnd.choice([-999.0, rnd.randint(0, 380) * 100.0 * ft]),
+               rnd.rand() < 0.9, rnd.rand() < 0.7, rnd.rand() * 360.0)
+              for _ in range(ntraf)]
+    return traf, nextwp
+
+
+def make_autopilot(traf, nextwp):
+    """ Creates an unregistered autopilot-like object for traf. """
+    ap = SimpleNamespace(steepness=3000. * ft / (10. * nm),
+                         alt=traf.alt.copy(), dist2vs=np.zeros(traf.ntraf),
+                         route=[make_route(wp) for wp in nextwp])
+    ap.ComputeVNAV = lambda *args: Autopilot.ComputeVNAV(ap, *args)
+    return ap
+
+
+def ref_switchwp(ap, traf, idx):
+    """ Scalar waypoint switching, per aircraft with index i in idx. """
+    for i in idx:
+        oldspd = traf.actwp.spd[i]
+        lat, lon, alt, spd, traf.actwp.xtoalt[i], toalt, \
+            lnavon, flyby, traf.actwp.next_qdr[i] = ap.route[i].getnextwp()
+        traf.swlnav[i] = traf.swlnav[i] and lnavon
+        traf.swvnav[i] = traf.swvnav[i] and traf.swlnav[i]
+        traf.actwp.lat[i] = lat
+        traf.actwp.lon[i] = lon
+        traf.actwp.flyby[i] = int(flyby)
+        if alt >= -0.01:
+            traf.actwp.nextaltco[i] = alt
+        if spd > -990. and traf.swlnav[i] and traf.swvnav[i]:
+            if traf.abco[i] and spd > 1.0:
+                traf.actwp.spd[i] = cas2mach(spd, traf.alt[i])
+            elif traf.belco[i] and 0. < spd <= 1.0:
+                traf.actwp.spd[i] = mach2cas(spd, traf.alt[i])
+            else:
+                traf.actwp.spd[i] = spd
+        else:
+            traf.actwp.spd[i] = -999.
+        if traf.swvnav[i] and oldspd > 0.0:
+            traf.selspd[i] = oldspd
+        ref_vnav(ap, traf, i, toalt, traf.actwp.xtoalt[i])
+
+
+def ref_vnav(ap, traf, i, toalt, xtoalt):
+    """ Scalar VNAV guidance of aircraft i. """
+    if toalt < 0 or not traf.swvnav[i]:
+        ap.dist2vs[i] = -999.
+        return
+    dy = traf.actwp.lat[i] - traf.lat[i]
+    dx = (traf.actwp.lon[i] - traf.lon[i]) * traf.coslat[i]
+    legdist = 60. * nm * np.sqrt(dx * dx + dy * dy)
+    t2go = max(0.1, legdist + xtoalt) / max(0.01, traf.gs[i])
+    if traf.alt[i] > toalt + 10. * ft:
+        traf.actwp.nextaltco[i] = min(traf.alt[i], toalt + xtoalt * ap.steepness)
+        ap.dist2vs[i] = traf.actwp.turndist[i] + \
+            abs(traf.alt[i] - traf.actwp.nextaltco[i]) / ap.steepness
+        if legdist < ap.dist2vs[i]:
+            ap.alt[i] = traf.actwp.nextaltco[i]
+            traf.actwp.vs[i] = (traf.actwp.nextaltco[i] - traf.alt[i]) / t2go
+        else:
+            traf.actwp.vs[i] = -ap.steepness * (traf.gs[i] +
+                (traf.gs[i] < 0.2 * traf.tas[i]) * traf.tas[i])
+    elif traf.alt[i] < toalt - 10. * ft:
+        traf.actwp.nextaltco[i] = toalt
+        ap.alt[i] = toalt
+        ap.dist2vs[i] = 9999.
+        traf.actwp.vs[i] = max(ap.steepness * traf.gs[i],
+                               (toalt - traf.alt[i]) / t2go)
+    else:
+        ap.dist2vs[i] = -999.
+
+
+@pytest.mark.parametrize('ntraf,seed', [(1, 0), (20, 1), (500, 2)])
+def test_switchwp_parity(monkeypatch, ntraf, seed):
+    """
+    Expects the batched waypoint switching to give the same autopilot and
+    active waypoint state as the scalar waypoint switching.
+    """
+    reftraf, nextwp = make_traffic(ntraf, seed)
+    traf, _ = make_traffic(ntraf, seed)
+    refap, ap = make_autopilot(reftraf, nextwp), make_autopilot(traf, nextwp)
+    idx = np.where(np.random.RandomState(seed).rand(ntraf) < 0.5)[0]
+    if ntraf == 1:
+        idx = np.array([0])
+
+    monkeypatch.setattr(bs, 'traf', reftraf, raising=False)
+    ref_switchwp(refap, reftraf, idx)
+    monkeypatch.setattr(bs, 'traf', traf)
+    Autopilot.switchwp(ap, idx)
+
+    for name in ('swlnav', 'swvnav', 'selspd'):
+        np.testing.assert_allclose(getattr(traf, name), getattr(reftraf, name),
+                                   rtol=1e-6, err_msg=name)
+    for name in ('lat', 'lon', 'nextaltco', 'xtoalt', 'next_qdr', 'flyby', 'vs'):
+        np.testing.assert_allclose(getattr(traf.actwp, name),
+                                   getattr(reftraf.actwp, name),
+                                   rtol=1e-6, err_msg=name)
+    # The vectorized CAS/Mach conversions use a slightly different
+    # atmosphere than the scalar ones
+    np.testing.assert_allclose(traf.actwp.spd, reftraf.actwp.spd, rtol=1e-3)
+    np.testing.assert_allclose(ap.alt, refap.alt)
+    np.testing.assert_allclose(ap.dist2vs, refap.dist2vs)
+
+
+def test_computevnav_scalar(monkeypatch):
+    """
+    Expects ComputeVNAV to accept a single aircraft index, as used by the
+    DIRECT and VNAV commands.
+    """
+    reftraf, nextwp = make_traffic(10, 3)
+    traf, _ = make_traffic(10, 3)
+    traf.swvnav[:] = reftraf.swvnav[:] = True
+    refap, ap = make_autopilot(reftraf, nextwp), make_autopilot(traf, nextwp)
+
+    monkeypatch.setattr(bs, 'traf', reftraf, raising=False)
+    for i in range(10):
+        ref_vnav(refap, reftraf, i, 20000. * ft, 30. * nm)
+    monkeypatch.setattr(bs, 'traf', traf)
+    for i in range(10):
+        Autopilot.ComputeVNAV(ap, i, 20000. * ft, 30. * nm)
+
+    np.testing.assert_allclose(ap.alt, refap.alt)
+    np.testing.assert_allclose(ap.dist2vs, refap.dist2vs)
+    np.testing.assert_allclose(traf.actwp.vs, reftraf.actwp.vs)
+    np.testing.assert_allclose(traf.actwp.nextaltco, reftraf.actwp.nextaltco)
@@ -0,0 +1,158 @@
+"""
+Tests the binary datalog format
+"""
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+import numpy as np
+import bluesky as bs
+from bluesky.tools import datalog
+
+
+class LogParent(object):
+    """ Minimal object with logged variables. """
+    def __init__(self):
+        self.id  = ['AB1', 'AB2', 'AB3']
+        self.alt = np.array([1000.0, 2000.0, 3000.0])
+        self.n   = 3
+
+
+def test_datalog_binary(tmp_path):
+    """
+    Logs two periods to a binary log, and reads them back.
+
+    Expects the header, the column names and all rows to be read back,
+    with scalars repeated for each row and unnamed additional columns.
+    """
+    oldsim, oldpath = getattr(bs, 'sim', None), bs.settings.log_path
+    bs.sim = SimpleNamespace(simt=0.0)
+    bs.settings.log_path = str(tmp_path)
+    try:
+        parent = LogParent()
+        logger = datalog.CSVLogger('TESTBINLOG')
+        logger.setheader('Test log\nSecond line')
+        logger.allvars = [(parent, ['id', 'alt', 'n'])]
+        logger.selvars = list(logger.allvars)
+        logger.setdt(1.0)
+
+        assert logger.stackio('ON', 'BIN') is True
+        assert logger.binary
+        fname, = tmp_path.glob('TESTBINLOG_*.bin')
+        logger.log(np.arange(3))
+        bs.sim.simt = 1.0
+        parent.alt = parent.alt + 100.0
+        logger.log(np.arange(3))
+        logger.reset()
+        assert not logger.binary
+    finally:
+        bs.sim, bs.settings.log_path = oldsim, oldpath
+        bs.stack.remove_commands(['TESTBINLOG'])
+
+    header, data = datalog.readbinlog(str(fname))
+    assert header == ['Test log', 'Second line']
+    assert list(data.keys()) == ['simt', 'id', 'alt', 'n', 'col4']
+    assert list(data['simt']) == [0.0] * 3 + [1.0] * 3
+    assert list(data['id']) == 2 * parent.id
+    assert list(data['alt']) == [1000.0, 2000.0, 3000.0, 1100.0, 2100.0, 3100.0]
+    assert list(data['n']) == [3] * 6
+    assert list(data['col4']) == [0, 1, 2, 0, 1, 2]
+
+
+def test_datalog_queue(tmp_path, monkeypatch):
+    """
+    Logs three periods while the write queue has room for two log calls
+    and is not emptied.
+
+    Expects the rows of the third call to be dropped, and both counters to
+    be reported by the stack command.
+    """
+    monkeypatch.setattr(datalog, 'writequeue', datalog.Queue(2))
+    monkeypatch.setattr(datalog, 'writer', 'stopped')
+    monkeypatch.setattr(bs, 'sim', SimpleNamespace(simt=0.0), raising=False)
+    parent = LogParent()
+    logger = datalog.CSVLogger('TESTQUEUELOG')
+    try:
+        logger.allvars = [(parent, ['id', 'alt'])]
+        logger.selvars = list(logger.allvars)
+        logger.setdt(1.0)
+        logger.file = open(str(tmp_path / 'test.log'), 'wb')
+        for _ in range(3):
+            logger.log()
+            bs.sim.simt += 1.0
+
+        assert logger.nbacklog == 6
+        assert logger.ndropped == 3
+        assert '6 rows waiting to be written, 3 rows dropped' in logger.stackio()[1]
+    finally:
+        logger.file.close()
+        bs.stack.remove_commands(['TESTQUEUELOG'])
+
+
+def test_datalog_writer_error(tmp_path, monkeypatch):
+    """
+    Expects the writer thread to survive an unexpected exception while
+    writing, and to write the next log call.
+    """
+    monkeypatch.setattr(datalog, 'writequeue', datalog.Queue())
+    monkeypatch.setattr(datalog, 'writer', None)
+    monkeypatch.setattr(bs, 'sim', SimpleNamespace(simt=0.0), raising=False)
+    parent = LogParent()
+    logger = datalog.CSVLogger('TESTERRORLOG')
+    try:
+        logger.allvars = [(parent, ['id', 'alt'])]
+        logger.selvars = list(logger.allvars)
+        logger.setdt(1.0)
+        logger.file = open(str(tmp_path / 'test.log'), 'wb')
+        write = logger.write
+
+        def failonce(*args):
+            logger.write = write
+            raise TypeError('unexpected')
+        logger.write = failonce
+
+        for _ in range(2):
+            logger.log()
+            bs.sim.simt += 1.0
+        datalog.flush()
+
+        assert datalog.writer.is_alive()
+        assert logger.nbacklog == 0
+    finally:
+        logger.file.close()
+        bs.stack.remove_commands(['TESTERRORLOG'])
+
+    assert len(open(str(tmp_path / 'test.log')).read().splitlines()) == 3
+
+
+# Logs 20 periods of 20000 rows, and exits without a reset or flush
+exitlog = '''
+from types import SimpleNamespace
+import numpy as np
+import bluesky as bs
+from bluesky import settings
+settings.log_path = %r
+from bluesky.tools import datalog
+bs.sim = SimpleNamespace(simt=0.0)
+parent = SimpleNamespace(alt=np.arange(20000.0))
+logger = datalog.defineLogger('TESTEXITLOG', 'Test log')
+logger.allvars = [(parent, ['alt'])]
+logger.selvars = list(logger.allvars)
+logger.setdt(1.0)
+logger.stackio('ON')
+for _ in range(20):
+    logger.log()
+    bs.sim.simt += 1.0
+'''
+
+
+def test_datalog_exit(tmp_path):
+    """
+    Expects all queued rows to be written when the process exits.
+    """
+    rootdir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+    subprocess.run([sys.executable, '-c', exitlog % str(tmp_path)], cwd=rootdir, check=True)
+
+    fname, = tmp_path.glob('TESTEXITLOG_*.log')
+    with open(str(fname)) as f:
+        assert sum(1 for line in f if not line.startswith('#')) == 20 * 20000
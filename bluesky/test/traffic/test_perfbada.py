@@ -0,0 +1,156 @@
+"""
+Tests the BADA coefficient cache, and the creation of aircraft with the
+coefficients of their type, on generated BADA files.
+"""
+import re
+from types import SimpleNamespace
+import pytest
+import numpy as np
+import bluesky as bs
+from bluesky import settings
+from bluesky.tools.aero import kts, ft
+from bluesky.traffic.performance.legacy import coeff_bada
+
+
+def write_bada(fname, formats, lines):
+    """ Writes a file with fixed-width lines of values in the BADA formats. """
+    with open(fname, 'w') as f:
+        for fmt, values in zip(formats, lines):
+            values, line = iter(values), fmt.split(',')[0].split()[0]
+            for width, kind in re.findall(r'(\d+)([XFIS])', fmt.upper()):
+                width = int(width)
+                if kind == 'X':
+                    line += width * ' '
+                elif kind == 'S':
+                    line += str(next(values)).ljust(width)
+                else:
+                    line += (('%.4g' if kind == 'F' else '%d') % next(values)).rjust(width)
+            f.write(line + '\n')
+
+
+def make_bada(path, rnd):
+    """ Writes BADA files for a jet (with the default B744), a turboprop and
+        a piston aircraft, the latter without APF file. """
+    with open(str(path.join('ReleaseSummary')), 'w') as f:
+        f.write('Summary Date:  2019-06-01\nBADA Release: 3.15\n')
+    synonyms = [('-', 'B744', 'BOEING', '747-400', 'B744__', 'Y'),
+                ('-', 'A320', 'AIRBUS', 'A320', 'A320__', 'Y'),
+                ('*', 'AT72', 'ATR', 'ATR 72', 'AT72__', 'Y'),
+                ('-', 'C172', 'CESSNA', '172', 'C172__', 'N'),
+                ('-', 'NOFL', 'NONE', 'No coefficients', 'NOFL__', 'N')]
+    write_bada(str(path.join('SYNONYM.NEW')), coeff_bada.syn_format * len(synonyms), synonyms)
+
+    for actype, engtype in (('B744__', 'Jet'), ('A320__', 'Jet'), ('AT72__', 'Turboprop'),
+                            ('C172__', 'Piston')):
+        lines = [(actype, 4, engtype, 'H')] + \
+            [rnd.uniform(0.1, 100., len(re.findall('F', fmt)))
+             for fmt in coeff_bada.opf_format[1:]]
+        lines[19][1] = 0. if engtype == 'Jet' else lines[19][1]  # Cf4 = 0 is replaced
+        write_bada(str(path.join(actype + '.OPF')), coeff_bada.opf_format, lines)
+        if engtype != 'Piston':
+            write_bada(str(path.join(actype + '.APF')), coeff_bada.apt_format,
+                       [('EEC', 'LO', 'Generated')] + 3 * [rnd.randint(10, 99, 9)])
+
+
+@pytest.fixture(scope='module')
+def bada(tmpdir_factory):
+    """ Generated BADA files, and a cache directory. """
+    path = tmpdir_factory.mktemp('bada')
+    make_bada(path, np.random.RandomState(0))
+    saved = settings.cache_path, getattr(settings, 'perf_path_bada', None)
+    settings.cache_path = str(tmpdir_factory.mktemp('cache'))
+    settings.perf_path_bada = str(path)
+    yield str(path)
+    settings.cache_path, settings.perf_path_bada = saved
+
+
+def test_cache(bada, monkeypatch):
+    """
+    Expects the coefficients to be parsed and cached on the first init, and
+    loaded from the cache on the next init.
+    """
+    assert coeff_bada.init(bada)
+    table = coeff_bada.coefftable.copy()
+    assert sorted(coeff_bada.coeffrows) == ['A320__', 'AT72__', 'B744__']
+    assert coeff_bada.getCoefficientRow('NOFL') == -1
+    assert coeff_bada.getCoefficientRow('C172') == -1
+    assert coeff_bada.getCoefficientRow('XXXX') == -1
+
+    def parse(fname):
+        raise AssertionError('BADA files parsed, expected cache')
+    monkeypatch.setattr(coeff_bada.opf_parser, 'parse', parse)
+    coeff_bada.coefftable = None
+    assert coeff_bada.init(bada)
+    assert coeff_bada.coefftable.tobytes() == table.tobytes()
+    assert coeff_bada.getCoefficients('A320')[1].CTC == \
+        coeff_bada.accoeffs['A320__'].CTC
+
+
+# Expected per-aircraft parameters from the coefficients of the type
+expected = dict(
+    jet=lambda c: c.engtype == 'Jet', turbo=lambda c: c.engtype == 'Turboprop',
+    piston=lambda c: c.engtype == 'Piston', mass=lambda c: c.m_ref * 1000.0,
+    mmin=lambda c: c.m_min * 1000.0, mmax=lambda c: c.m_max * 1000.0,
+    gw=lambda c: c.mass_grad * ft, Sref=lambda c: c.S,
+    vmto=lambda c: c.Vstall_to * c.CVmin_to * kts, vmic=lambda c: c.Vstall_ic * c.CVmin * kts,
+    vmcr=lambda c: c.Vstall_cr * c.CVmin * kts, vmap=lambda c: c.Vstall_ap * c.CVmin * kts,
+    vmld=lambda c: c.Vstall_ld * c.CVmin * kts, vmo=lambda c: c.VMO * kts, mmo=lambda c: c.MMO,
+    hmo=lambda c: c.h_MO * ft, hmax=lambda c: c.h_max * ft, hmaxact=lambda c: c.h_max * ft,
+    gt=lambda c: c.temp_grad * ft, clbo=lambda c: c.Clbo, k=lambda c: c.k, cm16=lambda c: c.CM16,
+    cascl=lambda c: c.CAScl1[0] * kts, cascr=lambda c: c.CAScr1[0] * kts,
+    casdes=lambda c: c.CASdes1[0] * kts, macl=lambda c: c.Mcl[0], macr=lambda c: c.Mcr[0],
+    mades=lambda c: c.Mdes[0], vdes=lambda c: c.Vdes_ref * kts, mdes=lambda c: c.Mdes_ref,
+    cd0to=lambda c: c.CD0_to, cd0ic=lambda c: c.CD0_ic, cd0cr=lambda c: c.CD0_cr,
+    cd0ap=lambda c: c.CD0_ap, cd0ld=lambda c: c.CD0_ld, gear=lambda c: c.CD0_gear,
+    cd2to=lambda c: c.CD2_to, cd2ic=lambda c: c.CD2_ic, cd2cr=lambda c: c.CD2_cr,
+    cd2ap=lambda c: c.CD2_ap, cd2ld=lambda c: c.CD2_ld,
+    cred=lambda c: {'Jet': c.Cred_jet, 'Turboprop': c.Cred_turboprop}.get(c.engtype, c.Cred_piston),
+    ctcth1=lambda c: c.CTC[0], ctcth2=lambda c: c.CTC[1], ctcth3=lambda c: c.CTC[2],
+    ctct1=lambda c: c.CTC[3], ctct2=lambda c: c.CTC[4], ctdesl=lambda c: c.CTdes_low,
+    ctdesh=lambda c: c.CTdes_high, ctdesa=lambda c: c.CTdes_app, ctdesld=lambda c: c.CTdes_land,
+    hpdes=lambda c: c.Hp_des * ft, cf1=lambda c: c.Cf1,
+    cf2=lambda c: 1.0 if c.Cf2 < 1e-9 else c.Cf2, cf3=lambda c: c.Cf3,
+    cf4=lambda c: 1.0 if c.Cf4 < 1e-9 else c.Cf4, cf_cruise=lambda c: c.Cf_cruise,
+    tol=lambda c: c.TOL, ldl=lambda c: c.LDL, ws=lambda c: c.wingspan, len=lambda c: c.length,
+    gr_acc=lambda c: c.gr_acc)
+
+
+def test_create(bada, monkeypatch):
+    """
+    Expects aircraft created in mixed-type batches to get the coefficients
+    of their type, and unknown types and types without APF data to get the
+    default type.
+    """
+    from bluesky.traffic.performance.legacy.perfbada import PerfBADA
+    assert coeff_bada.init(bada)
+    traf = SimpleNamespace(type=[], id=[])
+    monkeypatch.setattr(bs, 'traf', traf, raising=False)
+    perf = PerfBADA()
+    rnd = np.random.RandomState(1)
+    types = ['B744', 'A320', 'AT72', 'C172', 'XXXX', 'NOFL']
+    for n in (1, 10, 100):
+        new = [types[i] for i in rnd.randint(0, len(types), n)]
+        traf.type.extend(new)
+        traf.id.extend('AC%d' % (len(traf.id) + i) for i in range(n))
+        perf.create(n)
+
+    assert not {'XXXX', 'NOFL', 'C172'} & set(traf.type)
+    for i, actype in enumerate(traf.type):
+        coeff = coeff_bada.getCoefficients(actype)[1]
+        for name, value in expected.items():
+            assert getattr(perf, name)[i] == value(coeff), name
+
+
+def test_create_nodefault(bada, monkeypatch):
+    """
+    Expects an error that names the unknown types when the default type has
+    no coefficients.
+    """
+    from bluesky.traffic.performance.legacy.perfbada import PerfBADA
+    assert coeff_bada.init(bada)
+    monkeypatch.delitem(coeff_bada.coeffrows, 'B744__')
+    traf = SimpleNamespace(type=['A320', 'XXXX'], id=['AC0', 'AC1'])
+    monkeypatch.setattr(bs, 'traf', traf, raising=False)
+    perf = PerfBADA()
+    with pytest.raises(RuntimeError, match='default type B744.*XXXX'):
+        perf.create(2)
@@ -0,0 +1,80 @@
+"""
+Tests the drag calculation of the BlueSky performance model against the
+calculation with masked sums of the scaling factors of all flight phases.
+"""
+from types import SimpleNamespace
+import numpy as np
+import bluesky as bs
+from bluesky.tools.aero import g0, vatmos
+from bluesky.traffic.performance.legacy import perfbs
+from bluesky.traffic.performance.legacy.perfbs import coeffBS
+
+
+def make_traffic(n, rnd):
+    """ Creates fake traffic with n aircraft of random types, in all
+        flight phases. """
+    alt = rnd.choice([0., 100., 400., 2000., 10000.], n) * rnd.rand(n)
+    tas = rnd.uniform(0., 250., n)
+    return SimpleNamespace(
+        ntraf=n, id=['AC%d' % i for i in range(n)],
+        type=[coeffBS.atype[i] for i in rnd.randint(0, len(coeffBS.atype), n)],
+        alt=alt, gs=tas, tas=tas, cas=tas, M=tas / 300., rho=vatmos(alt)[1],
+        delalt=rnd.choice([-1., 0., 1.], n) * 1000., delspd=rnd.uniform(-5., 5., n),
+        vs=rnd.uniform(-10., 10., n), bank=np.zeros(n), bphase=np.radians([15, 35, 35, 35, 15, 45]),
+        swhdgsel=np.zeros(n, dtype=bool), eps=np.array(n * [1e-3]),
+        ap=SimpleNamespace(vs=np.zeros(n)), pilot=SimpleNamespace(tas=tas.copy()))
+
+
+def ref_drag(perf, alt):
+    """ Drag with the scaling factors as sums of masked products. """
+    phase, etype = perf.phase, perf.etype
+    cl = perf.mass*g0/(perf.qS*np.cos(perf.bank))*(phase!=6)+ 0.*(phase==6)
+    CD0f = (phase==1)*(etype==1)*coeffBS.d_CD0j[0] + \
+           (phase==2)*(etype==1)*coeffBS.d_CD0j[1]  + \
+           (phase==3)*(etype==1)*coeffBS.d_CD0j[2] + \
+           (phase==4)*(etype==1)*coeffBS.d_CD0j[3] + \
+           (phase==5)*(etype==1)*(alt>=450.0)*coeffBS.d_CD0j[4] + \
+           (phase==5)*(etype==1)*(alt<450.0)*coeffBS.d_CD0j[5] + \
+           (phase==6)*(etype==1)*coeffBS.d_CD0j[0] + \
+           (phase==1)*(etype==2)*coeffBS.d_CD0t[0] + \
+           (phase==2)*(etype==2)*coeffBS.d_CD0t[1]  + \
+           (phase==3)*(etype==2)*coeffBS.d_CD0t[2] + \
+           (phase==4)*(etype==2)*coeffBS.d_CD0t[3]
+    kf =   (phase==1)*(etype==1)*coeffBS.d_kj[0] + \
+           (phase==2)*(etype==1)*coeffBS.d_kj[1]  + \
+           (phase==3)*(etype==1)*coeffBS.d_kj[2] + \
+           (phase==4)*(etype==1)*coeffBS.d_kj[3] + \
+           (phase==5)*(etype==1)*(alt>=450)*coeffBS.d_kj[4] + \
+           (phase==5)*(etype==1)*(alt<450)*coeffBS.d_kj[5] + \
+           (phase==6)*(etype==1)*coeffBS.d_kj[0] + \
+           (phase==1)*(etype==2)*coeffBS.d_kt[0] + \
+           (phase==2)*(etype==2)*coeffBS.d_kt[1]  + \
+           (phase==3)*(etype==2)*coeffBS.d_kt[2] + \
+           (phase==4)*(etype==2)*coeffBS.d_kt[3] + \
+           (phase==5)*(etype==2)*(alt>=450)*coeffBS.d_kt[4] + \
+           (phase==5)*(etype==2)*(alt<450)*coeffBS.d_kt[5]
+    cd = perf.CD0*CD0f + perf.k*kf*(cl*cl)
+    return CD0f, kf, cd*perf.qS
+
+
+def test_drag(monkeypatch):
+    """
+    Expects the drag scaling factors and the drag to be equal to those of
+    the masked sums, for all flight phases and engine types.
+    """
+    rnd = np.random.RandomState(0)
+    perf = perfbs.PerfBS()
+    traf = make_traffic(2000, rnd)
+    monkeypatch.setattr(bs, 'traf', traf, raising=False)
+    perf.create(traf.ntraf)
+    for simt in (0., 1., 2.):
+        perf.perf(simt)
+        CD0f, kf, D = ref_drag(perf, traf.alt)
+        assert set(perf.phase) == set(range(7)) and set(perf.etype) == {1, 2}
+        assert np.array_equal(perf.CD0f, CD0f)
+        assert np.array_equal(perf.kf, kf)
+        assert np.array_equal(perf.D, D)
+
+        # Aircraft move to other phases and altitude bands
+        traf.alt[:] = traf.alt[::-1]
+        traf.delalt[:] = -traf.delalt
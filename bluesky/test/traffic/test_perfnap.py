@@ -0,0 +1,100 @@
+"""
+Tests the flight envelope limits of the NAP performance model against the
+limits per aircraft type and phase, and the cache of the NAP database.
+"""
+from types import SimpleNamespace
+import pytest
+import numpy as np
+import bluesky as bs
+from bluesky import settings
+from bluesky.traffic.performance.nap import coeff, perfnap
+from bluesky.traffic.performance.nap import phase as ph
+
+
+@pytest.fixture(scope='module')
+def nap():
+    """ NAP coefficients, read from the performance data. """
+    return coeff.Coefficient()
+
+
+def ref_limits(c, actypes, lifttype, phases):
+    """ Limits [vmin, vmax, vsmin, vsmax, hmax, axmax], selected per type
+        and phase with masks. """
+    limits = np.zeros((len(actypes), 6))
+    for mdl in np.unique(actypes[lifttype == coeff.LIFT_FIXWING]):
+        lim = c.limits_fixwing[mdl]
+        for phases_sel, vmin, vmax in (
+                ((ph.NA,), 0, lim['vmaxer']), ((ph.TO,), lim['vminto'], lim['vmaxto']),
+                ((ph.IC,), lim['vminic'], lim['vmaxic']),
+                ((ph.CL, ph.CR, ph.DE), lim['vminer'], lim['vmaxer']),
+                ((ph.AP,), lim['vminap'], lim['vmaxap']), ((ph.LD,), lim['vminld'], lim['vmaxld']),
+                ((ph.GD,), 0, lim['vmaxer'])):
+            sel = (actypes == mdl) & np.isin(phases, phases_sel)
+            limits[sel, 0], limits[sel, 1] = vmin, vmax
+        sel = actypes == mdl
+        limits[sel, 2:] = [lim['vsmin'], lim['vsmax'], lim['hmax'], lim['axmax']]
+    for mdl in np.unique(actypes[lifttype == coeff.LIFT_ROTOR]):
+        lim = c.limits_rotor[mdl]
+        limits[actypes == mdl, :5] = [lim['vmin'], lim['vmax'], lim['vsmin'],
+                                      lim['vsmax'], lim['hmax']]
+    return limits
+
+
+def test_limit_table(nap):
+    """
+    Expects the limits gathered from the compiled table to be equal to the
+    limits selected per type and phase.
+    """
+    rnd = np.random.RandomState(0)
+    typeidx, table = perfnap.compile_limits(nap)
+    types = list(nap.limits_fixwing) + nap.actypes_rotor
+    actypes = np.array(types)[rnd.randint(0, len(types), 1000)]
+    lifttype = np.where(np.isin(actypes, nap.actypes_rotor), coeff.LIFT_ROTOR, coeff.LIFT_FIXWING)
+    phases = rnd.randint(ph.NA, ph.GD + 1, 1000).astype(float)
+
+    limits = table[[typeidx[mdl] for mdl in actypes], phases.astype(int)]
+    assert np.array_equal(limits, ref_limits(nap, actypes, lifttype, phases))
+
+
+def test_update(monkeypatch):
+    """
+    Expects PerfNAP.update to set the limits of each aircraft from its type
+    and phase, also for unknown types and types without an envelope.
+    """
+    types = ['A320', 'B744', 'EC35', 'XXXX', 'B772', 'A320']
+    n = len(types)
+    traf = SimpleNamespace(type=types, tas=np.full(n, 200.), vs=np.zeros(n),
+                           alt=np.full(n, 10000.))
+    monkeypatch.setattr(bs, 'traf', traf, raising=False)
+    perf = perfnap.PerfNAP()
+    perf.create(n)
+    perf.update()
+
+    # B772 has no envelope: it gets the envelope of the A320
+    ref = ref_limits(perf.coeff, np.array(['A320', 'B744', 'EC35', 'A320', 'A320', 'A320']),
+                     perf.lifttype, perf.phase)
+    limits = np.vstack((perf.vmin, perf.vmax, perf.vsmin, perf.vsmax, perf.hmax, perf.axmax)).T
+    assert np.array_equal(limits, ref)
+    assert list(perf.actypes) == ['A320', 'B744', 'EC35', 'A320', 'B772', 'A320']
+
+
+def test_cache(tmpdir, monkeypatch):
+    """
+    Expects the NAP database to be read once into the cache, and the data
+    of each type to be loaded from the cache when first used.
+    """
+    monkeypatch.setattr(settings, 'cache_path', str(tmpdir))
+    ref = coeff.Coefficient()
+    assert tmpdir.join('nap.p').check()
+
+    def load_nap_txt(self):
+        raise AssertionError('NAP database read, expected cache')
+    monkeypatch.setattr(coeff.Coefficient, '_Coefficient__load_nap_txt', load_nap_txt)
+    nap = coeff.Coefficient()
+    assert nap.actypes_fixwing == ref.actypes_fixwing and nap.actypes_rotor == ref.actypes_rotor
+    assert len(nap.acs_fixwing.data) == 0
+    assert nap.acs_fixwing['A320'] == ref.acs_fixwing['A320']
+    assert list(nap.acs_fixwing.data) == ['A320']
+    assert 'B772' in nap.acs_fixwing and 'B772' not in nap.limits_fixwing
+    for name in ('acs_fixwing', 'limits_fixwing', 'acs_rotor', 'limits_rotor'):
+        assert dict(getattr(nap, name)) == dict(getattr(ref, name))
@@ -0,0 +1,103 @@
+"""
+Tests the conflict pair table of ASAS (confidx_all): the remapping of the
+aircraft indices when aircraft are deleted, and ResumeNav on the table.
+"""
+import numpy as np
+import bluesky as bs
+from bluesky.tools.trafficarrays import TrafficArrays
+from .cdtraffic import make_traffic
+
+
+class RecordingRoute(object):
+    """ Route with one active waypoint, which records direct-to calls. """
+    wpname = ['WPT']
+
+    def __init__(self, log):
+        self.log = log
+
+    @staticmethod
+    def findact(idx):
+        return 0
+
+    def direct(self, idx, wpname):
+        self.log.append(idx)
+
+
+def make_asas(ntraf, monkeypatch):
+    """ Creates an unregistered ASAS object with ntraf aircraft. """
+    from bluesky.traffic.asas import ASAS
+    traf = make_traffic(ntraf, 0)
+    traf.tas = traf.gs
+    monkeypatch.setattr(bs, 'traf', traf, raising=False)
+    root, TrafficArrays.root = TrafficArrays.root, None
+    asas = ASAS()
+    TrafficArrays.root = root
+    asas.create(ntraf)
+    return asas, traf
+
+
+def set_pairs(asas, traf, pairs):
+    """ Fills the conflict database with the pairs of aircraft indices. """
+    asas.confidx_all  = np.array(pairs, dtype=int).reshape(-1, 2)
+    asas.conflist_all = [(traf.id[i], traf.id[j]) for i, j in pairs]
+    asas.confkeys_all = np.arange(len(pairs), dtype=np.int64)
+
+
+def ref_remap(pairs, deleted):
+    """ Index of each aircraft after deleting the aircraft in deleted. """
+    def newidx(i):
+        return -1 if i < 0 or i in deleted else i - sum(d < i for d in deleted)
+    return [[newidx(i), newidx(j)] for i, j in pairs]
+
+
+def test_delete_remap(monkeypatch):
+    """
+    Expects the aircraft indices in the pair table to shift down when
+    aircraft in and outside conflict pairs are deleted, and to become -1 for
+    deleted aircraft.
+    """
+    asas, traf = make_asas(13, monkeypatch)
+    pairs = [[0, 1], [2, 5], [5, 7], [3, 4], [8, 9], [6, 2], [9, 11]]
+    set_pairs(asas, traf, pairs)
+
+    # Aircraft 5 and 8 are in pairs, 10 is not
+    asas.delete([8, 10, 5])
+    pairs = ref_remap(pairs, [5, 8, 10])
+    assert asas.confidx_all.tolist() == pairs == \
+        [[0, 1], [2, -1], [-1, 6], [3, 4], [-1, 7], [5, 2], [7, 8]]
+    assert len(asas.uid) == 10
+
+    # A single delete of the last aircraft (12), which is not in any pair
+    asas.delete(9)
+    assert asas.confidx_all.tolist() == pairs
+
+    # Aircraft 0 is in a pair, and -1 entries stay -1
+    asas.delete(0)
+    pairs = ref_remap(pairs, [0])
+    assert asas.confidx_all.tolist() == pairs
+
+
+def test_resumenav_deleted(monkeypatch):
+    """
+    Expects ResumeNav to remove the pairs with a deleted aircraft, to send
+    the remaining aircraft of these pairs to their active waypoint, and to
+    keep the pairs that are not over.
+    """
+    from bluesky.traffic.asas import StateBasedCD
+    asas, traf = make_asas(8, monkeypatch)
+    pairs = [[0, 1], [2, 5], [3, 4], [6, 2]]
+    set_pairs(asas, traf, pairs)
+    asas.delete([5, 6])
+
+    # Remaining traffic, with all aircraft in horizontal loss of separation
+    traf = make_traffic(6, 0)
+    log = []
+    traf.ap.route = [RecordingRoute(log)] * 6
+    asas.dist = np.zeros((6, 6))
+    StateBasedCD.ResumeNav(asas, traf)
+
+    assert asas.confidx_all.tolist() == [[0, 1], [3, 4]]
+    assert asas.conflist_all == [('AC00000', 'AC00001'), ('AC00003', 'AC00004')]
+    assert asas.confkeys_all.tolist() == [0, 2]
+    assert sorted(log) == [2]
+    assert np.flatnonzero(asas.active).tolist() == [0, 1, 3, 4]
@@ -0,0 +1,121 @@
+"""
+Tests the array-backed route store, and the flight plan calculations on it.
+"""
+import pytest
+import numpy as np
+from bluesky.tools import geo
+from bluesky.tools.aero import nm
+from bluesky.traffic.route import Route
+from bluesky.traffic.routestore import store
+
+
+def make_route(nwp, rnd):
+    """ Creates a route with nwp random waypoints, the last one possibly
+        a destination. """
+    route = Route()
+    for i in range(nwp):
+        wptype = Route.dest if i == nwp - 1 and rnd.rand() < 0.5 else Route.wpnav
+        alt = rnd.choice([-999., rnd.rand() * 10000.])
+        route.addwpt_data(False, i, 'WP%d' % i, 50. + rnd.rand(), 4. + rnd.rand(),
+                          wptype, alt, -999., True)
+    return route
+
+
+def ref_calcfp(route):
+    """ Flight plan calculations in a loop over the waypoints. """
+    nwp = len(route.wpname)
+    lat, lon, alt, wptype = list(route.wplat), list(route.wplon), \
+        list(route.wpalt), list(route.wptype)
+    dirfrom, distto = nwp * [0.], nwp * [0.]
+    ialt, toalt, xtoalt = nwp * [-1], nwp * [-999.], nwp * [1.]
+    for i in range(nwp - 1):
+        dirfrom[i], distto[i + 1] = geo.qdrdist(lat[i], lon[i], lat[i + 1], lon[i + 1])
+    if nwp > 1:
+        dirfrom[-1] = dirfrom[-2]
+    iwp, towp, xto = -1, -999., 0.
+    for i in range(nwp - 1, -1, -1):
+        if wptype[i] == Route.dest:
+            iwp, towp, xto = i, 0., 0.
+        elif alt[i] >= 0:
+            iwp, towp, xto = i, alt[i], 0.
+        elif i != nwp - 1:
+            xto += distto[i + 1] * nm
+        else:
+            xto = 0.
+        ialt[i], toalt[i], xtoalt[i] = iwp, towp, xto
+    return dict(wpdirfrom=dirfrom, wpdistto=distto, wpialt=ialt,
+                wptoalt=toalt, wpxtoalt=xtoalt)
+
+
+def test_field_list_behaviour():
+    """
+    Expects the waypoint fields of a route to behave like lists.
+    """
+    route = Route()
+    route.addwpt_data(False, 0, 'FOO', 10., -10., 0, 1000., 100., False)
+    route.addwpt_data(False, 0, 'BAZ', 20., -20., 0, 2000., 200., True)
+
+    assert route.wpname == ['BAZ', 'FOO']
+    assert route.wplat[-1] == 10.
+    assert route.wpname[:1] == ['BAZ']
+    assert list(route.wpalt) == [2000., 1000.]
+    assert 'FOO' in route.wpname and 'BAR' not in route.wpname
+    assert route.wpname.index('FOO') == 1
+    assert route.wpname.count('BAZ') == 1
+    assert np.array_equal(np.array(route.wplon), [-20., -10.])
+
+    route.wpalt[-1] = -999.
+    assert route.wpalt == [2000., -999.]
+    with pytest.raises(IndexError):
+        route.wplat[2]
+    with pytest.raises(ValueError):
+        route.wpname.index('BAR')
+
+    assert route.delwpt('BAZ') is True
+    assert route.wpname == ['FOO']
+    assert route.wpflyby == [False]
+
+    route.delrte()
+    assert route.wpname == [] and route.nwp == 0
+
+
+def test_store_growth():
+    """
+    Expects the waypoints of all routes to be kept when routes grow, are
+    deleted, and when the store is compacted.
+    """
+    rnd = np.random.RandomState(0)
+    routes = [Route() for _ in range(200)]
+    for k in range(20):
+        for j, route in enumerate(routes):
+            if rnd.rand() < 0.5:
+                route.addwpt_data(False, len(route.wpname), 'R%dW%d' % (j, k),
+                                  float(j), float(k), 0, -999., -999., True)
+    del routes[::3]
+    store.compact()
+    big = Route()
+    for k in range(2000):
+        big.addwpt_data(False, 0, 'BIG', 1., 2., 0, -999., -999., True)
+
+    assert len(big.wpname) == 2000
+    for route in routes:
+        names = route.wpname.tolist()
+        assert len(set(route.wplat)) <= 1
+        assert [int(name.split('W')[1]) for name in names] == route.wplon.tolist()
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_calcfp(seed):
+    """
+    Expects the vectorized flight plan calculations to be equal to the
+    calculations per waypoint.
+    """
+    rnd = np.random.RandomState(seed)
+    for nwp in (1, 2, 5, 30):
+        route = make_route(nwp, rnd)
+        ref = ref_calcfp(route)
+        route.calcfp()
+        assert route.nwp == nwp
+        for name, values in ref.items():
+            np.testing.assert_allclose(getattr(route, name).tolist(), values,
+                                       rtol=1e-9, atol=1e-6, err_msg=name)
@@ -0,0 +1,95 @@
+"""
+Tests the spatially indexed conflict detection (SpatialCD) against the
+dense state-based conflict detection (StateBasedCD).
+"""
+import pytest
+import numpy as np
+import bluesky as bs
+from bluesky.tools.trafficarrays import TrafficArrays
+from .cdtraffic import make_traffic
+
+
+@pytest.fixture
+def asas_pair():
+    """
+    Returns a function that creates two unregistered ASAS objects (dense and
+    spatial CD) for a given number of aircraft.
+    """
+    from bluesky.traffic.asas import ASAS
+    from bluesky.traffic.asas import StateBasedCD, SpatialCD
+
+    def make(ntraf):
+        root, TrafficArrays.root = TrafficArrays.root, None
+        dense, sparse = ASAS(), ASAS()
+        TrafficArrays.root = root
+        for asas, cd in ((dense, StateBasedCD), (sparse, SpatialCD)):
+            asas.cd = cd
+            asas.active = np.zeros(ntraf, dtype=bool)
+            asas.uid = np.arange(ntraf)
+        return dense, sparse
+
+    return make
+
+
+@pytest.mark.parametrize('ntraf,seed', [(2, 0), (50, 1), (300, 2), (600, 3)])
+def test_spatialcd_parity(asas_pair, ntraf, seed):
+    """
+    Expects the conflict pairs, conflict indices, tcpa and CPA positions of
+    the spatial CD to be equal to those of the dense CD.
+    """
+    traf = make_traffic(ntraf, seed)
+    dense, sparse = asas_pair(ntraf)
+
+    for simt in (0.0, 1.0):
+        dense.cd.detect(dense, traf, simt)
+        sparse.cd.detect(sparse, traf, simt)
+
+        assert sparse.nconf == dense.nconf
+        assert sparse.confpairs == dense.confpairs
+        assert sparse.iconf == dense.iconf
+        assert sparse.conflist_now == dense.conflist_now
+        assert sparse.LOSlist_now == dense.LOSlist_now
+        assert sparse.conflist_all == dense.conflist_all
+        assert np.array_equal(sparse.active, dense.active)
+
+        np.testing.assert_allclose(sparse.latowncpa, dense.latowncpa)
+        np.testing.assert_allclose(sparse.lonowncpa, dense.lonowncpa)
+        np.testing.assert_allclose(sparse.altowncpa, dense.altowncpa)
+
+        idx = tuple(np.array([(traf.id2idx(a), traf.id2idx(b))
+                              for a, b in dense.confpairs], dtype=int).reshape(-1, 2).T)
+        np.testing.assert_allclose(sparse.tcpa[idx], dense.tcpa[idx])
+        np.testing.assert_allclose(sparse.dist[idx], dense.dist[idx])
+        np.testing.assert_allclose(sparse.tinconf[idx], dense.tinconf[idx])
+
+
+def test_spatialcd_far_pairs(asas_pair):
+    """
+    Expects aircraft pairs outside the search range to be reported as
+    far apart and out of conflict.
+    """
+    traf = make_traffic(2, 0)
+    traf.lat[1] = traf.lat[0] + 20.0
+    _, sparse = asas_pair(2)
+    sparse.cd.detect(sparse, traf, 0.0)
+
+    assert sparse.nconf == 0
+    assert sparse.dist[0, 1] == 1e9
+    assert sparse.tinconf[0, 1] == 1e8
+
+
+def test_spatialcd_swarm(asas_pair, monkeypatch):
+    """
+    Expects SPATIAL CD to be refused in combination with SWARM CR, which
+    needs the complete conflict matrices, in either order.
+    """
+    monkeypatch.setattr(bs, 'traf', make_traffic(0, 0), raising=False)
+    asas, _ = asas_pair(0)
+    assert asas.SetCDmethod('SPATIAL') is None
+    assert asas.SetCRmethod('SWARM')[0] is False
+    assert asas.cr_name == 'OFF'
+
+    assert asas.SetCDmethod('STATEBASED') is None
+    assert asas.SetCRmethod('SWARM') is None
+    assert asas.SetCDmethod('SPATIAL')[0] is False
+    assert asas.cd_name == 'STATEBASED'
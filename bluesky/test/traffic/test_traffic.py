@@ -136,6 +136,41 @@ def test_traffic_delete(traffic_):
         ntraf - 1, 'BA1', 'A320', 10.0, 55.0, 90, 3000, 300)
 
 
+def test_traffic_id2idx(traffic_):
+    """
+    Test callsign lookup after creation and deletion.
+
+    Expects the index of each aircraft to match its position in traf.id,
+    and -1 for the deleted aircraft.
+    """
+    for idx, acid in enumerate(traffic_.id):
+        assert traffic_.id2idx(acid) == idx
+        assert traffic_.id2idx(acid.lower()) == idx
+    assert traffic_.id2idx('KL205') == -1
+    assert traffic_.id2idx(['BA1', 'KL205']) == [traffic_.ntraf - 1, -1]
+
+
+def test_traffic_cre(traffic_):
+    """
+    Test creation of a batch of aircraft, of which one has an existing
+    callsign.
+
+    Expects the other aircraft to be added, with their own type and
+    position, and an error message for the existing callsign.
+    """
+    ntraf = traffic_.ntraf
+    result = traffic_.cre(['AB1', 'AB2', 'BA1'], ['A320', 'B744', 'A320'],
+                          [1.0, 2.0, 3.0], 50.0, 90, 2000, 200)
+
+    assert not result[0]
+    assert 'BA1' in result[1]
+    validate_lengths(traffic_, ntraf + 2)
+    assert traffic_.id[-2:] == ['AB1', 'AB2']
+    assert traffic_.type[-2:] == ['A320', 'B744']
+    assert list(traffic_.lat[-2:]) == [1.0, 2.0]
+    assert traffic_.id2idx('AB2') == ntraf + 1
+
+
 def test_traffic_reset(traffic_):
     """
     Test reset command.
@@ -144,6 +179,7 @@ def test_traffic_reset(traffic_):
     """
     traffic_.reset()
     validate_lengths(traffic_, 0)
+    assert traffic_.id2idx('BA1') == -1
 
 
 # test remaining traffic functions
@@ -142,3 +142,94 @@ def test_trafficarrays_reset(t_a):
 
     assert not root.fl_list
     assert not root.children[0].np_array_bool
+
+
+def test_trafficarrays_growth(t_a):
+    """
+    Tests creation of many objects one at a time.
+
+    Expects arrays to grow within their buffer, without reallocation,
+    until the buffer capacity is reached.
+    """
+    root, _tcclass = t_a
+    root.reset()
+    child = root.children[0]
+
+    nrealloc = 0
+    for i in range(1000):
+        buf = child.ArrBuffers.get('np_array_int', (None,))[0]
+        root.create()
+        root.create_children()
+        child.np_array_int[-1] = i
+        nrealloc += child.ArrBuffers['np_array_int'][0] is not buf
+
+    assert len(child.np_array_int) == 1000
+    assert np.array_equal(child.np_array_int, np.arange(1000))
+    assert child.np_array_int.dtype == np.int64
+    assert nrealloc < 10
+
+
+def test_trafficarrays_replaced_array(t_a):
+    """
+    Tests creation after an array has been replaced by a new array.
+
+    Expects the new values to be kept, and the old array to be unaffected.
+    """
+    root, _tcclass = t_a
+    child = root.children[0]
+
+    old = child.np_array_int
+    child.np_array_int = old + 1
+    root.create()
+    root.create_children()
+
+    assert np.array_equal(child.np_array_int[:-1], np.arange(1, 1001))
+    assert child.np_array_int[-1] == 0
+    assert np.array_equal(old, np.arange(1000))
+
+
+def test_trafficarrays_delete_multiple(t_a):
+    """
+    Tests deletion of multiple objects.
+
+    Expects the order of the remaining objects to be preserved, and
+    other references to the old arrays to be unaffected.
+    """
+    root, _tcclass = t_a
+    root.reset()
+    child = root.children[0]
+    root.create(10)
+    root.create_children(10)
+    child.np_array_int[:] = np.arange(10)
+    root.int_list = list(range(10))
+    old = child.np_array_int
+
+    root.delete([0, 3, 4, 9])
+    assert np.array_equal(child.np_array_int, [1, 2, 5, 6, 7, 8])
+    assert root.int_list == [1, 2, 5, 6, 7, 8]
+    assert np.array_equal(old, np.arange(10))
+
+    root.delete(2)
+    root.create(2)
+    root.create_children(2)
+    assert np.array_equal(child.np_array_int, [1, 2, 6, 7, 8, 0, 0])
+    assert len(child.np_array_bool) == 7
+
+
+def test_trafficarrays_string_array(t_a):
+    """
+    Tests creation of objects with a string array.
+
+    Expects the array type to be promoted such that it can hold
+    strings longer than one character, as with np.append.
+    """
+    root, _tcclass = t_a
+    root.reset()
+    root.str_array = np.array([], dtype=str)
+    root.ArrVars.append('str_array')
+
+    root.create(2)
+    root.str_array[:] = 'A320'
+
+    assert list(root.str_array) == ['A320', 'A320']
+    root.ArrVars.remove('str_array')
@@ -0,0 +1,132 @@
+"""
+Tests the inverse-distance weighted wind field against the original
+interpolation, and the gridded wind field.
+"""
+import numpy as np
+from bluesky.tools.aero import ft, kts
+from bluesky.traffic.windfield import Windfield
+from bluesky.traffic.windsim import WindSim
+
+
+def make_windfield(nvec, rnd, nprof=0, field=None):
+    """ Creates a wind field with nvec random wind vectors, of which nprof
+        have an altitude profile. """
+    wind = field or Windfield()
+    for i in range(nvec):
+        lat, lon = 50. + 4. * rnd.rand(), 2. + 6. * rnd.rand()
+        if i < nprof:
+            alt = np.array([0., 10000., 30000.]) * ft
+            wind.addpoint(lat, lon, 360. * rnd.rand(3), 30. * rnd.rand(3), alt)
+        else:
+            wind.addpoint(lat, lon, 360. * rnd.rand(), 30. * rnd.rand())
+    return wind
+
+
+def ref_getdata(wind, lat, lon, alt):
+    """ Inverse-distance weighted interpolation with matrices of all wind
+        vectors and positions, as in the original Windfield.getdata. """
+    eps = 1e-20
+    npos = len(lat)
+    lat, lon = lat.reshape((1, npos)), lon.reshape((1, npos))
+    cavelat = np.cos(np.radians(0.5 * (lat + np.array([wind.lat]).T)))
+    dy = lat - np.array([wind.lat]).T
+    dx = cavelat * (lon - np.array([wind.lon]).T)
+    invd2 = 1. / (eps + dx * dx + dy * dy)
+    totals = np.repeat(np.ones((1, wind.nvec)).dot(invd2), wind.nvec, axis=0)
+    horfact = invd2 / totals
+    if wind.winddim == 2:
+        return wind.vnorth[0, :].dot(horfact), wind.veast[0, :].dot(horfact)
+    idxalt = np.maximum(0., np.minimum(wind.altaxis[-1] - eps, alt) / wind.altstep)
+    ialt = np.floor(idxalt).astype(int)
+    falt = idxalt - ialt
+    ones = np.ones((wind.nvec, 1))
+    vn0 = (wind.vnorth[ialt, :] * horfact.T).dot(ones).reshape(npos)
+    vn1 = (wind.vnorth[ialt + 1, :] * horfact.T).dot(ones).reshape(npos)
+    ve0 = (wind.veast[ialt, :] * horfact.T).dot(ones).reshape(npos)
+    ve1 = (wind.veast[ialt + 1, :] * horfact.T).dot(ones).reshape(npos)
+    return (1. - falt) * vn0 + falt * vn1, (1. - falt) * ve0 + falt * ve1
+
+
+def make_positions(n, rnd):
+    return 49. + 6. * rnd.rand(n), 1. + 8. * rnd.rand(n), 40000. * ft * rnd.rand(n)
+
+
+def test_idw():
+    """
+    Expects the interpolation of 2D and 3D fields to be equal to the original
+    interpolation, also when the cached weights are reused, and when wind
+    vectors are added or removed.
+    """
+    rnd = np.random.RandomState(0)
+    for nprof in (0, 3):
+        wind = make_windfield(20, rnd, nprof)
+        assert wind.winddim == (3 if nprof else 2)
+        lat, lon, alt = make_positions(50, rnd)
+        for step in range(4):
+            if step == 1:
+                lat[10] += 0.1
+            elif step == 2:
+                wind.addpoint(52., 5., 90., 10.)
+            elif step == 3:
+                wind.remove(4)
+            vn, ve = wind.getdata(lat, lon, alt)
+            refvn, refve = ref_getdata(wind, lat, lon, alt)
+            np.testing.assert_allclose(vn, refvn, rtol=1e-12, atol=1e-12)
+            np.testing.assert_allclose(ve, refve, rtol=1e-12, atol=1e-12)
+
+
+def test_grid():
+    """
+    Expects the gridded field to reproduce a wind field that is linear in
+    lat, lon and alt, and to use the wind at the edge outside the grid.
+    """
+    lat, lon, alt = np.linspace(50., 54., 5), np.linspace(2., 8., 7), np.linspace(0., 12000., 4)
+    A, LAT, LON = np.meshgrid(alt, lat, lon, indexing='ij')
+    wind = Windfield()
+    wind.setgrid(lat, lon, alt, 2. * LAT - LON + 1e-3 * A, LAT + 3. * LON - 2e-3 * A)
+    assert wind.winddim == 3
+
+    rnd = np.random.RandomState(1)
+    plat, plon, palt = 50. + 4. * rnd.rand(100), 2. + 6. * rnd.rand(100), 12000. * rnd.rand(100)
+    vn, ve = wind.getdata(plat, plon, palt)
+    np.testing.assert_allclose(vn, 2. * plat - plon + 1e-3 * palt, atol=1e-9)
+    np.testing.assert_allclose(ve, plat + 3. * plon - 2e-3 * palt, atol=1e-9)
+
+    vn, ve = wind.getdata(60., 0., 20000.)
+    assert np.isclose(vn, 2. * 54. - 2. + 12.) and np.isclose(ve, 54. + 6. - 24.)
+
+    # A wind vector replaces the grid, and clearing removes it
+    wind.addpoint(52., 5., 0., 10.)
+    assert wind.grid is None and wind.winddim == 1
+    wind.setgrid(lat, lon, [0.], LAT[:1] * 0. + 5., LON[:1] * 0.)
+    assert wind.winddim == 2
+    assert wind.getdata(51., 3., 5000.) == (5., 0.)
+    wind.clear()
+    assert wind.grid is None and wind.winddim == 0
+
+
+def test_loadgrid(tmp_path):
+    """
+    Expects a wind grid table in CSV and NumPy format to be loaded in the
+    order of the grid, and incomplete tables to be rejected.
+    """
+    rows = [(lat, lon, alt, 270., 20. + lat - lon + alt / 1000.)
+            for alt in (0., 10000.) for lon in (4., 5., 6.) for lat in (51., 52.)]
+    rows = np.array(rows)[np.random.RandomState(2).permutation(len(rows))]
+    np.savetxt(str(tmp_path / 'wind.csv'), rows, delimiter=',', header='lat,lon,alt,dir,spd')
+    np.save(str(tmp_path / 'wind.npy'), rows)
+
+    for fname in ('wind.csv', 'wind.npy'):
+        wind = WindSim()
+        ok, _ = wind.loadgrid(str(tmp_path / fname))
+        assert ok and wind.winddim == 3
+        vn, ve = wind.getdata(np.array([51.5, 52.]), np.array([5., 6.]),
+                              np.array([5000., 10000.]) * ft)
+        np.testing.assert_allclose(ve, [(20. + 46.5 + 5.) * kts, (20. + 46. + 10.) * kts])
+        np.testing.assert_allclose(vn, 0., atol=1e-9)
+
+    np.savetxt(str(tmp_path / 'bad.csv'), rows[1:], delimiter=',')
+    ok, _ = WindSim().loadgrid(str(tmp_path / 'bad.csv'))
+    assert not ok
+    ok, _ = WindSim().loadgrid(str(tmp_path / 'missing.csv'))
+    assert not ok
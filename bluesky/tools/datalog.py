@@ -3,17 +3,29 @@
 # ToDo: Add description in comments
 
 import os
+import atexit
 import numbers
+import threading
 from datetime import datetime
+from queue import Queue, Full
 import numpy as np
 from bluesky import settings, stack
 import bluesky as bs
 
 # Register settings defaults
-settings.set_variable_defaults(log_path='output')
+settings.set_variable_defaults(log_path='output', log_queue_size=100)
 
 logprecision = '%.8f'
 
+# Log data is written to file by a background thread. The queue holds the
+# data of at most log_queue_size log calls, data of log calls that do not
+# fit in the queue is dropped.
+writequeue = Queue(settings.log_queue_size)
+writer     = None
+
+# Lock for the counters of rows waiting to be written
+counterlock = threading.Lock()
+
 # Dict to contain the definitions of periodic loggers
 periodicloggers = dict()
 
@@ -60,17 +72,94 @@ def reset():
 
     CSVLogger.simt = 0.0
 
+    # Write all remaining log data before the files are closed
+    flush()
+
     # Close all logs and remove reference to its file object
     for key, log in allloggers.items():
         log.reset()
 
 
-def makeLogfileName(logname):
+# The writer is a daemon thread, so also write the queued log data and close
+# the logs when the process exits without a reset
+atexit.register(reset)
+
+
+def startwriter():
+    """ Start the writer thread if it is not running yet. """
+    global writer
+    if writer is None:
+        writer = threading.Thread(target=writeloop, name='datalog')
+        writer.daemon = True
+        writer.start()
+
+
+def writeloop():
+    """ Write the queued log data to file. This runs in the writer thread. """
+    while True:
+        logger, fileobj, varlist, nrows, binary = writequeue.get()
+        try:
+            logger.write(fileobj, varlist, nrows, binary)
+        except Exception as e:
+            # Keep the writer running: a dead writer would block flush()
+            print('Error writing %s: %s' % (logger.name, e))
+        finally:
+            with counterlock:
+                logger.nbacklog -= nrows
+            writequeue.task_done()
+
+
+def flush():
+    """ Wait until the writer thread has written all queued log data. """
+    writequeue.join()
+
+
+def makeLogfileName(logname, ext='log'):
     timestamp = datetime.now().strftime('%Y%m%d_%H-%M-%S')
-    fname     = "%s_%s_%s.log" % (logname, stack.get_scenname(), timestamp)
+    fname     = "%s_%s_%s.%s" % (logname, stack.get_scenname(), timestamp, ext)
     return settings.log_path + '/' + fname
 
 
+def col2arr(col):
+    """ Convert a logged variable to an array for the binary log. Scalars
+        are stored as a single element, which the reader repeats for all
+        rows of the log call. """
+    arr = np.asarray(col) if isinstance(col, (list, np.ndarray)) else np.array([col])
+    # Store text and mixed content as strings, so no pickling is needed
+    if arr.dtype.kind == 'O':
+        arr = arr.astype(str)
+    return arr
+
+
+def readbinlog(fname):
+    """ Read a binary log file, written by a logger that was switched on with
+        the BIN option, into numpy arrays.
+
+        A binary log file is a sequence of .npy arrays: the header lines, the
+        column names, and then for each log call the number of columns
+        followed by one array per column.
+
+        Returns the header lines and a dict with an array per column. Columns
+        without a name (additional variables passed to log) are named col<i>. """
+    with open(fname, 'rb') as f:
+        header  = np.load(f).tolist()
+        names   = np.load(f).tolist()
+        chunks  = []
+        fsize   = os.fstat(f.fileno()).st_size
+        while f.tell() < fsize:
+            ncols = int(np.load(f))
+            cols  = [np.load(f) for _ in range(ncols)]
+            nrows = max(len(col) for col in cols)
+            chunks.append([np.repeat(col, nrows) if len(col) < nrows else col
+                           for col in cols])
+
+    ncols = max([len(chunk) for chunk in chunks] or [len(names)])
+    names += ['col%d' % i for i in range(len(names), ncols)]
+    return header, dict((name, np.concatenate([chunk[i] for chunk in chunks])
+                                 if chunks else np.array([]))
+                        for i, name in enumerate(names))
+
+
 def col2txt(col, nrows):
     if isinstance(col, (list, np.ndarray)):
         if isinstance(col[0], numbers.Integral):
@@ -97,6 +186,12 @@ class CSVLogger:
         self.tlog        = 0.0
         self.allvars     = []
         self.selvars     = []
+        self.binary      = False
+
+        # Number of rows waiting in the write queue, and rows that were
+        # dropped because the queue was full
+        self.nbacklog    = 0
+        self.ndropped    = 0
 
         # In case this is a periodic logger: log timestep
         self.dt          = 0.0
@@ -104,7 +199,7 @@ class CSVLogger:
 
         # Register a command for this logger in the stack
         stackcmd = {name : [
-            name + ' ON/OFF,[dt] or LISTVARS or SELECTVARS var1,...,varn',
+            name + ' ON/OFF,[dt],[CSV/BIN] or LISTVARS or SELECTVARS var1,...,varn',
             '[txt,float/txt,...]', self.stackio, name+" data logging on"]
         }
         stack.append_commands(stackcmd)
@@ -156,15 +251,21 @@ class CSVLogger:
 
     def open(self, fname):
         if self.file:
+            flush()
             self.file.close()
         self.file       = open(fname, 'wb')
-        # Write the header
-        for line in self.header:
-            self.file.write(bytearray('# ' + line + '\n', 'ascii'))
         # Write the column contents
         columns = ['simt']
         for logset in self.selvars:
             columns += logset[1]
+        if self.binary:
+            # Header lines and column names are the first two arrays in the file
+            np.save(self.file, np.array(list(self.header), dtype=str))
+            np.save(self.file, np.array(columns))
+            return
+        # Write the header
+        for line in self.header:
+            self.file.write(bytearray('# ' + line + '\n', 'ascii'))
         self.file.write(bytearray('# ' + str.join(', ', columns) + '\n', 'ascii'))
 
     def isopen(self):
@@ -188,22 +289,50 @@ class CSVLogger:
                     break
             if nrows == 0:
                 return
-            # Convert (numeric) arrays to text, leave text arrays untouched
-            txtdata = [col2txt(col, nrows) for col in varlist]
 
-            # log the data to file
-            np.savetxt(self.file, np.vstack(txtdata).T, delimiter=',', newline='\n', fmt='%s')
+            # Copy the data, as the simulation continues while it is written
+            varlist = [np.array(v) if isinstance(v, np.ndarray) else
+                       list(v) if isinstance(v, list) else v for v in varlist]
+
+            # Hand the data to the writer thread
+            startwriter()
+            with counterlock:
+                self.nbacklog += nrows
+            try:
+                writequeue.put_nowait((self, self.file, varlist, nrows, self.binary))
+            except Full:
+                with counterlock:
+                    self.nbacklog -= nrows
+                    self.ndropped += nrows
+
+    def write(self, fileobj, varlist, nrows, binary):
+        ''' Write the data of one log call to file. '''
+        if binary:
+            # Append one chunk with an array per column
+            np.save(fileobj, np.array(len(varlist)))
+            for col in varlist:
+                np.save(fileobj, col2arr(col), allow_pickle=False)
+            return
+
+        # Convert (numeric) arrays to text, leave text arrays untouched
+        txtdata = [col2txt(col, nrows) for col in varlist]
+
+        # log the data to file
+        np.savetxt(fileobj, np.vstack(txtdata).T, delimiter=',', newline='\n', fmt='%s')
 
     def start(self):
         ''' Start this logger. '''
-        self.tlog = bs.sim.simt
-        self.open(makeLogfileName(self.name))
+        self.tlog     = bs.sim.simt
+        self.ndropped = 0
+        self.open(makeLogfileName(self.name, 'bin' if self.binary else 'log'))
 
     def reset(self):
         self.dt         = self.default_dt
+        self.binary     = False
         self.tlog       = 0.0
         self.selvars    = list(self.allvars)
         if self.file:
+            flush()
             self.file.close()
             self.file   = None
 
@@ -221,14 +350,18 @@ class CSVLogger:
             else:
                 text += 'a non-periodic logger.\n'
             text += self.name + ' is ' + ('ON' if self.isopen() else 'OFF') + \
-                '\nUsage: ' + self.name + ' ON/OFF,[dt] or LISTVARS or SELECTVARS var1,...,varn'
+                ', %d rows waiting to be written, %d rows dropped' % (self.nbacklog, self.ndropped) + \
+                '\nUsage: ' + self.name + ' ON/OFF,[dt],[CSV/BIN] or LISTVARS or SELECTVARS var1,...,varn'
             return True, text
         elif args[0] == 'ON':
-            if len(args) > 1:
-                if type(args[1]) is float:
-                    self.dt = args[1]
+            # Optional log interval and file format (text or binary columns)
+            for arg in args[1:]:
+                if type(arg) is float:
+                    self.dt = arg
+                elif arg in ('CSV', 'BIN'):
+                    self.binary = (arg == 'BIN')
                 else:
-                    return False, 'Turn ' + self.name + ' on with optional dt'
+                    return False, 'Turn ' + self.name + ' on with optional dt and CSV/BIN format'
             self.start()
 
         elif args[0] == 'OFF':
@@ -0,0 +1,200 @@
+""" BlueSky step profiler: cumulative and per-step timing of the subsystems
+    that are updated in each simulation step.
+
+    When the profiler is started, the update functions of the subsystems are
+    replaced by timed versions, which are removed again when the profiler is
+    stopped. When it is not running the profiler therefore has no overhead.
+    Update functions of plugins are included by name. """
+import os
+import json
+from time import perf_counter
+from datetime import datetime
+
+import bluesky as bs
+from bluesky import settings
+from bluesky.tools import plugin
+
+# Register settings defaults
+settings.set_variable_defaults(log_path='output')
+
+# The timed subsystems: name, path of the object with the update function
+# in the bluesky module, and the name of the update function. Subsystems
+# with more than one update function are listed more than once. Subsystems
+# that do not exist in this simulation are skipped.
+subsystems = [
+    ('stack',           'stack',           'process'),
+    ('traffic',         'traf',            'update'),
+    ('traf.adsb',       'traf.adsb',       'update'),
+    ('traf.ap',         'traf.ap',         'update'),
+    ('traf.asas',       'traf.asas',       'update'),
+    ('traf.pilot',      'traf.pilot',      'APorASAS'),
+    ('traf.pilot',      'traf.pilot',      'applylimits'),
+    ('traf.perf',       'traf.perf',       'update'),
+    ('traf.perf',       'traf.perf',       'perf'),
+    ('traf.kinematics', 'traf',            'UpdateAirSpeed'),
+    ('traf.kinematics', 'traf',            'UpdateGroundSpeed'),
+    ('traf.kinematics', 'traf',            'UpdatePosition'),
+    ('traf.turbulence', 'traf.turbulence', 'Woosh'),
+    ('traf.cond',       'traf.cond',       'update'),
+    ('traf.trails',     'traf.trails',     'update'),
+    ('plugins',         'tools.plugin',    'preupdate'),
+    ('plugins',         'tools.plugin',    'update'),
+    ('datalog',         'tools.datalog',   'postupdate')
+]
+
+# Timings per subsystem: name -> [number of calls, total time, max time]
+timings  = dict()
+
+# Names of the plugins of which the update functions are timed
+plugins  = []
+
+# Replaced update functions: (object, function name, original function,
+# whether the original was an attribute of the object itself)
+patched  = []
+
+# Wall time while the profiler is running
+running  = False
+tstart   = 0.0
+walltime = 0.0
+
+
+def timed(name, fun):
+    ''' Return a version of fun that adds its execution time to the timings
+        of subsystem name. '''
+    stats = timings.setdefault(name, [0, 0.0, 0.0])
+
+    def timedfun(*args, **kwargs):
+        t0 = perf_counter()
+        result = fun(*args, **kwargs)
+        dt = perf_counter() - t0
+        stats[0] += 1
+        stats[1] += dt
+        if dt > stats[2]:
+            stats[2] = dt
+        return result
+    return timedfun
+
+
+def patch(obj, funname, name):
+    ''' Replace update function funname of obj by a timed version. '''
+    fun = getattr(obj, funname, None)
+    if fun is not None:
+        patched.append((obj, funname, fun, funname in getattr(obj, '__dict__', {})))
+        setattr(obj, funname, timed(name, fun))
+
+
+def start():
+    ''' Reset the timings, and start timing the subsystems. '''
+    global running, tstart, walltime
+    stop()
+    timings.clear()
+    walltime = 0.0
+    for name, path, funname in subsystems:
+        obj = bs
+        for attr in path.split('.'):
+            obj = getattr(obj, attr, None)
+        if obj is not None:
+            patch(obj, funname, name)
+    for name in plugins:
+        patchplugin(name)
+    running = True
+    tstart  = perf_counter()
+
+
+def patchplugin(name):
+    ''' Time the (pre)update functions of plugin name. '''
+    if hasattr(plugin, 'update_funs'):
+        for funs in (plugin.preupdate_funs, plugin.update_funs):
+            fun = funs.get(name)
+            if fun:
+                patched.append((fun, 2, fun[2], True))
+                fun[2] = timed('plugin.' + name.lower(), fun[2])
+
+
+def stop():
+    ''' Stop timing, and restore the original update functions. '''
+    global running, walltime
+    if running:
+        walltime += perf_counter() - tstart
+        running = False
+    while patched:
+        obj, funname, fun, own = patched.pop()
+        if isinstance(obj, list):
+            obj[funname] = fun
+        elif own:
+            setattr(obj, funname, fun)
+        else:
+            # Remove the timed version to uncover the method of the class
+            delattr(obj, funname)
+
+
+def getnsteps():
+    ''' Return the number of profiled simulation steps, which is the number
+        of traffic updates. '''
+    return timings.get('traffic', [0])[0]
+
+
+def results():
+    ''' Return the timings as a list of dicts, one per subsystem. '''
+    steps = max(1, getnsteps())
+    return [dict(name=name, calls=stats[0], total=stats[1],
+                 perstep=stats[1] / steps, max=stats[2])
+            for name, stats in timings.items()]
+
+
+def table():
+    ''' Return the timings as a text table. '''
+    total  = walltime + (perf_counter() - tstart if running else 0.0)
+    lines  = ['%d steps in %.3f s' % (getnsteps(), total),
+              '%-18s%8s%11s%14s%11s' % ('subsystem', 'calls', 'total [s]',
+                                        'per step [ms]', 'max [ms]')]
+    for res in results():
+        lines.append('%-18s%8d%11.3f%14.3f%11.3f' % (res['name'], res['calls'],
+                     res['total'], 1e3 * res['perstep'], 1e3 * res['max']))
+    return '\n'.join(lines)
+
+
+def dump(fname):
+    ''' Write the timings to file fname. Files with extension .json are
+        written as JSON, all others as CSV. '''
+    if not os.path.dirname(fname):
+        if not os.path.isdir(settings.log_path):
+            os.makedirs(settings.log_path)
+        fname = os.path.join(settings.log_path, fname)
+    res = results()
+    with open(fname, 'w') as f:
+        if os.path.splitext(fname)[1].lower() == '.json':
+            json.dump(dict(date=datetime.now().isoformat(),
+                           steps=getnsteps(),
+                           subsystems=res), f, indent=2)
+        else:
+            f.write('# subsystem, calls, total [s], per step [s], max [s]\n')
+            for r in res:
+                f.write('%s,%d,%.6f,%.6f,%.6f\n' % (r['name'], r['calls'],
+                        r['total'], r['perstep'], r['max']))
+    return fname
+
+
+def profile(cmd='', arg=''):
+    ''' Stack function of the PROFILE command. '''
+    if cmd == 'START':
+        start()
+        return True, 'Profiler started'
+    elif cmd == 'STOP':
+        stop()
+        return True, table()
+    elif cmd == 'DUMP':
+        if arg:
+            return True, table() + '\nTimings written to ' + dump(arg)
+        return True, table()
+    elif cmd == 'PLUGIN':
+        name = arg.upper()
+        if not name:
+            return True, 'Profiled plugins: ' + (', '.join(plugins) or 'none')
+        if name not in plugins:
+            plugins.append(name)
+            if running:
+                patchplugin(name)
+        return True, 'Profiling update functions of plugin ' + name
+    return True, 'Profiler is ' + ('ON' if running else 'OFF') + \
+        '\nUsage: PROFILE START/STOP/DUMP [fname.csv/fname.json]/PLUGIN [name]'
@@ -5,6 +5,25 @@ import collections
 import numpy as np
 
 defaults = {"float": 0.0, "int": 0, "bool": False, "S": "", "str": ""}
+kinds    = {"f": "float", "i": "int", "b": "bool"}
+
+# Minimum number of elements allocated for an array buffer
+mincapacity = 16
+
+# Maximum number of kept ranges for which delete copies slices one by one,
+# above this number the ranges are concatenated in one call
+maxsegments = 16
+
+
+def keptranges(n, idx):
+    """ Return the (start, end) ranges of the elements that remain when the
+        elements idx are deleted from an array of length n. """
+    dels = sorted(set(i + n if i < 0 else i for i in np.atleast_1d(idx).tolist()))
+    if dels and (dels[0] < 0 or dels[-1] >= n):
+        raise IndexError('index out of bounds for %d elements' % n)
+    starts = [0] + [i + 1 for i in dels]
+    ends   = dels + [n]
+    return [(start, end) for start, end in zip(starts, ends) if end > start]
 
 
 class RegisterElementParameters():
@@ -25,7 +44,15 @@ class RegisterElementParameters():
 class TrafficArrays(object):
     """ Parent class to use separate arrays and lists to allow
         vectorizing but still maintain and object like benefits
-        for creation and deletion of an element for all paramters"""
+        for creation and deletion of an element for all paramters
+
+        Registered arrays are views on the first n elements of a larger
+        buffer, which grows by doubling its capacity. Creating aircraft
+        therefore only writes the new elements, instead of copying all
+        arrays. Buffer contents that are visible in a handed-out view are
+        never overwritten: when an array has been replaced (e.g.,
+        self.lat = self.lat + dlat), or when aircraft are deleted, the data
+        is copied to a new buffer."""
 
     # The TrafficArrays class keeps track of all of the constructed
     # TrafficArray objects
@@ -46,6 +73,9 @@ class TrafficArrays(object):
         self.LstVars  = []
         self.Vars     = self.__dict__
 
+        # Backing buffers of the arrays: {name: (buffer, view)}
+        self.ArrBuffers = dict()
+
     def reparent(self, newparent):
         # Remove myself from the parent list of children, and add to new parent
         self.parent.children.pop(self.parent.children.index(self))
@@ -80,20 +110,24 @@ class TrafficArrays(object):
             self.Vars[v].extend(defaultvalue)
 
         for v in self.ArrVars:  # Numpy array
-            # Get type without byte length
-            fulltype = str(self.Vars[v].dtype)
-            vartype = ""
-            for c in fulltype:
-                if not c.isdigit():
-                    vartype = vartype + c
-
-            # Get default value
-            if vartype in defaults:
-                defaultvalue = [defaults[vartype]] * n
-            else:
-                defaultvalue = [0.0] * n
-
-            self.Vars[v] = np.append(self.Vars[v], defaultvalue)
+            # Get default value from the type without byte length
+            arr = self.Vars[v]
+            defaultvalue = defaults.get(kinds.get(arr.dtype.kind), 0.0)
+
+            # Grow the array in its buffer, or move to a new buffer when the
+            # buffer is full or the array is no longer the view on it
+            buf, view = self.ArrBuffers.get(v, (None, None))
+            nold, nnew = len(arr), len(arr) + n
+            if arr is not view or nnew > len(buf):
+                # As with np.append, the type is promoted to hold the default
+                # value (e.g., empty string arrays become <U32)
+                dtype = np.result_type(arr.dtype, np.array(defaultvalue).dtype)
+                buf = np.empty(max(2 * nnew, mincapacity), dtype=dtype)
+                buf[:nold] = arr
+
+            buf[nold:nnew] = defaultvalue
+            self.Vars[v] = view = buf[:nnew]
+            self.ArrBuffers[v] = (buf, view)
 
     def create_children(self, n=1):
         for child in self.children:
@@ -105,8 +139,29 @@ class TrafficArrays(object):
         for child in self.children:
             child.delete(idx)
 
+        # Compact the remaining elements into a new buffer of the same
+        # capacity, so that following creates don't need to reallocate
+        ranges = dict()
         for v in self.ArrVars:
-            self.Vars[v] = np.delete(self.Vars[v], idx)
+            arr = self.Vars[v]
+            if len(arr) not in ranges:
+                ranges[len(arr)] = keptranges(len(arr), idx)
+            kept = ranges[len(arr)]
+            nnew = sum(end - start for start, end in kept)
+
+            buf  = self.ArrBuffers.get(v, (arr,))[0]
+            buf  = np.empty(max(len(buf), nnew, mincapacity), dtype=arr.dtype)
+            if len(kept) <= maxsegments:
+                pos = 0
+                for start, end in kept:
+                    buf[pos:pos + end - start] = arr[start:end]
+                    pos += end - start
+            else:
+                np.concatenate([arr[start:end] for start, end in kept],
+                               out=buf[:nnew])
+
+            self.Vars[v] = view = buf[:nnew]
+            self.ArrBuffers[v] = (buf, view)
 
         if self.LstVars:
             if isinstance(idx, collections.abc.Collection):
@@ -125,5 +180,7 @@ class TrafficArrays(object):
         for v in self.ArrVars:
             self.Vars[v] = np.array([], dtype=self.Vars[v].dtype)
 
+        self.ArrBuffers.clear()
+
         for v in self.LstVars:
             self.Vars[v] = []
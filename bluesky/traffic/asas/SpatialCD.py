@@ -0,0 +1,250 @@
+"""
+State-based conflict detection with a spatial prefilter.
+
+Instead of computing the closest point of approach for all N x N aircraft
+combinations, candidate pairs are first selected with a KD-tree on position
+and altitude. The search radius is the protected zone swept over the
+lookahead time with the maximum relative speed in the traffic, so no pair
+that can get into conflict within the lookahead time is missed. The CPA
+geometry is only evaluated for these candidate pairs.
+
+The conflict lists are filled in the same way as by StateBasedCD. Pair data
+(qdr, dist, tcpa, tinconf, etc.) is stored as PairMatrix objects, which can
+be indexed as asas.tcpa[i, j] like the dense matrices of StateBasedCD.
+CR methods that need complete matrices (SWARM) can therefore not be used
+with SPATIAL, which ASAS refuses.
+"""
+import numpy as np
+from bluesky.tools.aero import nm
+from bluesky.tools.geo import rwgs84
+from . import StateBasedCD
+
+# Try to import the KD-tree from scipy
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+# Pair data is sparse: no complete ntraf x ntraf matrices (asas.dx, ...)
+densematrices = False
+
+
+def loaded_scipy():
+    ''' Return true if scipy.spatial is available '''
+    return cKDTree is not None
+
+
+# Polar radius of the earth, used to get a conservative angular search radius
+Rpolar = 6356752.314245  # [m]
+
+
+class PairMatrix(object):
+    """ Sparse ntraf x ntraf matrix with values for a sorted set of aircraft
+        pairs. Can be indexed with [i, j], where i and j are indices or index
+        arrays. Pairs that are not stored return the fill value. """
+
+    def __init__(self, ntraf, iown, ioth, values, fill=0.0):
+        self.shape  = (ntraf, ntraf)
+        self.keys   = iown * ntraf + ioth
+        self.values = values
+        self.fill   = fill
+
+    def __getitem__(self, idx):
+        key = np.asarray(idx[0]) * self.shape[1] + np.asarray(idx[1])
+        if len(self.keys) == 0:
+            return np.full(key.shape, self.fill)[()]
+
+        pos   = np.minimum(np.searchsorted(self.keys, key), len(self.keys) - 1)
+        found = self.keys[pos] == key
+        return np.where(found, self.values[pos], self.fill)[()]
+
+    def todense(self):
+        """ Return the values as a dense (ntraf x ntraf) array. """
+        dense = np.full(self.shape, self.fill)
+        dense.flat[self.keys] = self.values
+        return dense
+
+
+def qdrdist_pairs(lat1, lon1, lat2, lon2):
+    """ Bearing [deg] and distance [nm] for vectors of position pairs.
+        Uses the same earth radius convention as geo.qdrdist_matrix, so
+        that the results are equal to those of StateBasedCD. """
+    a = 6378137.0
+    r = np.where(lat1 * lat2 < 0.0,
+                 0.5 * (np.abs(lat1) * (rwgs84(lat1) + a) +
+                        np.abs(lat2) * (rwgs84(lat2) + a)) /
+                 np.maximum(np.abs(lat1) + np.abs(lat2), 1e-6),
+                 rwgs84(lat1 + lat2))
+
+    lat1r, lat2r = np.radians(lat1), np.radians(lat2)
+    dlon = np.radians(lon2 - lon1)
+    sin1 = np.sin(0.5 * np.radians(lat2 - lat1))
+    sin2 = np.sin(0.5 * dlon)
+    coslat1, coslat2 = np.cos(lat1r), np.cos(lat2r)
+
+    root = sin1 * sin1 + coslat1 * coslat2 * sin2 * sin2
+    dist = r / nm * 2.0 * np.arctan2(np.sqrt(root), np.sqrt(1.0 - root))
+
+    qdr = np.degrees(np.arctan2(np.sin(dlon) * coslat2,
+                                coslat1 * np.sin(lat2r) -
+                                np.sin(lat1r) * coslat2 * np.cos(dlon)))
+    return qdr, dist
+
+
+def candidates(asas, traf, adsbalt):
+    """ Return the sorted index arrays (iown, ioth) of all aircraft pairs that
+        can be in conflict within the lookahead time. """
+    # Largest relative velocities in the traffic
+    vhmax = np.max(traf.gs) + np.max(traf.adsb.gs)
+    vvmax = np.max(np.abs(traf.vs)) + np.max(np.abs(traf.adsb.vs))
+
+    # Horizontal and vertical search ranges: the protected zone swept over
+    # the lookahead time, plus margins for ADS-B perception errors
+    hrange = asas.R + vhmax * asas.dtlookahead + 1.0
+    vrange = asas.dh + vvmax * asas.dtlookahead + \
+        2.0 * np.max(np.abs(traf.alt - adsbalt)) + 1.0
+    if traf.adsb.transnoise:
+        hrange += 5.0 * traf.adsb.transerror[1]
+
+    # Search radius as chord length on the unit sphere. Altitude is scaled
+    # such that the vertical range maps on the same distance, and pairs are
+    # searched in a box (maximum norm) which encloses both ranges.
+    chord    = 2.0 * np.sin(min(0.5 * np.pi, 0.5 * hrange / Rpolar))
+    altscale = chord / vrange
+
+    tree_own = cKDTree(unitsphere(traf.lat, traf.lon, traf.alt * altscale))
+    tree_oth = cKDTree(unitsphere(traf.adsb.lat, traf.adsb.lon, adsbalt * altscale))
+    pairs = tree_own.sparse_distance_matrix(tree_oth, chord, p=np.inf,
+                                            output_type='ndarray')
+
+    iown, ioth = pairs['i'].astype(int), pairs['j'].astype(int)
+    keep  = iown != ioth
+    iown, ioth = iown[keep], ioth[keep]
+    order = np.argsort(iown * traf.ntraf + ioth)
+    return iown[order], ioth[order]
+
+
+def unitsphere(lat, lon, h):
+    """ Stack unit sphere coordinates of lat/lon [deg] with a fourth
+        coordinate h. """
+    latr, lonr = np.radians(lat), np.radians(lon)
+    coslat = np.cos(latr)
+    return np.column_stack((coslat * np.cos(lonr), coslat * np.sin(lonr),
+                            np.sin(latr), h))
+
+
+def detect(asas, traf, simt):
+    if not asas.swasas:
+        return
+
+    # Reset lists before new CD
+    asas.iconf        = [[] for ac in range(traf.ntraf)]
+    asas.nconf        = 0
+    asas.confpairs    = []
+    asas.latowncpa    = []
+    asas.lonowncpa    = []
+    asas.altowncpa    = []
+
+    asas.LOSlist_now  = []
+    asas.conflist_now = []
+
+    if traf.ntraf == 0:
+        return
+
+    ntraf = traf.ntraf
+
+    # Perceived altitude of the other aircraft
+    adsbalt = traf.adsb.alt
+    if traf.adsb.transnoise:
+        # error in the determined altitude of other a/c
+        adsbalt = adsbalt + np.random.normal(0, traf.adsb.transerror[2], ntraf)
+
+    # Candidate pairs: i is ownship, j is intruder
+    i, j = candidates(asas, traf, adsbalt)
+
+    # Horizontal conflict ---------------------------------------------------------
+
+    # qdr from i to j, from perception of ADSB and own coordinates
+    qdr, dist = qdrdist_pairs(traf.lat[i], traf.lon[i],
+                              traf.adsb.lat[j], traf.adsb.lon[j])
+    dist = dist * nm
+
+    # Transmission noise
+    if traf.adsb.transnoise:
+        # error in the determined bearing and distance between two a/c
+        qdr  = qdr + np.random.normal(0, traf.adsb.transerror[0], qdr.shape)
+        dist = dist + np.random.normal(0, traf.adsb.transerror[1], dist.shape)
+
+    # Calculate horizontal closest point of approach (CPA)
+    qdrrad = np.radians(qdr)
+    dx = dist * np.sin(qdrrad)  # is pos j rel to i
+    dy = dist * np.cos(qdrrad)  # is pos j rel to i
+
+    trkrad = np.radians(traf.trk)
+    asas.u = traf.gs * np.sin(trkrad).reshape((1, ntraf))  # m/s
+    asas.v = traf.gs * np.cos(trkrad).reshape((1, ntraf))  # m/s
+
+    # parameters received through ADSB
+    adsbtrkrad = np.radians(traf.adsb.trk)
+    adsbu = traf.adsb.gs * np.sin(adsbtrkrad)  # m/s
+    adsbv = traf.adsb.gs * np.cos(adsbtrkrad)  # m/s
+
+    du = asas.u[0, j] - adsbu[i]  # Speed du[i,j] is perceived eastern speed of i to j
+    dv = asas.v[0, j] - adsbv[i]  # Speed dv[i,j] is perceived northern speed of i to j
+
+    dv2 = du * du + dv * dv
+    dv2 = np.where(np.abs(dv2) < 1e-6, 1e-6, dv2)  # limit lower absolute value
+
+    vrel = np.sqrt(dv2)
+
+    tcpa = -(du * dx + dv * dy) / dv2
+
+    # Calculate distance^2 at CPA (minimum distance^2)
+    dcpa2 = dist * dist - tcpa * tcpa * dv2
+
+    # Check for horizontal conflict
+    R2 = asas.R * asas.R
+    swhorconf = dcpa2 < R2  # conflict or not
+
+    # Calculate times of entering and leaving horizontal conflict
+    dxinhor = np.sqrt(np.maximum(0., R2 - dcpa2))  # half the distance travelled inzide zone
+    dtinhor = dxinhor / vrel
+
+    tinhor  = np.where(swhorconf, tcpa - dtinhor, 1e8)  # Set very large if no conf
+    touthor = np.where(swhorconf, tcpa + dtinhor, -1e8)  # set very large if no conf
+
+    # Vertical conflict -----------------------------------------------------------
+
+    # Vertical crossing of disk (-dh,+dh)
+    dalt = traf.alt[j] - adsbalt[i]
+    dvs  = traf.vs[j] - traf.adsb.vs[i]
+
+    # Check for passing through each others zone
+    dvs = np.where(np.abs(dvs) < 1e-6, 1e-6, dvs)  # prevent division by zero
+    tcrosshi = (dalt + asas.dh) / -dvs
+    tcrosslo = (dalt - asas.dh) / -dvs
+
+    tinver  = np.minimum(tcrosshi, tcrosslo)
+    toutver = np.maximum(tcrosshi, tcrosslo)
+
+    # Combine vertical and horizontal conflict-------------------------------------
+    tinconf  = np.maximum(tinver, tinhor)
+    toutconf = np.minimum(toutver, touthor)
+
+    swconfl = swhorconf * (tinconf <= toutconf) * \
+        (toutconf > 0.) * (tinconf < asas.dtlookahead)
+
+    # Store pair data, pairs outside the search range are far apart
+    asas.qdr      = PairMatrix(ntraf, i, j, qdr, 0.0)
+    asas.dist     = PairMatrix(ntraf, i, j, dist, 1e9)
+    asas.dx       = PairMatrix(ntraf, i, j, dx, 0.0)
+    asas.dy       = PairMatrix(ntraf, i, j, dy, 1e9)
+    asas.dalt     = PairMatrix(ntraf, i, j, dalt, 1e9)
+    asas.tcpa     = PairMatrix(ntraf, i, j, tcpa, 1e9)
+    asas.tinconf  = PairMatrix(ntraf, i, j, tinconf, 1e8)
+    asas.toutconf = PairMatrix(ntraf, i, j, toutconf, -1e8)
+
+    # ----------------------------------------------------------------------
+    # Update conflict lists
+    # ----------------------------------------------------------------------
+    StateBasedCD.storeconflicts(asas, traf, simt, i[swconfl], j[swconfl])
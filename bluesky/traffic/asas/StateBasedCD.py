@@ -130,93 +130,126 @@ def detect(asas, traf, simt):
     # Calculate CPA positions of traffic in lat/lon?
 
     # Select conflicting pairs: each a/c gets their own record
-    confidxs            = np.where(swconfl)
-    iown                = confidxs[0]
-    ioth                = confidxs[1]
+    iown, ioth = np.where(swconfl)
 
-    # Store result
-    asas.nconf        = len(confidxs[0])
-
-    for idx in range(asas.nconf):
-        i = iown[idx]
-        j = ioth[idx]
-        if i == j:
-            continue
-
-        asas.iconf[i].append(idx)
-        asas.confpairs.append((traf.id[i], traf.id[j]))
-
-        rng        = asas.tcpa[i, j] * traf.gs[i] / nm
-        lato, lono = geo.qdrpos(traf.lat[i], traf.lon[i], traf.trk[i], rng)
-        alto       = traf.alt[i] + asas.tcpa[i, j] * traf.vs[i]
-
-        asas.latowncpa.append(lato)
-        asas.lonowncpa.append(lono)
-        asas.altowncpa.append(alto)
-
-        dx = (traf.lat[i] - traf.lat[j]) * 111319.
-        dy = (traf.lon[i] - traf.lon[j]) * 111319.
-
-        hdist = asas.dist[i,j]
-        hLOS   = hdist < asas.R
-        vdist  = abs(traf.alt[i] - traf.alt[j])
-        vLOS   = vdist < asas.dh
-        LOS    = (hLOS & vLOS)
-
-        # Add to Conflict and LOSlist, to count total conflicts and LOS
+    # Update the conflict database and decide on resuming navigation
+    storeconflicts(asas, traf, simt, iown, ioth)
 
-        # NB: if only one A/C detects a conflict, it is also added to these lists
-        combi = str(traf.id[i]) + " " + str(traf.id[j])
-        combi2 = str(traf.id[j]) + " " + str(traf.id[i])
 
-        experimenttime = simt > 2100 and simt < 5700  # These parameters may be
-        # changed to count only conflicts within a given expirement time window
+def storeconflicts(asas, traf, simt, iown, ioth):
+    """ Store the conflicting pairs (iown[k], ioth[k]) found by a CD method
+        in the conflict and LOS lists of asas. Pair data is read from
+        asas.tcpa and asas.dist, indexed as [i, j]. """
+    # Skip pairs of an aircraft with itself
+    iown, ioth = np.asarray(iown, dtype=int), np.asarray(ioth, dtype=int)
+    noself     = iown != ioth
+    iown, ioth = iown[noself], ioth[noself]
 
-        if combi not in asas.conflist_all and combi2 not in asas.conflist_all:
-            asas.conflist_all.append(combi)
-
-        if combi not in asas.conflist_exp and combi2 not in asas.conflist_exp and experimenttime:
-            asas.conflist_exp.append(combi)
-
-        if combi not in asas.conflist_now and combi2 not in asas.conflist_now:
-            asas.conflist_now.append(combi)
-
-        if LOS:
-            if combi not in asas.LOSlist_all and combi2 not in asas.LOSlist_all:
-                asas.LOSlist_all.append(combi)
-                asas.LOSmaxsev.append(0.)
-                asas.LOShmaxsev.append(0.)
-                asas.LOSvmaxsev.append(0.)
+    # Store result
+    asas.nconf     = len(iown)
+    asas.confpairs = [(traf.id[i], traf.id[j]) for i, j in zip(iown, ioth)]
+
+    # Per aircraft the indices of its conflicts in confpairs
+    order  = np.argsort(iown, kind='stable')
+    bounds = np.searchsorted(iown[order], np.arange(traf.ntraf + 1))
+    asas.iconf = [order[bounds[i]:bounds[i + 1]].tolist() for i in range(traf.ntraf)]
+
+    # Calculate CPA positions of ownship
+    tcpa = asas.tcpa[iown, ioth]
+    asas.latowncpa, asas.lonowncpa = geo.qdrpos(traf.lat[iown], traf.lon[iown],
+                                                traf.trk[iown], tcpa * traf.gs[iown] / nm)
+    asas.altowncpa = traf.alt[iown] + tcpa * traf.vs[iown]
+
+    # Loss of separation and its severity
+    hdist = asas.dist[iown, ioth]
+    vdist = np.abs(traf.alt[iown] - traf.alt[ioth])
+    LOS   = (hdist < asas.R) & (vdist < asas.dh)
+    Ih    = 1.0 - hdist / asas.R
+    Iv    = 1.0 - vdist / asas.dh
+
+    # Add to Conflict and LOSlist, to count total conflicts and LOS
+    # Pairs are keyed by the unique numbers of both aircraft. The lists contain
+    # each combination of two aircraft once, in the order of first detection.
+    # NB: if only one A/C detects a conflict, it is also added to these lists
+    key  = pairkey(asas.uid[iown], asas.uid[ioth])
+    ukey = unordered(key)
+
+    # These parameters may be changed to count only conflicts within a given
+    # experiment time window
+    experimenttime = simt > 2100 and simt < 5700
+
+    def combis(idx):
+        return [traf.id[iown[k]] + " " + traf.id[ioth[k]] for k in idx]
+
+    # Current conflicts and LOS
+    confnow = firstunique(ukey)
+    asas.conflist_now = combis(confnow)
+    losnow  = firstunique(ukey, LOS)
+    asas.LOSlist_now  = combis(losnow)
+
+    # Conflicts and LOS over the whole simulation
+    confnew = confnow[~np.isin(ukey[confnow], unordered(asas.confkeys_all))]
+    asas.conflist_all.extend(combis(confnew))
+    asas.confkeys_all = np.append(asas.confkeys_all, key[confnew])
+    asas.confidx_all  = np.append(asas.confidx_all,
+                                  np.column_stack((iown[confnew], ioth[confnew])), axis=0)
+
+    losnew  = losnow[~np.isin(ukey[losnow], unordered(asas.loskeys_all))]
+    asas.LOSlist_all.extend(combis(losnew))
+    asas.loskeys_all = np.append(asas.loskeys_all, key[losnew])
+    asas.LOSmaxsev   = np.append(asas.LOSmaxsev, np.zeros(len(losnew)))
+    asas.LOShmaxsev  = np.append(asas.LOShmaxsev, np.zeros(len(losnew)))
+    asas.LOSvmaxsev  = np.append(asas.LOSvmaxsev, np.zeros(len(losnew)))
+
+    # Conflicts and LOS within the experiment time window
+    if experimenttime:
+        confnew = confnow[~np.isin(ukey[confnow], unordered(asas.confkeys_exp))]
+        asas.conflist_exp.extend(combis(confnew))
+        asas.confkeys_exp = np.append(asas.confkeys_exp, key[confnew])
+
+        losnew = losnow[~np.isin(ukey[losnow], unordered(asas.loskeys_exp))]
+        asas.LOSlist_exp.extend(combis(losnew))
+        asas.loskeys_exp = np.append(asas.loskeys_exp, key[losnew])
+
+    # Now, we measure intrusion and store it if it is the most severe.
+    # Only pairs in the same order as in LOSlist_all are taken into account.
+    if len(asas.loskeys_all) > 0:
+        ilos   = np.where(LOS)[0]
+        sorter = np.argsort(asas.loskeys_all)
+        pos    = np.searchsorted(asas.loskeys_all, key[ilos], sorter=sorter)
+        pos    = sorter[np.minimum(pos, len(sorter) - 1)]
+        found  = asas.loskeys_all[pos] == key[ilos]
+        ilos, pos = ilos[found], pos[found]
+
+        severity  = np.minimum(Ih[ilos], Iv[ilos])
+        worse     = severity > asas.LOSmaxsev[pos]
+        ilos, pos = ilos[worse], pos[worse]
+        asas.LOSmaxsev[pos]  = severity[worse]
+        asas.LOShmaxsev[pos] = Ih[ilos]
+        asas.LOSvmaxsev[pos] = Iv[ilos]
 
-            if combi not in asas.LOSlist_exp and combi2 not in asas.LOSlist_exp and experimenttime:
-                asas.LOSlist_exp.append(combi)
+    # Calculate whether ASAS or A/P commands should be followed
+    ResumeNav(asas, traf)
 
-            if combi not in asas.LOSlist_now and combi2 not in asas.LOSlist_now:
-                asas.LOSlist_now.append(combi)
 
-            # Now, we measure intrusion and store it if it is the most severe
-            Ih = 1.0 - hdist / asas.R
-            Iv = 1.0 - vdist / asas.dh
-            severity = min(Ih, Iv)
+def pairkey(uid1, uid2):
+    """ Integer key of (ordered) aircraft pairs, from the unique
+        numbers (asas.uid) of both aircraft. """
+    return (np.asarray(uid1, dtype=np.int64) << 32) + np.asarray(uid2, dtype=np.int64)
 
-            try:  # Only continue if combi is found in LOSlist (and not combi2)
-                idx = asas.LOSlist_all.index(combi)
-            except:
-                idx = -1
 
-            if idx >= 0:
-                if severity > asas.LOSmaxsev[idx]:
-                    asas.LOSmaxsev[idx]  = severity
-                    asas.LOShmaxsev[idx] = Ih
-                    asas.LOSvmaxsev[idx] = Iv
+def unordered(key):
+    """ Key of the unordered pair, i.e. the same for (ac1, ac2) and (ac2, ac1). """
+    uid1, uid2 = key >> 32, key & 0xffffffff
+    return pairkey(np.minimum(uid1, uid2), np.maximum(uid1, uid2))
 
-    # Convert to numpy arrays for vectorisation
-    asas.latowncpa = np.array(asas.latowncpa)
-    asas.lonowncpa = np.array(asas.lonowncpa)
-    asas.altowncpa = np.array(asas.altowncpa)
 
-    # Calculate whether ASAS or A/P commands should be followed
-    ResumeNav(asas, traf)
+def firstunique(keys, select=None):
+    """ Return the indices of the first occurrence of each key, in order of
+        occurrence. When given, only keys where select is True are used. """
+    idx = np.arange(len(keys)) if select is None else np.where(select)[0]
+    _, first = np.unique(keys[idx], return_index=True)
+    return idx[np.sort(first)]
 
 
 def ResumeNav(asas, traf):
@@ -226,77 +259,61 @@ def ResumeNav(asas, traf):
     asas.active.fill(False)
 
     # Look at all conflicts, also the ones that are solved but CPA is yet to come
-    for conflict in list(asas.conflist_all):
-        ac1, ac2 = conflict.split(" ")
-        id1, id2 = traf.id2idx(ac1), traf.id2idx(ac2)
-        if id1 >= 0 and id2 >= 0:
-            # Check if conflict is past CPA
-            d = np.array([traf.lon[id2] - traf.lon[id1], traf.lat[id2] - traf.lat[id1]])
-
-            # write velocities as vectors
-            v1 = np.array([traf.gseast[id1], traf.gsnorth[id1]])
-            v2 = np.array([traf.gseast[id2], traf.gsnorth[id2]])
-
-            # Compute pastCPA
-            pastCPA = np.dot(d,v2-v1)>0.
-
-            # hLOS:
-            # Aircraft should continue to resolve until there is no horizontal
-            # LOS. This is particularly relevant when vertical resolutions
-            # are used.
-            hdist = asas.dist[id1,id2]
-            hLOS   = hdist < asas.R
-
-            # Bouncing conflicts:
-            # If two aircraft are getting in and out of conflict continously,
-            # then they it is a bouncing conflict. ASAS should stay active until
-            # the bouncing stops.
-            bouncingConflict = (abs(traf.trk[id1] - traf.trk[id2]) < 30.) & (hdist<asas.Rm**2)
-
-            # Decide if conflict is over or not.
-            # If not over, turn active to true.
-            # If over, then initiate recovery
-            if not pastCPA or hLOS or bouncingConflict:
-                # Aircraft haven't passed their CPA: must follow their ASAS
-                asas.active[id1] = True
-                asas.active[id2] = True
-
-            else:
-                # Waypoint recovery after conflict
-                # Find the next active waypoint and send the aircraft to that
-                # waypoint.
-                iwpid1 = traf.ap.route[id1].findact(id1)
-                if iwpid1 != -1: # To avoid problems if there are no waypoints
-                    traf.ap.route[id1].direct(id1, traf.ap.route[id1].wpname[iwpid1])
-                iwpid2 = traf.ap.route[id2].findact(id2)
-                if iwpid2 != -1: # To avoid problems if there are no waypoints
-                    traf.ap.route[id2].direct(id2, traf.ap.route[id2].wpname[iwpid2])
-
-                # If conflict is solved, remove it from conflist_all list
-                # This is so that if a conflict between this pair of aircraft
-                # occurs again, then that new conflict should be detected, logged
-                # and solved (if reso is on)
-                asas.conflist_all.remove(conflict)
-
-        # If aircraft id1 cannot be found in traffic because it has finished its
-        # flight (and has been deleted), start trajectory recovery for aircraft id2
-        # And remove the conflict from the conflict_all list
-        elif id1 < 0 and id2 >= 0:
-             iwpid2 = traf.ap.route[id2].findact(id2)
-             if iwpid2 != -1: # To avoid problems if there are no waypoints
-                 traf.ap.route[id2].direct(id2, traf.ap.route[id2].wpname[iwpid2])
-             asas.conflist_all.remove(conflict)
-
-        # If aircraft id2 cannot be found in traffic because it has finished its
-        # flight (and has been deleted) start trajectory recovery for aircraft id1
-        # And remove the conflict from the conflict_all list
-        elif id2 < 0 and id1 >= 0:
-            iwpid1 = traf.ap.route[id1].findact(id1)
-            if iwpid1 != -1: # To avoid problems if there are no waypoints
-                traf.ap.route[id1].direct(id1, traf.ap.route[id1].wpname[iwpid1])
-            asas.conflist_all.remove(conflict)
-
-        # if both ids are unknown, then delete this conflict, because both aircraft
-        # have completed their flights (and have been deleted)
-        else:
-            asas.conflist_all.remove(conflict)
+    # Aircraft indices of deleted aircraft are -1 in the conflict pair table
+    id1, id2 = asas.confidx_all[:, 0], asas.confidx_all[:, 1]
+    both     = (id1 >= 0) & (id2 >= 0)
+    i1, i2   = id1[both], id2[both]
+
+    # Check if conflict is past CPA
+    dlon = traf.lon[i2] - traf.lon[i1]
+    dlat = traf.lat[i2] - traf.lat[i1]
+    pastCPA = dlon * (traf.gseast[i2] - traf.gseast[i1]) + \
+        dlat * (traf.gsnorth[i2] - traf.gsnorth[i1]) > 0.
+
+    # hLOS:
+    # Aircraft should continue to resolve until there is no horizontal
+    # LOS. This is particularly relevant when vertical resolutions
+    # are used.
+    hdist = asas.dist[i1, i2]
+    hLOS  = hdist < asas.R
+
+    # Bouncing conflicts:
+    # If two aircraft are getting in and out of conflict continously,
+    # then they it is a bouncing conflict. ASAS should stay active until
+    # the bouncing stops.
+    bouncingConflict = (np.abs(traf.trk[i1] - traf.trk[i2]) < 30.) & (hdist < asas.Rm**2)
+
+    # Decide if conflict is over or not.
+    # If not over, turn active to true.
+    # If over, then initiate recovery
+    notover = ~pastCPA | hLOS | bouncingConflict
+
+    # Aircraft haven't passed their CPA: must follow their ASAS
+    asas.active[i1[notover]] = True
+    asas.active[i2[notover]] = True
+
+    # If conflict is solved, remove it from conflist_all list
+    # This is so that if a conflict between this pair of aircraft
+    # occurs again, then that new conflict should be detected, logged
+    # and solved (if reso is on).
+    # Conflicts of which one or both aircraft have finished their flight
+    # (and have been deleted) are removed as well.
+    resolved = np.ones(len(id1), dtype=bool)
+    resolved[np.where(both)[0][notover]] = False
+
+    # Waypoint recovery after conflict, for both aircraft of a solved conflict,
+    # and for the remaining aircraft of a conflict with a deleted aircraft.
+    recover = np.concatenate((i1[~notover], i2[~notover],
+                              id1[(id1 >= 0) & (id2 < 0)],
+                              id2[(id2 >= 0) & (id1 < 0)]))
+    for idx in np.unique(recover):
+        # Find the next active waypoint and send the aircraft to that
+        # waypoint.
+        route = traf.ap.route[idx]
+        iwpid = route.findact(idx)
+        if iwpid != -1:  # To avoid problems if there are no waypoints
+            route.direct(idx, route.wpname[iwpid])
+
+    asas.conflist_all = [c for c, r in zip(asas.conflist_all, resolved) if not r]
+    asas.confkeys_all = asas.confkeys_all[~resolved]
+    asas.confidx_all  = asas.confidx_all[~resolved]
@@ -11,6 +11,9 @@ import numpy as np
 from bluesky.tools.aero import nm, ft
 from . import MVP
 
+# Swarm needs the complete ntraf x ntraf CD matrices (asas.dx, asas.dy, ...)
+needsdensematrices = True
+
 
 def start(asas):
     asas.Rswarm = 7.5 * nm  # [m]
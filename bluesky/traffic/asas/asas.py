@@ -24,6 +24,7 @@ if settings.prefer_compiled:
 if not StateBasedCD:
     print('StateBasedCD: using Python version.')
     from . import StateBasedCD
+from . import SpatialCD
 
 # Import default CR methods
 from . import DoNothing
@@ -39,6 +40,9 @@ class ASAS(TrafficArrays):
 
     # Dictionary of CD methods
     CDmethods = {"STATEBASED": StateBasedCD}
+    # If scipy is installed add the spatially indexed CD method to CDmethods-dict
+    if SpatialCD.loaded_scipy():
+        CDmethods["SPATIAL"] = SpatialCD
 
     # Dictionary of CR methods
     CRmethods = {"OFF": DoNothing, "MVP": MVP, "EBY": Eby, "SWARM": Swarm}
@@ -54,6 +58,13 @@ class ASAS(TrafficArrays):
     def addCRMethod(asas, name, module):
         asas.CRmethods[name] = module
 
+    @staticmethod
+    def compatible(cd, cr):
+        """ Return False when CR method cr needs the complete CD matrices,
+            and CD method cd doesn't provide them. """
+        return getattr(cd, 'densematrices', True) or \
+            not getattr(cr, 'needsdensematrices', False)
+
     def __init__(self):
         super(ASAS, self).__init__()
         with RegisterElementParameters(self):
@@ -66,6 +77,7 @@ class ASAS(TrafficArrays):
             self.tas      = np.array([])  # speed provided by the ASAS (eas) [m/s]
             self.alt      = np.array([])  # speed alt by the ASAS [m]
             self.vs       = np.array([])  # speed vspeed by the ASAS [m/s]
+            self.uid      = np.array([], dtype=np.int64)  # unique aircraft number, key in conflict database
 
         # All ASAS variables are initialized in the reset function
         self.reset()
@@ -138,11 +150,18 @@ class ASAS(TrafficArrays):
         self.conflist_now = []  # List of current Conflicts
         self.LOSlist_now = []  # List of current Losses Of Separation
 
+        # Integer pair keys of the entries in the lists above (see StateBasedCD.pairkey)
+        self.nextuid = 0  # Unique number for the next created aircraft
+        self.confkeys_all = np.array([], dtype=np.int64)
+        self.confidx_all = np.zeros((0, 2), dtype=int)  # Aircraft indices of conflist_all pairs, -1 when deleted
+        self.confkeys_exp = np.array([], dtype=np.int64)
+        self.loskeys_all = np.array([], dtype=np.int64)
+        self.loskeys_exp = np.array([], dtype=np.int64)
+
         # For keeping track of locations with most severe intrusions
-        #        self.LOSmaxsev    = []
-        self.LOSmaxsev = []
-        self.LOShmaxsev = []
-        self.LOSvmaxsev = []
+        self.LOSmaxsev = np.array([])
+        self.LOShmaxsev = np.array([])
+        self.LOSvmaxsev = np.array([])
 
         # ASAS-visualization on SSD
         self.asasn        = np.array([])               # [m/s] North resolution speed from ASAS
@@ -192,8 +211,13 @@ class ASAS(TrafficArrays):
         if method is "":
             return True, ("Current CD method: " + self.cd_name +
                         "\nAvailable CD methods: " + str.join(", ", list(ASAS.CDmethods.keys())))
+        if method == "SPATIAL" and not SpatialCD.loaded_scipy():
+            return False, "CD SPATIAL needs scipy.spatial, which could not be imported"
         if method not in ASAS.CDmethods:
             return False, (method + " doesn't exist.\nAvailable CD methods: " + str.join(", ", list(ASAS.CDmethods.keys())))
+        if not ASAS.compatible(ASAS.CDmethods[method], self.cr):
+            return False, ("CD " + method + " cannot be used with CR " + self.cr_name +
+                           ", which needs complete conflict matrices")
 
         self.cd_name = method
         self.cd = ASAS.CDmethods[method]
@@ -207,6 +231,9 @@ class ASAS(TrafficArrays):
                         "\nAvailable CR methods: " + str.join(", ", list(ASAS.CRmethods.keys())))
         if method not in ASAS.CRmethods:
             return False, (method + " doesn't exist.\nAvailable CR methods: " + str.join(", ", list(ASAS.CRmethods.keys())))
+        if not ASAS.compatible(self.cd, ASAS.CRmethods[method]):
+            return False, ("CR " + method + " needs complete conflict matrices, which CD " +
+                           self.cd_name + " does not provide")
 
         self.cr_name = method
         self.cr = ASAS.CRmethods[method]
@@ -430,6 +457,18 @@ class ASAS(TrafficArrays):
         self.trk[-n:] = bs.traf.trk[-n:]
         self.tas[-n:] = bs.traf.tas[-n:]
         self.alt[-n:] = bs.traf.alt[-n:]
+        self.uid[-n:] = np.arange(self.nextuid, self.nextuid + n)
+        self.nextuid += n
+
+    def delete(self, idx):
+        super(ASAS, self).delete(idx)
+
+        # Keep the aircraft indices in the conflict pair table consistent:
+        # deleted aircraft get index -1, the others shift down
+        deleted = np.sort(np.atleast_1d(idx))
+        pairs   = self.confidx_all
+        self.confidx_all = np.where(np.isin(pairs, deleted) | (pairs < 0), -1,
+                                    pairs - np.searchsorted(deleted, pairs))
 
     def update(self, simt):
         iconf0 = np.array(self.iconf)
@@ -4,8 +4,8 @@ import numpy as np
 import bluesky as bs
 from bluesky.tools import geo
 from bluesky.tools.position import txt2pos
-from bluesky.tools.aero import ft, nm, vtas2cas, cas2mach, \
-    mach2cas, vcasormach2tas, vcasormach
+from bluesky.tools.aero import ft, nm, vtas2cas, vcas2mach, \
+    vmach2cas, vcasormach2tas, vcasormach
 from .route import Route
 from bluesky.tools.trafficarrays import TrafficArrays, RegisterElementParameters
 
@@ -66,61 +66,17 @@ class Autopilot(TrafficArrays):
                                         bs.traf.actwp.lat, bs.traf.actwp.lon)  # [deg][nm])
             dist = distinnm * nm  # Conversion to meters
 
-            # Shift waypoints for aircraft i where necessary
-            for i in bs.traf.actwp.Reached(qdr, dist, bs.traf.actwp.flyby):
-                # Save current wp speed
-                oldspd = bs.traf.actwp.spd[i]
+            # Shift waypoints for aircraft where necessary
+            reached = bs.traf.actwp.Reached(qdr, dist, bs.traf.actwp.flyby)
+            if len(reached) > 0:
+                self.switchwp(reached)
 
-                # Get next wp (lnavon = False if no more waypoints)
-                lat, lon, alt, spd, bs.traf.actwp.xtoalt[i], toalt, \
-                lnavon, flyby, bs.traf.actwp.next_qdr[i] = \
-                    self.route[i].getnextwp()  # note: xtoalt,toalt in [m]
-
-                # End of route/no more waypoints: switch off LNAV
-                bs.traf.swlnav[i] = bs.traf.swlnav[i] and lnavon
-
-                # In case of no LNAV, do not allow VNAV mode on its own
-                bs.traf.swvnav[i] = bs.traf.swvnav[i] and bs.traf.swlnav[i]
-
-                bs.traf.actwp.lat[i] = lat  # [deg]
-                bs.traf.actwp.lon[i] = lon  # [deg]
-                bs.traf.actwp.flyby[i] = int(flyby)  # 1.0 in case of fly by, else fly over
-
-                # User has entered an altitude for this waypoint
-                if alt >= -0.01:
-                    bs.traf.actwp.nextaltco[i] = alt  # [m]
-
-                if spd > -990. and bs.traf.swlnav[i] and bs.traf.swvnav[i]:
-
-                    # Valid speed and LNAV and VNAV ap modes are on
-                    # Depending on crossover altitude we fix CAS or Mach
-                    if bs.traf.abco[i] and spd > 1.0:
-                        bs.traf.actwp.spd[i] = cas2mach(spd, bs.traf.alt[i])
-
-                    elif bs.traf.belco[i] and 0. < spd <= 1.0:
-                        bs.traf.actwp.spd[i] = mach2cas(spd, bs.traf.alt[i])
-
-                    else:
-                        bs.traf.actwp.spd[i] = spd
-
-                else:
-                    bs.traf.actwp.spd[i] = -999.
-
-                # VNAV spd mode: use speed of this waypoint as commanded speed
-                # while passing waypoint and save next speed for passing next wp
-                # Speed is now from speed! Next speed is ready in wpdata
-                if bs.traf.swvnav[i] and oldspd > 0.0:
-                    bs.traf.selspd[i] = oldspd
-
-                # VNAV = FMS ALT/SPD mode
-                self.ComputeVNAV(i, toalt, bs.traf.actwp.xtoalt[i])
-
-            # =============== End of Waypoint switching loop ===================
+            # =============== End of Waypoint switching ========================
 
             # ================= Continuous FMS guidance ========================
 
-            # Waypoint switching in the loop above was scalar (per a/c with index i)
-            # Code below is vectorized, with arrays for all aircraft
+            # Waypoint switching above was only for the aircraft that reached
+            # their waypoint, code below is for all aircraft
 
             # Do VNAV start of descent check
             dy = (bs.traf.actwp.lat - bs.traf.lat)  # [deg lat = 60 nm]
@@ -177,13 +133,64 @@ class Autopilot(TrafficArrays):
         # Below crossover altitude: CAS=const, above crossover altitude: Mach = const
         self.tas = vcasormach2tas(bs.traf.selspd, bs.traf.alt)
 
-    def ComputeVNAV(self, idx, toalt, xtoalt):
-        # Check if there is a target altitude and VNAV is on, else return doing nothing
-        if toalt < 0 or not bs.traf.swvnav[idx]:
-            self.dist2vs[idx] = -999
-            return
+    def switchwp(self, idx):
+        """ Switch the aircraft with indices idx to their next waypoint. """
+        # Save current wp speed
+        oldspd = bs.traf.actwp.spd[idx]
+
+        # Get next wp of each aircraft (lnavon = False if no more waypoints)
+        # note: xtoalt,toalt in [m]
+        lat, lon, alt, spd, xtoalt, toalt, lnavon, flyby, nextqdr = \
+            Route.getnextwps([self.route[i] for i in idx])
+
+        bs.traf.actwp.xtoalt[idx] = xtoalt
+        bs.traf.actwp.next_qdr[idx] = nextqdr
+
+        # End of route/no more waypoints: switch off LNAV
+        swlnav = bs.traf.swlnav[idx] & (lnavon > 0.)
+        bs.traf.swlnav[idx] = swlnav
+
+        # In case of no LNAV, do not allow VNAV mode on its own
+        swvnav = bs.traf.swvnav[idx] & swlnav
+        bs.traf.swvnav[idx] = swvnav
+
+        bs.traf.actwp.lat[idx] = lat  # [deg]
+        bs.traf.actwp.lon[idx] = lon  # [deg]
+        bs.traf.actwp.flyby[idx] = flyby  # 1.0 in case of fly by, else fly over
+
+        # User has entered an altitude for this waypoint
+        bs.traf.actwp.nextaltco[idx] = np.where(alt >= -0.01, alt,
+                                                bs.traf.actwp.nextaltco[idx])  # [m]
+
+        # Valid speed and LNAV and VNAV ap modes are on
+        # Depending on crossover altitude we fix CAS or Mach
+        acalt  = bs.traf.alt[idx]
+        # abco and belco are float 0/1 arrays, so combine them logically
+        tomach = np.logical_and(bs.traf.abco[idx], spd > 1.0)
+        tocas  = np.logical_and(bs.traf.belco[idx], (spd > 0.) & (spd <= 1.0)) & ~tomach
+        wpspd  = spd.copy()
+        wpspd[tomach] = vcas2mach(spd[tomach], acalt[tomach])
+        wpspd[tocas]  = vmach2cas(spd[tocas], acalt[tocas])
+        bs.traf.actwp.spd[idx] = np.where((spd > -990.) & swvnav, wpspd, -999.)
+
+        # VNAV spd mode: use speed of this waypoint as commanded speed
+        # while passing waypoint and save next speed for passing next wp
+        # Speed is now from speed! Next speed is ready in wpdata
+        bs.traf.selspd[idx] = np.where(swvnav & (oldspd > 0.0), oldspd,
+                                       bs.traf.selspd[idx])
+
+        # VNAV = FMS ALT/SPD mode
+        self.ComputeVNAV(idx, toalt, xtoalt)
 
-        # So: somewhere there is an altitude constraint ahead
+    def ComputeVNAV(self, idx, toalt, xtoalt):
+        """ Compute the VNAV guidance towards the next altitude constraint,
+            for aircraft index idx, or for an array of aircraft indices with
+            arrays toalt and xtoalt. """
+        idx    = np.atleast_1d(idx)
+        toalt  = np.zeros(len(idx)) + toalt
+        xtoalt = np.zeros(len(idx)) + xtoalt
+
+        # For aircraft with an altitude constraint ahead:
         # Compute proper values for bs.traf.actwp.nextaltco, self.dist2vs, self.alt, bs.traf.actwp.vs
         # Descent VNAV mode (T/D logic)
         #
@@ -216,55 +223,54 @@ class Autopilot(TrafficArrays):
         # - Descend at the latest when necessary for next altitude constraint
         #   which can be many waypoints beyond current actual waypoint
 
+        # Check if there is a target altitude and VNAV is on, else do nothing
+        alt     = bs.traf.alt[idx]
+        active  = (toalt >= 0.) & bs.traf.swvnav[idx]
+        descent = active & (alt > toalt + 10. * ft)
+        climb   = active & (alt < toalt - 10. * ft)
 
-        # VNAV Descent mode
-        if bs.traf.alt[idx] > toalt + 10. * ft:
+        # Level leg: never start V/S
+        self.dist2vs[idx] = -999.  # [m]
+
+        # Flat earth distance to next wp
+        dy = (bs.traf.actwp.lat[idx] - bs.traf.lat[idx])  # [deg lat = 60. nm]
+        dx = (bs.traf.actwp.lon[idx] - bs.traf.lon[idx]) * bs.traf.coslat[idx]  # [corrected deg lon = 60. nm]
+        legdist = 60. * nm * np.sqrt(dx * dx + dy * dy)  # [m]
+        gs  = bs.traf.gs[idx]
+        tas = bs.traf.tas[idx]
+        t2go = np.maximum(0.1, legdist + xtoalt) / np.maximum(0.01, gs)
 
+        # VNAV Descent mode
+        ides = idx[descent]
+        if len(ides) > 0:
             # Calculate max allowed altitude at next wp (above toalt)
-            bs.traf.actwp.nextaltco[idx] = min(bs.traf.alt[idx], toalt + xtoalt * self.steepness)
+            nextaltco = np.minimum(alt[descent], toalt[descent] + xtoalt[descent] * self.steepness)
+            bs.traf.actwp.nextaltco[ides] = nextaltco
 
             # Dist to waypoint where descent should start [m]
-            self.dist2vs[idx] = bs.traf.actwp.turndist[idx] + \
-                                np.abs(bs.traf.alt[idx] - bs.traf.actwp.nextaltco[idx]) / self.steepness
-
-            # Flat earth distance to next wp
-            dy = (bs.traf.actwp.lat[idx] - bs.traf.lat[idx])  # [deg lat = 60. nm]
-            dx = (bs.traf.actwp.lon[idx] - bs.traf.lon[idx]) * bs.traf.coslat[idx]  # [corrected deg lon = 60. nm]
-            legdist = 60. * nm * np.sqrt(dx * dx + dy * dy)  # [m]
+            dist2vs = bs.traf.actwp.turndist[ides] + \
+                np.abs(alt[descent] - nextaltco) / self.steepness
+            self.dist2vs[ides] = dist2vs
 
             # If the descent is urgent, descend with maximum steepness
-            if legdist < self.dist2vs[idx]:  # [m]
-                self.alt[idx] = bs.traf.actwp.nextaltco[idx]  # dial in altitude of next waypoint as calculated
-
-                t2go = max(0.1, legdist + xtoalt) / max(0.01, bs.traf.gs[idx])
-                bs.traf.actwp.vs[idx] = (bs.traf.actwp.nextaltco[idx] - bs.traf.alt[idx]) / t2go
+            urgent = legdist[descent] < dist2vs  # [m]
+            self.alt[ides[urgent]] = nextaltco[urgent]  # dial in altitude of next waypoint as calculated
 
-            else:
-                # Calculate V/S using self.steepness,
-                # protect against zero/invalid ground speed value
-                bs.traf.actwp.vs[idx] = -self.steepness * (bs.traf.gs[idx] +
-                                                           (bs.traf.gs[idx] < 0.2 * bs.traf.tas[idx]) * bs.traf.tas[
-                                                               idx])
+            # Else calculate V/S using self.steepness,
+            # protect against zero/invalid ground speed value
+            gsdes, tasdes = gs[descent], tas[descent]
+            bs.traf.actwp.vs[ides] = np.where(urgent,
+                (nextaltco - alt[descent]) / t2go[descent],
+                -self.steepness * (gsdes + (gsdes < 0.2 * tasdes) * tasdes))
 
         # VNAV climb mode: climb as soon as possible (T/C logic)
-        elif bs.traf.alt[idx] < toalt - 10. * ft:
-
-            bs.traf.actwp.nextaltco[idx] = toalt
-            self.alt[idx] = bs.traf.actwp.nextaltco[idx]  # dial in altitude of next waypoint as calculated
-            self.dist2vs[idx] = 9999.  # [m]
-
-            # Flat earth distance to next wp
-            dy = (bs.traf.actwp.lat[idx] - bs.traf.lat[idx])
-            dx = (bs.traf.actwp.lon[idx] - bs.traf.lon[idx]) * bs.traf.coslat[idx]
-            legdist = 60. * nm * np.sqrt(dx * dx + dy * dy)  # [m]
-            t2go = max(0.1, legdist + xtoalt) / max(0.01, bs.traf.gs[idx])
-            bs.traf.actwp.vs[idx] = np.maximum(self.steepness * bs.traf.gs[idx], \
-                                               (bs.traf.actwp.nextaltco[idx] - bs.traf.alt[idx]) / t2go)  # [m/s]
-        # Level leg: never start V/S
-        else:
-            self.dist2vs[idx] = -999.  # [m]
-
-        return
+        iclb = idx[climb]
+        if len(iclb) > 0:
+            bs.traf.actwp.nextaltco[iclb] = toalt[climb]
+            self.alt[iclb] = toalt[climb]  # dial in altitude of next waypoint as calculated
+            self.dist2vs[iclb] = 9999.  # [m]
+            bs.traf.actwp.vs[iclb] = np.maximum(self.steepness * gs[climb],
+                (toalt[climb] - alt[climb]) / t2go[climb])  # [m/s]
 
     def selaltcmd(self, idx, alt, vspd=None):
         """ Select altitude command: ALT acid, alt, [vspd] """
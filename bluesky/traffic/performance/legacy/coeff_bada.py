@@ -10,8 +10,18 @@
 from glob import glob
 from os import path
 import re
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+import numpy as np
+from bluesky.tools import cachefile
 from bluesky.tools.fwparser import FixedWidthParser, ParseError
 
+# Cache version: increment this to the current date if the cached data changes.
+# The cache is also keyed by the BADA release.
+cache_version = 'v20261019'
+
 # File formats of BADA data files. Uses fortran-like notation
 # Adapted from the BADA manual format lines. (page 61-81 in the BADA manual)
 # Skip characters are indicated with nnX
@@ -66,6 +76,23 @@ accoeffs     = dict()
 release_date = 'Unknown'
 bada_version = 'Unknown'
 
+# The coefficient data of all coefficient sets as a structured array, with
+# one row per coefficient set, for vectorized lookups. coeffrows gives the
+# row of each coefficient set in accoeffs. Sets without APF data have no
+# reference speeds, and are left out.
+coefftable   = None
+coeffrows    = dict()
+
+# The fields of coefftable: the scalar coefficients of ACData
+tablefields  = ['m_ref', 'm_min', 'm_max', 'mass_grad', 'VMO', 'MMO', 'h_MO',
+                'h_max', 'temp_grad', 'S', 'Clbo', 'k', 'CM16', 'Vstall_cr',
+                'CD0_cr', 'CD2_cr', 'Vstall_ic', 'CD0_ic', 'CD2_ic', 'Vstall_to',
+                'CD0_to', 'CD2_to', 'Vstall_ap', 'CD0_ap', 'CD2_ap', 'Vstall_ld',
+                'CD0_ld', 'CD2_ld', 'CD0_gear', 'CTdes_low', 'CTdes_high',
+                'Hp_des', 'CTdes_app', 'CTdes_land', 'Vdes_ref', 'Mdes_ref',
+                'Cf1', 'Cf2', 'Cf3', 'Cf4', 'Cf_cruise', 'TOL', 'LDL', 'wingspan',
+                'length']
+
 
 def getCoefficients(actype):
     ''' Get a set of BADA coefficients for the given aircraft type.
@@ -86,6 +113,14 @@ def getCoefficients(actype):
     return syn, coeff
 
 
+def getCoefficientRow(actype):
+    ''' Get the row in coefftable of the BADA coefficients for the given
+        aircraft type, or -1 when the type or its coefficients are not found,
+        or when its coefficient set has no APF data.'''
+    syn = synonyms.get(actype)
+    return -1 if syn is None else coeffrows.get(syn.file, -1)
+
+
 def init(bada_path=''):
     ''' init() loads the available BADA datafiles in the provided directory.'''
     releasefile = path.join(path.normpath(bada_path), 'ReleaseSummary')
@@ -106,6 +141,35 @@ def init(bada_path=''):
     else:
         print('No BADA release summary found: can not determine version.')
 
+    # Without a known release the cache can not be checked: parse the files
+    if 'Unknown' in (release_date, bada_version):
+        return load_bada_txt(bada_path)
+
+    global coefftable
+    with cachefile.openfile('bada.p', '%s-%s-%s' % (cache_version, bada_version, release_date)) as cache:
+        try:
+            synonyms.update(cache.load())
+            accoeffs.update(cache.load())
+            coefftable = cache.load()
+            coeffrows.update(cache.load())
+            print('%d aircraft entries and %d unique aircraft coefficient sets loaded'
+                  % (len(synonyms), len(accoeffs)))
+        except (pickle.PickleError, cachefile.CacheError) as e:
+            print(e.args[0])
+            if not load_bada_txt(bada_path):
+                return False
+            cache.dump(synonyms)
+            cache.dump(accoeffs)
+            cache.dump(coefftable)
+            cache.dump(coeffrows)
+
+    return (len(synonyms) > 0 and len(accoeffs) > 0)
+
+
+def load_bada_txt(bada_path):
+    ''' Parse the BADA synonym and coefficient files in the provided directory.'''
+    synonyms.clear()
+    accoeffs.clear()
     synonymfile = path.join(path.normpath(bada_path), 'SYNONYM.NEW')
     if not path.isfile(synonymfile):
         print('SYNONYM.NEW not found in BADA path, could not load BADA.')
@@ -138,9 +202,39 @@ def init(bada_path=''):
         if ac:
             accoeffs[ac.actype] = ac
     print('%d unique aircraft coefficient sets loaded' % len(accoeffs))
+    compile_table()
     return (len(synonyms) > 0 and len(accoeffs) > 0)
 
 
+def compile_table():
+    ''' Compile the coefficient sets in accoeffs into coefftable.'''
+    global coefftable
+    coeffrows.clear()
+    # Sets without APF data have no reference speeds
+    sets = [(actype, ac) for actype, ac in sorted(accoeffs.items()) if hasattr(ac, 'CAScl1')]
+    if len(sets) < len(accoeffs):
+        print('%d aircraft coefficient sets without APF data are not used'
+              % (len(accoeffs) - len(sets)))
+    coefftable = np.zeros(len(sets), dtype=[(name, float) for name in tablefields + [
+        'jet', 'turbo', 'piston', 'Cred', 'CAScl1', 'CAScr1', 'CASdes1', 'Mcl', 'Mcr',
+        'Mdes', 'CTC0', 'CTC1', 'CTC2', 'CTC3', 'CTC4']])
+    for row, (actype, ac) in enumerate(sets):
+        coeffrows[actype] = row
+        values = coefftable[row]
+        for name in tablefields:
+            values[name] = getattr(ac, name)
+        values['jet']    = ac.engtype == 'Jet'
+        values['turbo']  = ac.engtype == 'Turboprop'
+        values['piston'] = ac.engtype == 'Piston'
+        values['Cred']   = ac.Cred_jet if ac.engtype == 'Jet' else \
+            ac.Cred_turboprop if ac.engtype == 'Turboprop' else ac.Cred_piston
+        # Reference speeds from the APF file
+        for name in ('CAScl1', 'CAScr1', 'CASdes1', 'Mcl', 'Mcr', 'Mdes'):
+            values[name] = getattr(ac, name)[0]
+        for i in range(5):
+            values['CTC%d' % i] = ac.CTC[i]
+
+
 class Synonym(object):
     def __init__(self, data):
         self.is_equiv = (data[0] == '*')           # False if model is directly supported in bada, true if supported through equivalent model
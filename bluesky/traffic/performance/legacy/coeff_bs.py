@@ -101,6 +101,24 @@ class CoeffBS:
         self.d_CD0t    = [1.220, 1.0, 1.0, 1.279, 1.828, 0.496]
         self.d_kt      = [0.948, 1.0, 1.0, 0.94, 0.916, 1.0]
 
+        # scaling factors as tables per flight phase (None, TO, IC, CR, AP, LD,
+        # GD), engine type (jet = 1, turboprop = 2) and altitude band
+        # (0: alt >= 450 m, 1: alt < 450 m), for table lookups in PerfBS.
+        # For ground operations (phase 6) drag is assumed equal to the takeoff
+        # phase for jets, turboprops have no landing and ground factors
+        self.d_CD0     = np.zeros((7, 3, 2))
+        self.d_k       = np.zeros((7, 3, 2))
+        for phase in range(1, 5):
+            self.d_CD0[phase, 1] = self.d_CD0j[phase - 1]
+            self.d_CD0[phase, 2] = self.d_CD0t[phase - 1]
+            self.d_k[phase, 1]   = self.d_kj[phase - 1]
+            self.d_k[phase, 2]   = self.d_kt[phase - 1]
+        self.d_CD0[5, 1] = self.d_CD0j[4], self.d_CD0j[5]
+        self.d_k[5, 1]   = self.d_kj[4], self.d_kj[5]
+        self.d_k[5, 2]   = self.d_kt[4], self.d_kt[5]
+        self.d_CD0[6, 1] = self.d_CD0j[0]
+        self.d_k[6, 1]   = self.d_kj[0]
+
         # bank angles per phase. Order: TO, IC, CR, AP, LD. Currently already in CTraffic
         # self.bank = np.deg2rad(np.array([15,35,35,35,15]))
 
@@ -167,119 +167,127 @@ class PerfBADA(TrafficArrays):
     def create(self, n=1):
         super(PerfBADA, self).create(n)
         """CREATE NEW AIRCRAFT"""
-        actypes = bs.traf.type[-n:]
-
-        # note: coefficients are initialized in SI units
-
-        # general
-        # designate aircraft to its aircraft type
-        for actype in actypes:
-            syn, coeff = coeff_bada.getCoefficients(actype)
-            if syn:
-                continue
-            syn, coeff = coeff_bada.getCoefficients('B744')
-            bs.traf.type[-n:] = n * [syn.accode]
+        # Aircraft that are created in one batch can have different types:
+        # look up the coefficients once per type, and gather the coefficients
+        # of all new aircraft from the coefficient table
+        ntraf = len(bs.traf.type)
+        sel   = slice(ntraf - n, ntraf)
+        actypes, inverse = np.unique(bs.traf.type[sel], return_inverse=True)
+        rows  = np.array([coeff_bada.getCoefficientRow(actype) for actype in actypes], dtype=int)
+
+        # designate aircraft of unknown types, and of types without APF data,
+        # to the default type
+        default = coeff_bada.getCoefficientRow('B744') if (rows < 0).any() else 0
+        if default < 0:
+            raise RuntimeError('BADA performance model: no coefficients with APF data for '
+                               'the default type B744, which is used for aircraft types '
+                               + ', '.join(actypes[rows < 0]))
+        for actype in actypes[rows < 0]:
+            idx = [i for i in range(sel.start, ntraf) if bs.traf.type[i] == actype]
+            for i in idx:
+                bs.traf.type[i] = 'B744'
 
             if not settings.verbose:
                 if not self.warned:
                     print("Aircraft is using default B747-400 performance.")
                     self.warned = True
             else:
-                print("Flight " + bs.traf.id[-n:] + " has an unknown aircraft type, " + actype + ", BlueSky then uses default B747-400 performance.")
+                print("Flight " + ', '.join(bs.traf.id[i] for i in idx) + " has aircraft type " + actype + ", which is unknown or has no BADA APF data, BlueSky then uses default B747-400 performance.")
+        rows[rows < 0] = default
+
+        # note: coefficients are initialized in SI units
+        c = coeff_bada.coefftable[rows[inverse]]
 
         # designate aicraft to its aircraft type
-        self.jet[-n:]       = 1 if coeff.engtype == 'Jet' else 0
-        self.turbo[-n:]     = 1 if coeff.engtype == 'Turboprop' else 0
-        self.piston[-n:]    = 1 if coeff.engtype == 'Piston' else 0
+        self.jet[sel]       = c['jet']
+        self.turbo[sel]     = c['turbo']
+        self.piston[sel]    = c['piston']
 
         # Initial aircraft mass is currently reference mass.
         # BADA 3.12 also supports masses between 1.2*mmin and mmax
-        self.mass[-n:]      = coeff.m_ref * 1000.0
-        self.mmin[-n:]      = coeff.m_min * 1000.0
-        self.mmax[-n:]      = coeff.m_max * 1000.0
+        self.mass[sel]      = c['m_ref'] * 1000.0
+        self.mmin[sel]      = c['m_min'] * 1000.0
+        self.mmax[sel]      = c['m_max'] * 1000.0
 
         # self.mpyld = np.append(self.mpyld, coeff.mpyld[coeffidx]*1000)
-        self.gw[-n:]        = coeff.mass_grad * ft
+        self.gw[sel]        = c['mass_grad'] * ft
 
         # Surface Area [m^2]
-        self.Sref[-n:]      = coeff.S
+        self.Sref[sel]      = c['S']
 
         # flight envelope
         # minimum speeds per phase
-        self.vmto[-n:]      = coeff.Vstall_to * coeff.CVmin_to * kts
-        self.vmic[-n:]      = coeff.Vstall_ic * coeff.CVmin * kts
-        self.vmcr[-n:]      = coeff.Vstall_cr * coeff.CVmin * kts
-        self.vmap[-n:]      = coeff.Vstall_ap * coeff.CVmin * kts
-        self.vmld[-n:]      = coeff.Vstall_ld * coeff.CVmin * kts
-        self.vmin[-n:]      = 0.0
-        self.vmo[-n:]       = coeff.VMO * kts
-        self.mmo[-n:]       = coeff.MMO
+        self.vmto[sel]      = c['Vstall_to'] * coeff_bada.ACData.CVmin_to * kts
+        self.vmic[sel]      = c['Vstall_ic'] * coeff_bada.ACData.CVmin * kts
+        self.vmcr[sel]      = c['Vstall_cr'] * coeff_bada.ACData.CVmin * kts
+        self.vmap[sel]      = c['Vstall_ap'] * coeff_bada.ACData.CVmin * kts
+        self.vmld[sel]      = c['Vstall_ld'] * coeff_bada.ACData.CVmin * kts
+        self.vmin[sel]      = 0.0
+        self.vmo[sel]       = c['VMO'] * kts
+        self.mmo[sel]       = c['MMO']
 
         # max. altitude parameters
-        self.hmo[-n:]       = coeff.h_MO * ft
-        self.hmax[-n:]      = coeff.h_max * ft
-        self.hmaxact[-n:]   = coeff.h_max * ft  # initialize with hmax
-        self.gt[-n:]        = coeff.temp_grad * ft
+        self.hmo[sel]       = c['h_MO'] * ft
+        self.hmax[sel]      = c['h_max'] * ft
+        self.hmaxact[sel]   = c['h_max'] * ft  # initialize with hmax
+        self.gt[sel]        = c['temp_grad'] * ft
 
         # max thrust setting
-        self.maxthr[-n:]    = 1e6  # initialize with excessive setting to avoid unrealistic limit setting
+        self.maxthr[sel]    = 1e6  # initialize with excessive setting to avoid unrealistic limit setting
 
         # Buffet Coefficients
-        self.clbo[-n:]      = coeff.Clbo
-        self.k[-n:]         = coeff.k
-        self.cm16[-n:]      = coeff.CM16
+        self.clbo[sel]      = c['Clbo']
+        self.k[sel]         = c['k']
+        self.cm16[sel]      = c['CM16']
 
         # reference speeds
         # reference CAS speeds
-        self.cascl[-n:]     = coeff.CAScl1[0] * kts
-        self.cascr[-n:]     = coeff.CAScr1[0] * kts
-        self.casdes[-n:]    = coeff.CASdes1[0] * kts
+        self.cascl[sel]     = c['CAScl1'] * kts
+        self.cascr[sel]     = c['CAScr1'] * kts
+        self.casdes[sel]    = c['CASdes1'] * kts
 
         # reference mach numbers
-        self.macl[-n:]      = coeff.Mcl[0]
-        self.macr[-n:]      = coeff.Mcr[0]
-        self.mades[-n:]     = coeff.Mdes[0]
+        self.macl[sel]      = c['Mcl']
+        self.macr[sel]      = c['Mcr']
+        self.mades[sel]     = c['Mdes']
 
         # reference speed during descent
-        self.vdes[-n:]      = coeff.Vdes_ref * kts
-        self.mdes[-n:]      = coeff.Mdes_ref
+        self.vdes[sel]      = c['Vdes_ref'] * kts
+        self.mdes[sel]      = c['Mdes_ref']
 
         # crossover altitude for climbing and descending aircraft (BADA User Manual 3.12, p. 12)
-        self.atranscl[-n:]  = (1e3 / 6.5) * (T0 * (1.0 - (((( 1.0 + gamma1 *
-            (self.cascl[-n:] / a0) * (self.cascl[-n:] / a0)) ** gamma2) - 1.0) /
-                (((1.0 + gamma1 * self.macl[-n:] * self.macl[-n:]) ** gamma2) - 1.0)) **
+        self.atranscl[sel]  = (1e3 / 6.5) * (T0 * (1.0 - (((( 1.0 + gamma1 *
+            (self.cascl[sel] / a0) * (self.cascl[sel] / a0)) ** gamma2) - 1.0) /
+                (((1.0 + gamma1 * self.macl[sel] * self.macl[sel]) ** gamma2) - 1.0)) **
                     (-beta * R / g0)))
 
-        self.atransdes[-n:] = (1e3 / 6.5) * (T0 * (1.0 - (((( 1.0 + gamma1 *
-            (self.casdes[-n:] / a0) * (self.casdes[-n:] / a0)) ** gamma2) - 1.0) /
-                (((1.0 + gamma1 * self.mades[-n:] * self.mades[-n:]) ** gamma2) - 1.0)) **
+        self.atransdes[sel] = (1e3 / 6.5) * (T0 * (1.0 - (((( 1.0 + gamma1 *
+            (self.casdes[sel] / a0) * (self.casdes[sel] / a0)) ** gamma2) - 1.0) /
+                (((1.0 + gamma1 * self.mades[sel] * self.mades[sel]) ** gamma2) - 1.0)) **
                     (-beta * R / g0)))
 
         # aerodynamics
         # parasitic drag coefficients per phase
-        self.cd0to[-n:]     = coeff.CD0_to
-        self.cd0ic[-n:]     = coeff.CD0_ic
-        self.cd0cr[-n:]     = coeff.CD0_cr
-        self.cd0ap[-n:]     = coeff.CD0_ap
-        self.cd0ld[-n:]     = coeff.CD0_ld
-        self.gear[-n:]      = coeff.CD0_gear
+        self.cd0to[sel]     = c['CD0_to']
+        self.cd0ic[sel]     = c['CD0_ic']
+        self.cd0cr[sel]     = c['CD0_cr']
+        self.cd0ap[sel]     = c['CD0_ap']
+        self.cd0ld[sel]     = c['CD0_ld']
+        self.gear[sel]      = c['CD0_gear']
 
         # induced drag coefficients per phase
-        self.cd2to[-n:]     = coeff.CD2_to
-        self.cd2ic[-n:]     = coeff.CD2_ic
-        self.cd2cr[-n:]     = coeff.CD2_cr
-        self.cd2ap[-n:]     = coeff.CD2_ap
-        self.cd2ld[-n:]     = coeff.CD2_ld
+        self.cd2to[sel]     = c['CD2_to']
+        self.cd2ic[sel]     = c['CD2_ic']
+        self.cd2cr[sel]     = c['CD2_cr']
+        self.cd2ap[sel]     = c['CD2_ap']
+        self.cd2ld[sel]     = c['CD2_ld']
 
         # reduced climb coefficient
-        self.cred[-n:] = np.where(
-            self.jet[-n:], coeff.Cred_jet,
-            np.where(self.turbo[-n:], coeff.Cred_turboprop, coeff.Cred_piston)
-        )
+        self.cred[sel]      = c['Cred']
 
         # commented due to vectrization
         # # NOTE: model only validated for jet and turbo aircraft
-        # if self.piston[-n:] and not self.warned2:
+        # if self.piston[sel] and not self.warned2:
         #     print "Using piston aircraft performance.",
         #     print "Not valid for real performance calculations."
         #     self.warned2 = True
@@ -287,50 +295,50 @@ class PerfBADA(TrafficArrays):
         # performance
 
         # max climb thrust coefficients
-        self.ctcth1[-n:]    = coeff.CTC[0]  # jet/piston [N], turboprop [ktN]
-        self.ctcth2[-n:]    = coeff.CTC[1]  # [ft]
-        self.ctcth3[-n:]    = coeff.CTC[2]  # jet [1/ft^2], turboprop [N], piston [ktN]
+        self.ctcth1[sel]    = c['CTC0']  # jet/piston [N], turboprop [ktN]
+        self.ctcth2[sel]    = c['CTC1']  # [ft]
+        self.ctcth3[sel]    = c['CTC2']  # jet [1/ft^2], turboprop [N], piston [ktN]
 
         # 1st and 2nd thrust temp coefficient
-        self.ctct1[-n:]     = coeff.CTC[3]  # [k]
-        self.ctct2[-n:]     = coeff.CTC[4]  # [1/k]
-        self.dtemp[-n:]     = 0.0  # [k], difference from current to ISA temperature. At the moment: 0, as ISA environment
+        self.ctct1[sel]     = c['CTC3']  # [k]
+        self.ctct2[sel]     = c['CTC4']  # [1/k]
+        self.dtemp[sel]     = 0.0  # [k], difference from current to ISA temperature. At the moment: 0, as ISA environment
 
         # Descent Fuel Flow Coefficients
         # Note: Ctdes,app and Ctdes,lnd assume a 3 degree descent gradient during app and lnd
-        self.ctdesl[-n:]    = coeff.CTdes_low
-        self.ctdesh[-n:]    = coeff.CTdes_high
-        self.ctdesa[-n:]    = coeff.CTdes_app
-        self.ctdesld[-n:]   = coeff.CTdes_land
+        self.ctdesl[sel]    = c['CTdes_low']
+        self.ctdesh[sel]    = c['CTdes_high']
+        self.ctdesa[sel]    = c['CTdes_app']
+        self.ctdesld[sel]   = c['CTdes_land']
 
         # transition altitude for calculation of descent thrust
-        self.hpdes[-n:]     = coeff.Hp_des * ft
-        self.ESF[-n:]       = 1.0  # neutral initialisation
+        self.hpdes[sel]     = c['Hp_des'] * ft
+        self.ESF[sel]       = 1.0  # neutral initialisation
 
         # flight phase
-        self.phase[-n:]       = PHASE["None"]
-        self.post_flight[-n:] = False  # we assume prior
-        self.pf_flag[-n:]     = True
+        self.phase[sel]       = PHASE["None"]
+        self.post_flight[sel] = False  # we assume prior
+        self.pf_flag[sel]     = True
 
         # Thrust specific fuel consumption coefficients
         # prevent from division per zero in fuelflow calculation
-        self.cf1[-n:]       = coeff.Cf1
-        self.cf2[-n:]       = 1.0 if coeff.Cf2 < 1e-9 else coeff.Cf2
-        self.cf3[-n:]       = coeff.Cf3
-        self.cf4[-n:]       = 1.0 if coeff.Cf4 < 1e-9 else coeff.Cf4
-        self.cf_cruise[-n:] = coeff.Cf_cruise
+        self.cf1[sel]       = c['Cf1']
+        self.cf2[sel]       = np.where(c['Cf2'] < 1e-9, 1.0, c['Cf2'])
+        self.cf3[sel]       = c['Cf3']
+        self.cf4[sel]       = np.where(c['Cf4'] < 1e-9, 1.0, c['Cf4'])
+        self.cf_cruise[sel] = c['Cf_cruise']
 
-        self.Thr[-n:]       = 0.0
-        self.D[-n:]         = 0.0
-        self.ff[-n:]        = 0.0
+        self.Thr[sel]       = 0.0
+        self.D[sel]         = 0.0
+        self.ff[sel]        = 0.0
 
         # ground
-        self.tol[-n:]       = coeff.TOL
-        self.ldl[-n:]       = coeff.LDL
-        self.ws[-n:]        = coeff.wingspan
-        self.len[-n:]       = coeff.length
+        self.tol[sel]       = c['TOL']
+        self.ldl[sel]       = c['LDL']
+        self.ws[sel]        = c['wingspan']
+        self.len[sel]       = c['length']
         # for now, BADA aircraft have the same acceleration as deceleration
-        self.gr_acc[-n:]    = coeff.gr_acc
+        self.gr_acc[sel]    = coeff_bada.ACData.gr_acc
 
     def perf(self, simt):
         if abs(simt - self.t0) >= self.dt:
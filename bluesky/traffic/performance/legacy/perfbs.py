@@ -63,6 +63,10 @@ class PerfBS(TrafficArrays):
             # aerodynamics
             self.CD0          = np.array([]) # parasite drag coefficient
             self.k            = np.array([]) # induced drag factor
+            self.CD0f         = np.array([]) # parasite drag scaling factor of flight phase
+            self.kf           = np.array([]) # induced drag scaling factor of flight phase
+            self.cd           = np.array([]) # drag coefficient
+            self.dragidx      = np.array([], dtype=int) # index in drag scaling factor tables
             self.clmaxcr      = np.array([]) # max. cruise lift coefficient
             self.qS           = np.array([]) # Dynamic air pressure [Pa]
             self.atrans       = np.array([]) # Transition altitude [m]
@@ -219,43 +223,25 @@ class PerfBS(TrafficArrays):
         cl = self.mass*g0/(self.qS*np.cos(self.bank))*(self.phase!=6)+ 0.*(self.phase==6)
 
         # scaling factors for CD0 and CDi during flight phases according to FAA (2005): SAGE, V. 1.5, Technical Manual
-
-        # For takeoff (phase = 6) drag is assumed equal to the takeoff phase
-        CD0f = (self.phase==1)*(self.etype==1)*coeffBS.d_CD0j[0] + \
-               (self.phase==2)*(self.etype==1)*coeffBS.d_CD0j[1]  + \
-               (self.phase==3)*(self.etype==1)*coeffBS.d_CD0j[2] + \
-               (self.phase==4)*(self.etype==1)*coeffBS.d_CD0j[3] + \
-               (self.phase==5)*(self.etype==1)*(bs.traf.alt>=450.0)*coeffBS.d_CD0j[4] + \
-               (self.phase==5)*(self.etype==1)*(bs.traf.alt<450.0)*coeffBS.d_CD0j[5] + \
-               (self.phase==6)*(self.etype==1)*coeffBS.d_CD0j[0] + \
-               (self.phase==1)*(self.etype==2)*coeffBS.d_CD0t[0] + \
-               (self.phase==2)*(self.etype==2)*coeffBS.d_CD0t[1]  + \
-               (self.phase==3)*(self.etype==2)*coeffBS.d_CD0t[2] + \
-               (self.phase==4)*(self.etype==2)*coeffBS.d_CD0t[3]
-                   # (self.phase==5)*(self.etype==2)*(self.alt>=450)*coeffBS.d_CD0t[4] + \
-                   # (self.phase==5)*(self.etype==2)*(self.alt<450)*coeffBS.d_CD0t[5]
-
-        # For takeoff (phase = 6) induced drag is assumed equal to the takeoff phase
-        kf =   (self.phase==1)*(self.etype==1)*coeffBS.d_kj[0] + \
-               (self.phase==2)*(self.etype==1)*coeffBS.d_kj[1]  + \
-               (self.phase==3)*(self.etype==1)*coeffBS.d_kj[2] + \
-               (self.phase==4)*(self.etype==1)*coeffBS.d_kj[3] + \
-               (self.phase==5)*(self.etype==1)*(bs.traf.alt>=450)*coeffBS.d_kj[4] + \
-               (self.phase==5)*(self.etype==1)*(bs.traf.alt<450)*coeffBS.d_kj[5] + \
-               (self.phase==6)*(self.etype==1)*coeffBS.d_kj[0] + \
-               (self.phase==1)*(self.etype==2)*coeffBS.d_kt[0] + \
-               (self.phase==2)*(self.etype==2)*coeffBS.d_kt[1]  + \
-               (self.phase==3)*(self.etype==2)*coeffBS.d_kt[2] + \
-               (self.phase==4)*(self.etype==2)*coeffBS.d_kt[3] + \
-               (self.phase==5)*(self.etype==2)*(bs.traf.alt>=450)*coeffBS.d_kt[4] + \
-               (self.phase==5)*(self.etype==2)*(bs.traf.alt<450)*coeffBS.d_kt[5]
-
-
-        # drag coefficient
-        cd = self.CD0*CD0f + self.k*kf*(cl*cl)
-
-        # compute drag: CD = CD0 + CDi * CL^2 and D = rho/2*VTAS^2*CD*S
-        self.D = cd*self.qS
+        # Index in the tables of scaling factors: phase x engine type x altitude band
+        idx = self.dragidx
+        idx[:] = self.phase
+        idx *= 3
+        np.add(idx, self.etype, out=idx, casting='unsafe')
+        idx *= 2
+        np.add(idx, bs.traf.alt < 450.0, out=idx)
+        np.take(coeffBS.d_CD0, idx, out=self.CD0f)
+        np.take(coeffBS.d_k, idx, out=self.kf)
+
+        # drag coefficient: CD = CD0*CD0f + k*kf*CL^2
+        cl *= cl
+        np.multiply(self.k, self.kf, out=self.cd)
+        self.cd *= cl
+        np.multiply(self.CD0, self.CD0f, out=cl)
+        self.cd += cl
+
+        # compute drag: D = rho/2*VTAS^2*CD*S
+        np.multiply(self.cd, self.qS, out=self.D)
         # energy share factor and crossover altitude
         epsalt = np.array([0.001]*bs.traf.ntraf)
         self.climb = np.array(bs.traf.delalt > epsalt)
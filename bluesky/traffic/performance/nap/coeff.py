@@ -1,11 +1,22 @@
 ''' NAP performance library. '''
 import os
 import json
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 import numpy as np
-import pandas as pd
 from bluesky import settings
+from bluesky.tools import cachefile
 settings.set_variable_defaults(perf_path_nap="data/performance/NAP")
 
+# Cache version: increment this to the current date if the NAP data is updated
+nap_version = 'v20261018'
+
 LIFT_FIXWING = 1     # fixwing aircraft
 LIFT_ROTOR = 2       # rotor aircraft
 
@@ -19,20 +30,70 @@ fixwing_envelops_dir = settings.perf_path_nap + "/fixwing/envelop/"
 
 rotor_aircraft_db = settings.perf_path_nap + "/rotor/aircraft.json"
 
+class TypeData(Mapping):
+    ''' Read-only dict of the data per aircraft type, which is stored
+        pickled and unpickled on first use of each type. '''
+    def __init__(self, blobs):
+        self.blobs = blobs
+        self.data = dict()
+
+    def __getitem__(self, mdl):
+        data = self.data.get(mdl)
+        if data is None:
+            data = self.data[mdl] = pickle.loads(self.blobs[mdl])
+        return data
+
+    def __contains__(self, mdl):
+        return mdl in self.blobs
+
+    def __iter__(self):
+        return iter(self.blobs)
+
+    def __len__(self):
+        return len(self.blobs)
+
+
 class Coefficient():
     def __init__(self):
+        # The NAP database is converted once to a cache file, with the
+        # aircraft and envelope data of each type pickled separately
+        with cachefile.openfile('nap.p', nap_version) as cache:
+            try:
+                blobs = [cache.load() for _ in range(4)]
+            except (pickle.PickleError, cachefile.CacheError) as e:
+                print(e.args[0])
+                blobs = self.__load_nap_txt()
+                for b in blobs:
+                    cache.dump(b)
+
+        self.acs_fixwing, self.limits_fixwing, self.acs_rotor, self.limits_rotor = \
+            [TypeData(b) for b in blobs]
+        self._engines_fixwing = None
+
+        self.actypes_fixwing = list(self.acs_fixwing.keys())
+        self.actypes_rotor = list(self.acs_rotor.keys())
+
+    @property
+    def engines_fixwing(self):
+        ''' The engine database, only read when used. '''
+        if self._engines_fixwing is None:
+            import pandas as pd
+            self._engines_fixwing = pd.read_csv(fixwing_engine_db, encoding='utf-8')
+        return self._engines_fixwing
+
+    def __load_nap_txt(self):
+        ''' Read the NAP database, and return the aircraft and envelope data
+            of fixwing and rotor aircraft, pickled per type. '''
         self.acs_fixwing = self.__load_all_fixwing_flavor()
-        self.engines_fixwing = pd.read_csv(fixwing_engine_db, encoding='utf-8')
         self.limits_fixwing = self.__load_all_fixwing_envelop()
-
         self.acs_rotor = self.__load_all_rotor_flavor()
         self.limits_rotor = self.__load_all_rotor_envelop()
-
-        self.actypes_fixwing = list(self.acs_fixwing.keys())
-        self.actypes_rotor = list(self.acs_rotor.keys())
+        return [{mdl: pickle.dumps(data, pickle.HIGHEST_PROTOCOL) for mdl, data in d.items()}
+                for d in (self.acs_fixwing, self.limits_fixwing, self.acs_rotor, self.limits_rotor)]
 
     def __load_all_fixwing_flavor(self):
         import warnings
+        import pandas as pd
         warnings.simplefilter("ignore")
 
         # read fixwing aircraft and engine files
@@ -63,6 +124,7 @@ class Coefficient():
     def __load_all_fixwing_envelop(self):
         """ load aircraft envelop from the model database,
             All unit in SI"""
+        import pandas as pd
         limits_fixwing = {}
         for mdl, ac in self.acs_fixwing.items():
             fenv = fixwing_envelops_dir + mdl.lower() + '.csv'
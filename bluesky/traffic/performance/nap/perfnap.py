@@ -1,3 +1,4 @@
+from itertools import groupby
 import numpy as np
 import bluesky as bs
 from bluesky.tools import aero
@@ -26,8 +27,13 @@ class PerfNAP(PerfBase):
         self.coeff = coeff.Coefficient()
         self.n_ac = 0
 
+        # Flight envelopes per type index and phase, added per type on first use
+        self.limittypes = dict()
+        self.limittable = np.zeros((0, ph.GD + 1, 6))
+
         with RegisterElementParameters(self):
             self.actypes = np.array([], dtype=str)
+            self.typeidx = np.array([], dtype=int)  # type index in limittable
             self.lifttype = np.array([])  # lift type, fixwing [1] or rotor [2]
             self.engnum = np.array([], dtype=int)  # number of engines
             self.engthrust = np.array([])  # static engine thrust
@@ -39,19 +45,28 @@ class PerfNAP(PerfBase):
             self.engpower = np.array([])    # engine power, rotor ac
 
     def create(self, n=1):
-        # cautious! considering multiple created aircraft with same type
-
         super(PerfNAP, self).create(n)
 
-        actype = bs.traf.type[-n]
+        # Aircraft that are created in one batch can have different types:
+        # set the parameters per run of aircraft with the same type
+        start = len(bs.traf.type) - n
+        for actype, group in groupby(bs.traf.type[-n:]):
+            nrun = len(list(group))
+            self.settype(slice(start, start + nrun), actype)
+            start += nrun
 
+        self.n_ac += n
+
+    def settype(self, sel, actype):
+        """ Set the performance parameters of aircraft slice sel, which all
+            have aircraft type actype. """
         # check fixwing or rotor, default fixwing if not found
         if actype in self.coeff.actypes_rotor:
 
-            self.lifttype[-n:] = coeff.LIFT_ROTOR
-            self.mass[-n:] = 0.5 * (self.coeff.acs_rotor[actype]['oew'] + self.coeff.acs_rotor[actype]['mtow'])
-            self.engnum[-n:] = int(self.coeff.acs_rotor[actype]['n_engines'])
-            self.engpower[-n:] = self.coeff.acs_rotor[actype]['engines'][0][1]    # engine power (kW)
+            self.lifttype[sel] = coeff.LIFT_ROTOR
+            self.mass[sel] = 0.5 * (self.coeff.acs_rotor[actype]['oew'] + self.coeff.acs_rotor[actype]['mtow'])
+            self.engnum[sel] = int(self.coeff.acs_rotor[actype]['n_engines'])
+            self.engpower[sel] = self.coeff.acs_rotor[actype]['engines'][0][1]    # engine power (kW)
 
         else:
             # convert to known aircraft type
@@ -63,24 +78,27 @@ class PerfNAP(PerfBase):
             e = es[list(es.keys())[0]]
             coeff_a, coeff_b, coeff_c = thrust.compute_eng_ff_coeff(e['ff_idl'], e['ff_app'], e['ff_co'], e['ff_to'])
 
-            self.lifttype[-n:] = coeff.LIFT_FIXWING
+            self.lifttype[sel] = coeff.LIFT_FIXWING
 
-            self.Sref[-n:] = self.coeff.acs_fixwing[actype]['wa']
-            self.mass[-n:] = 0.5 * (self.coeff.acs_fixwing[actype]['oew'] + self.coeff.acs_fixwing[actype]['mtow'])
+            self.Sref[sel] = self.coeff.acs_fixwing[actype]['wa']
+            self.mass[sel] = 0.5 * (self.coeff.acs_fixwing[actype]['oew'] + self.coeff.acs_fixwing[actype]['mtow'])
 
-            self.engnum[-n:] = int(self.coeff.acs_fixwing[actype]['n_engines'])
+            self.engnum[sel] = int(self.coeff.acs_fixwing[actype]['n_engines'])
 
-            self.ff_coeff_a[-n:] = np.ones(n) * coeff_a
-            self.ff_coeff_b[-n:] = np.ones(n) * coeff_b
-            self.ff_coeff_c[-n:] = np.ones(n) * coeff_c
+            self.ff_coeff_a[sel] = coeff_a
+            self.ff_coeff_b[sel] = coeff_b
+            self.ff_coeff_c[sel] = coeff_c
 
             all_ac_engs = list(self.coeff.acs_fixwing[actype]['engines'].keys())
-            self.engthrust[-n:] = self.coeff.acs_fixwing[actype]['engines'][all_ac_engs[0]]['thr']
-            self.engbpr[-n:] = self.coeff.acs_fixwing[actype]['engines'][all_ac_engs[0]]['bpr']
+            self.engthrust[sel] = self.coeff.acs_fixwing[actype]['engines'][all_ac_engs[0]]['thr']
+            self.engbpr[sel] = self.coeff.acs_fixwing[actype]['engines'][all_ac_engs[0]]['bpr']
 
-        # append update actypes, after removing unkown types
-        self.actypes[-n:] = [actype] * n
-        self.n_ac += n
+        # update actypes, after removing unkown types
+        self.actypes[sel] = actype
+        if actype not in self.limittypes:
+            self.limittypes[actype] = len(self.limittable)
+            self.limittable = np.concatenate((self.limittable, [envelope(self.coeff, actype)]))
+        self.typeidx[sel] = self.limittypes[actype]
 
 
     def delete(self, idx):
@@ -94,7 +112,7 @@ class PerfNAP(PerfBase):
         self.phase = ph.get(self.lifttype, bs.traf.tas, bs.traf.vs, bs.traf.alt, unit='SI')
 
         # update limits, based on phase change
-        limits = self.__construct_limit_matrix(self.actypes, self.phase)
+        limits = self.limittable[self.typeidx, self.phase.astype(int)]
         self.vmin = limits[:, 0]
         self.vmax = limits[:, 1]
         self.vsmin = limits[:, 2]
@@ -152,61 +170,6 @@ class PerfNAP(PerfBase):
         return allow_v_tas, allow_vs, allow_h
 
 
-    def __construct_limit_matrix(self, actypes, phases):
-        """Compute limitations base on aircraft model and phases
-
-        Args:
-            actypes (String or 1D-array): aircraft type / model
-            phases (int or 1D-array): aircraft flight phases
-
-        Returns:
-            2D-array: limitations [spd_min, spd_max, atl_min,
-                alt_max, roc_min, roc_max]
-        """
-
-        nrow = len(actypes)
-        ncol = 6
-
-        # initialize the n_actype x 5 matrix
-        limits = np.zeros((nrow, ncol))
-
-        idx_fixwing = np.where(self.lifttype==coeff.LIFT_FIXWING)[0]
-        unique_fixwing_mdls = np.unique(actypes[idx_fixwing])
-        for mdl in unique_fixwing_mdls:
-            # for each aircraft type construct the speed, roc, and alt limits based on phase
-            limits[:, 0] = np.where((actypes==mdl) & (phases==ph.NA), 0, limits[:, 0])
-            limits[:, 0] = np.where((actypes==mdl) & (phases==ph.TO), self.coeff.limits_fixwing[mdl]['vminto'], limits[:, 0])
-            limits[:, 0] = np.where((actypes==mdl) & (phases==ph.IC), self.coeff.limits_fixwing[mdl]['vminic'], limits[:, 0])
-            limits[:, 0] = np.where((actypes==mdl) & ((phases==ph.CL)|(phases==ph.CR)|(phases==ph.DE)), self.coeff.limits_fixwing[mdl]['vminer'], limits[:, 0])
-            limits[:, 0] = np.where((actypes==mdl) & (phases==ph.AP), self.coeff.limits_fixwing[mdl]['vminap'], limits[:, 0])
-            limits[:, 0] = np.where((actypes==mdl) & (phases==ph.LD), self.coeff.limits_fixwing[mdl]['vminld'], limits[:, 0])
-            limits[:, 0] = np.where((actypes==mdl) & (phases==ph.GD), 0, limits[:, 0])
-
-            limits[:, 1] = np.where((actypes==mdl) & (phases==ph.NA), self.coeff.limits_fixwing[mdl]['vmaxer'], limits[:, 1])
-            limits[:, 1] = np.where((actypes==mdl) & (phases==ph.TO), self.coeff.limits_fixwing[mdl]['vmaxto'], limits[:, 1])
-            limits[:, 1] = np.where((actypes==mdl) & (phases==ph.IC), self.coeff.limits_fixwing[mdl]['vmaxic'], limits[:, 1])
-            limits[:, 1] = np.where((actypes==mdl) & ((phases==ph.CL)|(phases==ph.CR)|(phases==ph.DE)), self.coeff.limits_fixwing[mdl]['vmaxer'], limits[:, 1])
-            limits[:, 1] = np.where((actypes==mdl) & (phases==ph.AP), self.coeff.limits_fixwing[mdl]['vmaxap'], limits[:, 1])
-            limits[:, 1] = np.where((actypes==mdl) & (phases==ph.LD), self.coeff.limits_fixwing[mdl]['vmaxld'], limits[:, 1])
-            limits[:, 1] = np.where((actypes==mdl) & (phases==ph.GD), self.coeff.limits_fixwing[mdl]['vmaxer'], limits[:, 1])
-
-            limits[:, 2] = np.where((actypes==mdl), self.coeff.limits_fixwing[mdl]['vsmin'], limits[:, 2])
-            limits[:, 3] = np.where((actypes==mdl), self.coeff.limits_fixwing[mdl]['vsmax'], limits[:, 3])
-
-            limits[:, 4] = np.where((actypes==mdl), self.coeff.limits_fixwing[mdl]['hmax'], limits[:, 4])
-
-            limits[:, 5] = np.where((actypes==mdl), self.coeff.limits_fixwing[mdl]['axmax'], limits[:, 5])
-
-        idx_rotor = np.where(self.lifttype==coeff.LIFT_ROTOR)[0]
-        unique_rotor_mdls = np.unique(actypes[idx_rotor])
-        for mdl in unique_rotor_mdls:
-            limits[:, 0] = np.where((actypes==mdl), self.coeff.limits_rotor[mdl]['vmin'], limits[:, 0])
-            limits[:, 1] = np.where((actypes==mdl), self.coeff.limits_rotor[mdl]['vmax'], limits[:, 1])
-            limits[:, 2] = np.where((actypes==mdl), self.coeff.limits_rotor[mdl]['vsmin'], limits[:, 2])
-            limits[:, 3] = np.where((actypes==mdl), self.coeff.limits_rotor[mdl]['vsmax'], limits[:, 3])
-            limits[:, 4] = np.where((actypes==mdl), self.coeff.limits_rotor[mdl]['hmax'], limits[:, 4])
-        return limits
-
     def engchange(self, acid, engid=None):
         bs.scr.echo("Engine change not suppoerted in NAP model.")
         pass
@@ -221,3 +184,45 @@ class PerfNAP(PerfBase):
         accs[self.phase!=ph.GD] = acc_air
 
         return accs
+
+
+def envelope(c, mdl):
+    """Compile the flight envelope of one aircraft type
+
+    Args:
+        c (Coefficient): NAP coefficients
+        mdl (String): aircraft type / model
+
+    Returns:
+        2D-array: limits per phase [vmin, vmax, vsmin, vsmax, hmax, axmax]
+    """
+    table = np.zeros((ph.GD + 1, 6))
+    if mdl in c.limits_rotor:
+        lim = c.limits_rotor[mdl]
+        table[:, :5] = [lim['vmin'], lim['vmax'], lim['vsmin'], lim['vsmax'], lim['hmax']]
+        return table
+
+    # Types without envelope use the envelope of the default type
+    lim = c.limits_fixwing[mdl if mdl in c.limits_fixwing else 'A320']
+    table[:, 0] = [0, lim['vminto'], lim['vminic'], lim['vminer'], lim['vminer'],
+                   lim['vminer'], lim['vminap'], lim['vminld'], 0]
+    table[:, 1] = [lim['vmaxer'], lim['vmaxto'], lim['vmaxic'], lim['vmaxer'], lim['vmaxer'],
+                   lim['vmaxer'], lim['vmaxap'], lim['vmaxld'], lim['vmaxer']]
+    table[:, 2:] = [lim['vsmin'], lim['vsmax'], lim['hmax'], lim['axmax']]
+    return table
+
+
+def compile_limits(c):
+    """Compile the flight envelopes of all aircraft types into one table
+
+    Args:
+        c (Coefficient): NAP coefficients
+
+    Returns:
+        dict: type index of each aircraft type
+        3D-array: limits per type index and phase [vmin, vmax, vsmin,
+            vsmax, hmax, axmax]
+    """
+    actypes = c.actypes_fixwing + c.actypes_rotor
+    table = np.array([envelope(c, mdl) for mdl in actypes])
+    return {mdl: i for i, mdl in enumerate(actypes)}, table
@@ -8,6 +8,7 @@ from bluesky.tools.misc import degto180
 from bluesky.tools.position import txt2pos
 from bluesky import stack
 from bluesky.stack import Argparser
+from .routestore import store, Field
 
 # Register settings defaults
 bs.settings.set_variable_defaults(log_path='output')
@@ -33,17 +34,28 @@ class Route:
     calcwp   = 4   # Calculated waypoint (T/C, T/D, A/C)
     runway   = 5   # Runway: Copy name and positions
 
+    # Waypoint data, stored in the route store (see routestore.py), and
+    # accessible per field as a list
+    wpname   = Field('name')
+    wptype   = Field('type')
+    wplat    = Field('lat')
+    wplon    = Field('lon')
+    wpalt    = Field('alt')     # [m] negative value means not specified
+    wpspd    = Field('spd')     # [m/s] negative value means not specified
+    wpflyby  = Field('flyby')   # Flyby (True)/flyover(False) switch
+
+    # Flight plan calculation table, see calcfp
+    wpdirfrom = Field('dirfrom')
+    wpdistto  = Field('distto')
+    wpialt    = Field('ialt')
+    wptoalt   = Field('toalt')
+    wpxtoalt  = Field('xtoalt')
+
     def __init__(self):
         self.nwp    = 0
 
         # Waypoint data
-        self.wpname = []
-        self.wptype = []
-        self.wplat  = []
-        self.wplon  = []
-        self.wpalt  = []    # [m] negative value means not specified
-        self.wpspd  = []    # [m/s] negative value means not specified
-        self.wpflyby = []   # Flyby (True)/flyover(False) switch
+        store.register(self)
 
         # Current actual waypoint
         self.iactwp = -1
@@ -54,8 +66,7 @@ class Route:
         # default: False
         self.flag_landed_runway = False
 
-        self.iac = self.wpdirfrom = self.wpdistto = self.wpialt = \
-            self.wptoalt = self.wpxtoalt = None
+        self.iac = None
 
     @staticmethod
     def get_available_name(data, name_, len_=2):
@@ -452,21 +463,11 @@ class Route:
         wplon = (wplon + 180.) % 360. - 180.
 
         if overwrt:
-            self.wpname[wpidx] = wpname
-            self.wplat[wpidx] = wplat
-            self.wplon[wpidx] = wplon
-            self.wpalt[wpidx] = wpalt
-            self.wpspd[wpidx] = wpspd
-            self.wptype[wpidx] = wptype
-            self.wpflyby[wpidx] = swflyby
+            store.set(self, wpidx % self._n, name=wpname, lat=wplat, lon=wplon,
+                      alt=wpalt, spd=wpspd, type=wptype, flyby=swflyby)
         else:
-            self.wpname.insert(wpidx, wpname)
-            self.wplat.insert(wpidx, wplat)
-            self.wplon.insert(wpidx, wplon)
-            self.wpalt.insert(wpidx, wpalt)
-            self.wpspd.insert(wpidx, wpspd)
-            self.wptype.insert(wpidx, wptype)
-            self.wpflyby.insert(wpidx, swflyby)
+            store.insert(self, wpidx, name=wpname, lat=wplat, lon=wplon,
+                         alt=wpalt, spd=wpspd, type=wptype, flyby=swflyby)
 
 
     def addwpt(self, iac, name, wptype, lat, lon, alt=-999., spd=-999., afterwp="", beforewp=""):
@@ -800,6 +801,54 @@ class Route:
                self.wpxtoalt[self.iactwp],self.wptoalt[self.iactwp],\
                lnavon,self.wpflyby[self.iactwp], nextqdr
 
+    @staticmethod
+    def getnextwps(routes):
+        """Go to the next waypoint of each route in routes, and return the
+           data of the new active waypoints as arrays (see getnextwp)"""
+        n      = len(routes)
+        offset = fromiter((r._offset for r in routes), dtype=int, count=n)
+        nwp    = fromiter((r.nwp for r in routes), dtype=int, count=n)
+        nrows  = fromiter((r._n for r in routes), dtype=int, count=n)
+        iactwp = fromiter((r.iactwp for r in routes), dtype=int, count=n)
+
+        # Routes that are landing or without active waypoint use getnextwp
+        scalar = fromiter((r.flag_landed_runway for r in routes), dtype=bool, count=n) | \
+            (iactwp < 0) | (iactwp >= nrows)
+
+        lnavon = (iactwp + 1 < minimum(nwp, nrows)) & ~scalar
+        iactwp = iactwp + lnavon
+        iact   = where(scalar, 0, offset + iactwp)
+        wp     = store.data[iact]
+
+        # Bearing of the next leg
+        hasnext = (iactwp < minimum(nwp, nrows) - 1) & ~scalar
+        nextqdr = full(n, -999.)
+        if hasnext.any():
+            inext = iact[hasnext] + 1
+            nextqdr[hasnext], _ = geo.qdrdist(wp['lat'][hasnext], wp['lon'][hasnext],
+                                              store.data['lat'][inext], store.data['lon'][inext])
+
+        # in case that there is a runway, the aircraft should remain on it
+        # instead of deviating to the airport centre
+        # When there is a destination: current = runway, next  = Dest
+        # Else: current = runway and this is also the last waypoint
+        ilast  = offset + maximum(nrows - 1, 0)
+        landed = ~scalar & (wp['type'] == Route.runway) & \
+            ((wp['name'] == store.data['name'][ilast]) |
+             (store.data['type'][minimum(iact + 1, ilast)] == Route.dest))
+
+        data = [wp['lat'], wp['lon'], wp['alt'], wp['spd'], wp['xtoalt'],
+                wp['toalt'], lnavon, wp['flyby'], nextqdr]
+        data = [array(v, dtype=float) for v in data]
+        for i, r in enumerate(routes):
+            if scalar[i]:
+                for v, value in zip(data, r.getnextwp()):
+                    v[i] = value
+            else:
+                r.iactwp = int(iactwp[i])
+                r.flag_landed_runway = bool(landed[i])
+        return data
+
     def delrte(self):
         """Delete complete route"""
         # Simple re-initilize this route as empty
@@ -826,12 +875,7 @@ class Route:
             return False, "Waypoint " + delwpname + " not found"
 
         self.nwp -= 1
-        del self.wpname[idx]
-        del self.wplat[idx]
-        del self.wplon[idx]
-        del self.wpalt[idx]
-        del self.wpspd[idx]
-        del self.wptype[idx]
+        store.delete(self, idx)
         if self.iactwp > idx:
             self.iactwp = max(0, self.iactwp - 1)
 
@@ -964,22 +1008,14 @@ class Route:
                 lat = f*self.wplat[j]+(1.-f)*self.wplat[j+1]
                 lon = f*self.wplon[j]+(1.-f)*self.wplon[j+1]
 
-                self.wpname.insert(j,name[i])
-                self.wptype.insert(j,Route.calcwp)
-                self.wplat.insert(j,lat)
-                self.wplon.insert(j,lon)
-                self.wpalt.insert(j,alt[i])
-                self.wpspd.insert(j,-999.)
+                store.insert(self, j, name=name[i], type=Route.calcwp,
+                             lat=lat, lon=lon, alt=alt[i], spd=-999.)
 
     def insertcalcwp(self, i, name):
         """Insert empty wp with no attributes at location i"""
 
-        self.wpname.insert(i,name)
-        self.wplat.insert(i,0.)
-        self.wplon.insert(i,0.)
-        self.wpalt.insert(i,-999.)
-        self.wpspd.insert(i,-999.)
-        self.wptype.insert(i,Route.calcwp)
+        store.insert(self, i, name=name, lat=0., lon=0., alt=-999., spd=-999.,
+                     type=Route.calcwp)
 
     def calcfp(self):
         """Do flight plan calculations"""
@@ -989,57 +1025,44 @@ class Route:
         # Direction to waypoint
         self.nwp = len(self.wpname)
 
-        # Create flight plan calculation table
-        self.wpdirfrom   = self.nwp*[0.]
-        self.wpdistto    = self.nwp*[0.]
-        self.wpialt      = self.nwp*[-1]
-        self.wptoalt     = self.nwp*[-999.]
-        self.wpxtoalt    = self.nwp*[1.]
-
-        # No waypoints: make empty variables to be safe and return: nothing to do
+        # No waypoints: nothing to do
         if self.nwp==0:
             return
 
+        # Flight plan calculation table
+        wp = store.rows(self)
+
         # Calculate lateral leg data
         # LNAV: Calculate leg distances and directions
-
-        for i in range(0, self.nwp - 1):
-            qdr,dist = geo.qdrdist(self.wplat[i]  ,self.wplon[i],
-                                self.wplat[i+1],self.wplon[i+1])
-            self.wpdirfrom[i] = qdr
-            self.wpdistto[i+1]  = dist #[nm]  distto is in nautical miles
-
+        wp['dirfrom'] = 0.
+        wp['distto']  = 0.
         if self.nwp>1:
-            self.wpdirfrom[-1] = self.wpdirfrom[-2]
+            qdr, dist = geo.qdrdist(wp['lat'][:-1], wp['lon'][:-1],
+                                    wp['lat'][1:], wp['lon'][1:])
+            wp['dirfrom'][:-1] = qdr
+            wp['dirfrom'][-1]  = qdr[-1]
+            wp['distto'][1:]   = dist  #[nm]  distto is in nautical miles
 
         # Calclate longitudinal leg data
         # VNAV: calc next altitude constraint: index, altitude and distance to it
-        ialt = -1
-        toalt = -999.
-        xtoalt = 0.
-        for i in range(self.nwp-1,-1,-1):
-
-            # waypoint with altitude constraint (dest of al specified)
-            if self.wptype[i]==Route.dest:
-                ialt   = i
-                toalt  = 0.
-                xtoalt = 0.                # [m]
-
-            elif self.wpalt[i] >= 0:
-                ialt   = i
-                toalt  = self.wpalt[i]
-                xtoalt = 0.                # [m]
-
-            # waypoint with no altitude constraint:keep counting
-            else:
-                if i!=self.nwp-1:
-                    xtoalt += self.wpdistto[i+1]*nm  # [m] xtoalt is in meters!
-                else:
-                    xtoalt = 0.0
+        # Waypoints with altitude constraint (dest or alt specified)
+        isdest = wp['type'] == Route.dest
+        hasalt = isdest | (wp['alt'] >= 0.)
+
+        # Index of the next waypoint with an altitude constraint, the
+        # number of waypoints when there is none
+        ialt = where(hasalt, arange(self.nwp), self.nwp)
+        ialt = minimum.accumulate(ialt[::-1])[::-1]
+        found = ialt < self.nwp
+
+        # Distance along the route to the next constraint (or to the last
+        # waypoint when there is none)
+        dist2go = cumsum(wp['distto']) * nm  # [m] xtoalt is in meters!
+        ito = where(found, ialt, self.nwp - 1)
 
-            self.wpialt[i]   = ialt
-            self.wptoalt[i]  = toalt   #[m]
-            self.wpxtoalt[i] = xtoalt  #[m]
+        wp['ialt']   = where(found, ialt, -1)
+        wp['toalt']  = where(found, where(isdest, 0., wp['alt'])[ito], -999.)  #[m]
+        wp['xtoalt'] = dist2go[ito] - dist2go  #[m]
 
     def findact(self,i):
         """ Find best default active waypoint.
@@ -1054,8 +1077,8 @@ class Route:
             return 0
 
         # Find closest
-        wplat  = array(self.wplat)
-        wplon  = array(self.wplon)
+        wplat  = store.rows(self)['lat']
+        wplon  = store.rows(self)['lon']
         dy = (wplat - bs.traf.lat[i])
         dx = (wplon - bs.traf.lon[i]) * bs.traf.coslat[i]
         dist2 = dx*dx + dy*dy
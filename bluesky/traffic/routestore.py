@@ -0,0 +1,220 @@
+""" Flat storage of the flight plans of all aircraft.
+
+    The waypoints of all routes are stored in one structured numpy array, in
+    which each route owns a contiguous block of rows (offset and size). A
+    route uses the first n rows of its block, and moves to a new, larger
+    block at the end of the store when it runs out of rows. Blocks that are
+    no longer used are reclaimed when the store grows, by compacting the
+    blocks of the remaining routes. Waypoint names are interned: the store
+    contains an index in the table of names.
+
+    Route objects use the store through WaypointField objects, which behave
+    like the per-route lists of waypoint data that they replace. """
+import weakref
+import numpy as np
+
+# Waypoint data fields, and their value for a new waypoint
+wpfields = (('name',    np.int32,   0),
+            ('type',    np.int8,    0),
+            ('lat',     np.float64, 0.0),
+            ('lon',     np.float64, 0.0),
+            ('alt',     np.float64, -999.0),   # [m] negative: not specified
+            ('spd',     np.float64, -999.0),   # [m/s] negative: not specified
+            ('flyby',   np.bool_,   True),
+            ('dirfrom', np.float64, 0.0),      # [deg] leg bearing
+            ('distto',  np.float64, 0.0),      # [nm] leg distance
+            ('ialt',    np.int32,   -1),       # Index of next alt constraint
+            ('toalt',   np.float64, -999.0),   # [m] next altitude constraint
+            ('xtoalt',  np.float64, 1.0))      # [m] distance to it
+
+wpdtype   = np.dtype([(name, dtype) for name, dtype, _ in wpfields])
+wpdefault = np.array(tuple(value for _, _, value in wpfields), dtype=wpdtype)
+
+
+class RouteStore(object):
+    ''' Storage of the waypoints of all routes. '''
+    def __init__(self, capacity=1024):
+        self.data     = np.zeros(capacity, dtype=wpdtype)
+        self.end      = 0  # First row that is not in a block
+        self.routes   = weakref.WeakSet()
+        self.names    = ['']
+        self.nameidx  = {'': 0}
+
+    def intern(self, name):
+        ''' Return the index of name in the table of waypoint names. '''
+        idx = self.nameidx.get(name)
+        if idx is None:
+            idx = self.nameidx[name] = len(self.names)
+            self.names.append(name)
+        return idx
+
+    def register(self, route):
+        ''' Give route an empty block. '''
+        route._offset = route._size = route._n = 0
+        self.routes.add(route)
+
+    def reserve(self, route, n):
+        ''' Make sure that the block of route has at least n rows. '''
+        if n <= route._size:
+            return
+        # A route at the end of the store can grow in place
+        size = max(n, 2 * route._size, 4)
+        if route._offset + route._size == self.end and \
+                route._offset + size <= len(self.data):
+            self.end = route._offset + size
+            route._size = size
+            return
+
+        if self.end + size > len(self.data):
+            self.compact(size)
+        offset = self.end
+        self.data[offset:offset + route._n] = \
+            self.data[route._offset:route._offset + route._n]
+        route._offset, route._size = offset, size
+        self.end = offset + size
+
+    def compact(self, extra=0):
+        ''' Move the blocks of all routes to the start of a new array,
+            with room for at least extra more rows. '''
+        routes   = sorted(self.routes, key=lambda r: r._offset)
+        used     = sum(r._size for r in routes)
+        capacity = max(len(self.data), 2 * (used + extra))
+        data     = np.zeros(capacity, dtype=wpdtype)
+        offset   = 0
+        for r in routes:
+            data[offset:offset + r._n] = self.data[r._offset:r._offset + r._n]
+            r._offset = offset
+            offset += r._size
+        self.data = data
+        self.end  = offset
+
+    def insert(self, route, i, **values):
+        ''' Insert a waypoint in route before index i. '''
+        self.reserve(route, route._n + 1)
+        start = route._offset + i
+        stop  = route._offset + route._n
+        self.data[start + 1:stop + 1] = self.data[start:stop]
+        self.data[start] = wpdefault
+        route._n += 1
+        self.set(route, i, **values)
+
+    def set(self, route, i, **values):
+        ''' Set the waypoint data of waypoint i of route. '''
+        for name, value in values.items():
+            self.data[name][route._offset + i] = \
+                self.intern(value) if name == 'name' else value
+
+    def delete(self, route, i):
+        ''' Delete waypoint i of route. '''
+        start = route._offset + i
+        stop  = route._offset + route._n
+        self.data[start:stop - 1] = self.data[start + 1:stop]
+        route._n -= 1
+
+    def clear(self, route):
+        ''' Delete all waypoints of route. '''
+        route._n = 0
+
+    def rows(self, route):
+        ''' Return the waypoints of route, as a view on the store. '''
+        return self.data[route._offset:route._offset + route._n]
+
+
+# The route store of this simulation
+store = RouteStore()
+
+
+class WaypointField(object):
+    ''' List-like view on one field of the waypoints of one route. '''
+    __slots__ = ('route', 'field')
+    __hash__  = None
+
+    def __init__(self, route, field):
+        self.route = route
+        self.field = field
+
+    def array(self):
+        ''' Return the field as a numpy view on the store. '''
+        return store.rows(self.route)[self.field]
+
+    def tolist(self):
+        values = self.array().tolist()
+        if self.field == 'name':
+            return [store.names[i] for i in values]
+        return values
+
+    def __len__(self):
+        return self.route._n
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __array__(self, dtype=None):
+        if self.field == 'name':
+            return np.array(self.tolist(), dtype=dtype)
+        return np.array(self.array(), dtype=dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.tolist()[key]
+        if key < -self.route._n or key >= self.route._n:
+            raise IndexError('waypoint index out of range')
+        value = self.array()[key].item()
+        return store.names[value] if self.field == 'name' else value
+
+    def __setitem__(self, key, value):
+        if key < -self.route._n or key >= self.route._n:
+            raise IndexError('waypoint index out of range')
+        store.set(self.route, key % self.route._n, **{self.field: value})
+
+    def __eq__(self, other):
+        if isinstance(other, WaypointField):
+            other = other.tolist()
+        return self.tolist() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __contains__(self, value):
+        if self.field == 'name':
+            idx = store.nameidx.get(value)
+            return idx is not None and bool((self.array() == idx).any())
+        return value in self.tolist()
+
+    def count(self, value):
+        if self.field == 'name':
+            idx = store.nameidx.get(value)
+            return 0 if idx is None else int((self.array() == idx).sum())
+        return self.tolist().count(value)
+
+    def index(self, value):
+        if self.field == 'name':
+            idx = store.nameidx.get(value, -1)
+            found = np.flatnonzero(self.array() == idx)
+            if len(found) == 0:
+                raise ValueError('%s is not in route' % value)
+            return int(found[0])
+        return self.tolist().index(value)
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+
+class Field(object):
+    ''' Descriptor of a waypoint data field of a Route. '''
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, route, owner):
+        if route is None:
+            return self
+        return WaypointField(route, self.field)
+
+    def __set__(self, route, values):
+        values = list(values)
+        if len(values) != route._n:
+            raise ValueError('Route has %d waypoints, got %d values' %
+                             (route._n, len(values)))
+        if self.field == 'name':
+            values = [store.intern(v) for v in values]
+        store.rows(route)[self.field] = values
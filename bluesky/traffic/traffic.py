@@ -54,6 +54,8 @@ class Traffic(TrafficArrays):
         Traffic()            :  constructor
         reset()              :  Reset traffic database w.r.t a/c data
         create(acid,actype,aclat,aclon,achdg,acalt,acspd) : create aircraft
+        cre(acid,actype,aclat,aclon,achdg,acalt,acspd) : create a batch of aircraft
+        mcre(n)              : create n random aircraft
         delete(acid)         : delete an aircraft from traffic data
         deletall()           : delete all traffic
         update(sim)          : do a numerical integration step
@@ -178,6 +180,9 @@ class Traffic(TrafficArrays):
         super(Traffic, self).reset()
         self.ntraf = 0
 
+        # Callsign to index map, for fast lookups in id2idx
+        self.idxmap = dict()
+
         # Reset models
         self.wind.clear()
 
@@ -190,57 +195,87 @@ class Traffic(TrafficArrays):
         # Reset transition level to default value
         self.translvl = 5000.*ft
 
-    def create(self, n=1, actype="B744", acalt=None, acspd=None, dest=None,
-                aclat=None, aclon=None, achdg=None, acid=None):
-        """ Create multiple random aircraft in a specified area """
+    def mcre(self, n, actype="B744", acalt=None, acspd=None, dest=None):
+        """ Create multiple random aircraft in the current view """
         area = bs.scr.getviewbounds()
-        if acid is None:
-            idtmp = chr(randint(65, 90)) + chr(randint(65, 90)) + '{:>05}'
-            acid = [idtmp.format(i) for i in range(n)]
-
 
-        elif isinstance(acid, str):
-            # Check if not already exist
-            if self.id.count(acid.upper()) > 0:
-                return False, acid + " already exists."  # already exists do nothing
+        idtmp = chr(randint(65, 90)) + chr(randint(65, 90)) + '{:>05}'
+        acid  = [idtmp.format(i) for i in range(n)]
 
+        aclat = np.random.rand(n) * (area[1] - area[0]) + area[0]
+        aclon = np.random.rand(n) * (area[3] - area[2]) + area[2]
+        achdg = np.random.randint(1, 360, n)
 
-            acid = [acid]
+        if acalt is None:
+            acalt = np.random.randint(2000, 39000, n) * ft
 
-        if isinstance(actype, str):
-            actype = n * [actype]
+        if acspd is None:
+            acspd = np.random.randint(250, 450, n) * kts
 
-        super(Traffic, self).create(n)
+        return self.cre(acid, actype or "B744", aclat, aclon, achdg, acalt, acspd)
 
-        # Increase number of aircraft
-        self.ntraf += n
+    def create(self, acid=None, actype="B744", aclat=None, aclon=None, achdg=None, acalt=None, casmach=None, acmass=None):
+        """Create an aircraft"""
+        return self.cre([acid], actype, aclat, aclon, achdg, acalt, casmach, acmass)
+
+    def cre(self, acid, actype, aclat, aclon, achdg, acalt, casmach, acmass=None):
+        """ Create one or more aircraft in one batch.
+
+            acid is a list of callsigns (None or '*' for a default callsign),
+            the other arguments are lists/arrays with a value per aircraft,
+            or a single value for all aircraft. Aircraft with missing
+            arguments or an existing callsign are not created. """
+        n = len(acid)
+        actype, aclat, aclon, achdg, acalt, casmach, acmass = \
+            [list(v) if isinstance(v, (list, tuple, np.ndarray)) else n * [v]
+             for v in (actype, aclat, aclon, achdg, acalt, casmach, acmass)]
+
+        # Check the aircraft, and catch missing acids, replace by a default
+        errors = []
+        newids = set()
+        keep   = []
+        flno   = 204
+        for i, acidi in enumerate(acid):
+            if acidi is None or acidi == "*":
+                while "KL" + str(flno) in self.idxmap or "KL" + str(flno) in newids:
+                    flno = flno + 1
+                acidi = "KL" + str(flno)
+
+            acidi = acidi.upper()
+            if None in [actype[i], aclat[i], aclon[i], achdg[i], acalt[i], casmach[i]]:
+                errors.append("CRE: Missing one or more arguments:" \
+                              "acid,actype,aclat,aclon,achdg,acalt,acspd")
+            elif acidi in self.idxmap or acidi in newids:
+                errors.append(acidi + " already exists.")  # already exists do nothing
+            else:
+                newids.add(acidi)
+                keep.append((i, acidi))
 
-        if aclat is None:
-            aclat = np.random.rand(n) * (area[1] - area[0]) + area[0]
+        if not keep:
+            return False, '\n'.join(errors)
 
-        if aclon is None:
-            aclon = np.random.rand(n) * (area[3] - area[2]) + area[2]
+        n      = len(keep)
+        idx    = [i for i, _ in keep]
+        acid   = [acidi for _, acidi in keep]
+        actype = [actype[i] for i in idx]
+        aclat, aclon, achdg, acalt, casmach, acmass = \
+            [np.array([v[i] for i in idx], dtype=float)
+             for v in (aclat, aclon, achdg, acalt, casmach, acmass)]
 
         # Limit longitude to [-180.0, 180.0]
-        if n == 1:
-            aclon = aclon - 360 if aclon > 180 else \
-                    aclon + 360 if aclon < -180.0 else aclon
-        else:
-            aclon[aclon > 180.0] -= 360.0
-            aclon[aclon < -180.0] += 360.0
-
-        if achdg is None:
-            achdg = np.random.randint(1, 360, n)
+        aclon[aclon > 180.0]  -= 360.0
+        aclon[aclon < -180.0] += 360.0
 
-        if acalt is None:
-            acalt = np.random.randint(2000, 39000, n) * ft
+        super(Traffic, self).create(n)
 
-        if acspd is None:
-            acspd = np.random.randint(250, 450, n) * kts
+        # Increase number of aircraft
+        self.ntraf += n
 
         # Aircraft Info
         self.id[-n:]   = acid
         self.type[-n:] = actype
+        self.idxmap.update((acidi, i) for i, acidi in
+                           enumerate(acid, self.ntraf - n))
 
         # Positions
         self.lat[-n:]  = aclat
@@ -250,8 +285,11 @@ class Traffic(TrafficArrays):
         self.hdg[-n:]  = achdg
         self.trk[-n:]  = achdg
 
+        # Aircraft weight
+        self.mass[-n:] = acmass
+
         # Velocities
-        self.tas[-n:], self.cas[-n:], self.M[-n:] = vcasormach(acspd, acalt)
+        self.tas[-n:], self.cas[-n:], self.M[-n:] = vcasormach(casmach, acalt)
         self.gs[-n:]      = self.tas[-n:]
         hdgrad = np.radians(achdg)
         self.gsnorth[-n:] = self.tas[-n:] * np.cos(hdgrad)
@@ -285,7 +323,7 @@ class Traffic(TrafficArrays):
         self.selalt[-n:] = self.alt[-n:]
 
         # Display information on label
-        self.label[-n:] = n*[['', '', '', 0]]
+        self.label[-n:] = [['', '', '', 0] for _ in range(n)]
 
         # Miscallaneous
         self.coslat[-n:] = np.cos(np.radians(aclat))  # Cosine of latitude for flat-earth aproximations
@@ -295,95 +333,11 @@ class Traffic(TrafficArrays):
         # manually in Traffic.
         self.create_children(n)
 
-# <<<<<<< HEAD
-    def create(self, acid=None, actype="B744", aclat=None, aclon=None, achdg=None, acalt=None, casmach=None, acmass=None):
-        """Create an aircraft"""
-        # Catch missing acid, replace by a default
-        if acid is None or acid == "*":
-            acid = "KL204"
-            flno = 204
-            while self.id.count(acid) > 0:
-                flno = flno + 1
-                acid = "KL" + str(flno)
-
-        # Check for (other) missing arguments
-        if None in [actype, aclat, aclon, achdg, acalt, casmach]:
-            return False, "CRE: Missing one or more arguments:" \
-                          "acid,actype,aclat,aclon,achdg,acalt,acspd"
-
-        # Check if not already exist
-        if self.id.count(acid.upper()) > 0:
-            return False, acid + " already exists."  # already exists do nothing
-
-        super(Traffic, self).create()
-
-        # Increase number of aircraft
-        self.ntraf = self.ntraf + 1
-
-        # Aircraft Info
-        self.id[-1]   = acid.upper()
-        self.type[-1] = actype
-
-        # Positions
-        self.lat[-1]  = aclat
-        self.lon[-1]  = aclon
-        self.alt[-1]  = acalt
-
-        self.hdg[-1]  = achdg
-        self.trk[-1]  = achdg
-
-
-        # Aircraft weight
-        self.mass[-1]= acmass
-
-        # Velocities
-        self.tas[-1], self.cas[-1], self.M[-1] = casormach(casmach, acalt)
-        self.gs[-1]      = self.tas[-1]
-        self.gsnorth[-1] = self.tas[-1] * cos(radians(self.hdg[-1]))
-        self.gseast[-1]  = self.tas[-1] * sin(radians(self.hdg[-1]))
-
-        # Atmosphere
-        self.p[-1], self.rho[-1], self.Temp[-1] = vatmos(acalt)
-
-        # Wind
-        if self.wind.winddim > 0:
-            vnwnd, vewnd     = self.wind.getdata(self.lat[-1], self.lon[-1], self.alt[-1])
-            self.gsnorth[-1] = self.gsnorth[-1] + vnwnd
-            self.gseast[-1]  = self.gseast[-1]  + vewnd
-            self.trk[-1]     = np.degrees(np.arctan2(self.gseast[-1], self.gsnorth[-1]))
-            self.gs[-1]      = np.sqrt(self.gsnorth[-1]**2 + self.gseast[-1]**2)
-
-        # Traffic performance data
-        #(temporarily default values)
-        self.apvsdef[-1] = 1500. * fpm  # default vertical speed of autopilot
-        self.aphi[-1]    = radians(25.)  # bank angle setting of autopilot
-        self.ax[-1]      = 1.0*kts       # absolute value of longitudinal acceleration
-        self.bank[-1]    = radians(25.)
-
-        # Crossover altitude
-        self.abco[-1]   = 0  # not necessary to overwrite 0 to 0, but leave for clarity
-        self.belco[-1]  = 1
-
-        # Traffic autopilot settings
-        self.selspd[-1] = self.cas[-1]
-        self.aptas[-1]  = self.tas[-1]
-        self.selalt[-1] = self.alt[-1]
-
-        # Display information on label
-        self.label[-1] = ['', '', '', 0]
-
-        # Miscallaneous
-        self.coslat[-1] = cos(radians(aclat))  # Cosine of latitude for flat-earth aproximations
-        self.eps[-1] = 0.01
-
-        # Finally call create for child TrafficArrays. This only needs to be done
-        # manually in Traffic.
-        self.create_children()
+        if errors:
+            return False, '\n'.join(errors)
 
         return True
 
-# =======
-# >>>>>>> upstream/master
     def creconfs(self, acid, actype, targetidx, dpsi, cpa, tlosh, dH=None, tlosv=None, spd=None):
         latref  = self.lat[targetidx]  # deg
         lonref  = self.lon[targetidx]  # deg
@@ -431,7 +385,7 @@ class Traffic(TrafficArrays):
         achdg      = degrees(atan2(tase, tasn))
 
         # Create and, when necessary, set vertical speed
-        self.create(1, actype, acalt, acspd, None, aclat, aclon, achdg, acid)
+        self.cre([acid], actype, aclat, aclon, achdg, acalt, acspd)
         self.ap.selaltcmd(len(self.lat) - 1, altref, acvs)
         self.vs[-1] = acvs
 
@@ -441,9 +395,20 @@ class Traffic(TrafficArrays):
         if isinstance(idx, collections.abc.Collection):
             idx.sort()
 
+        # Remove the deleted aircraft from the callsign map
+        idxlist = np.atleast_1d(idx)
+        if len(idxlist) == 0:
+            return True
+        for i in idxlist:
+            self.idxmap.pop(self.id[i], None)
+
         # Call the actual delete function
         super(Traffic, self).delete(idx)
 
+        # Aircraft behind the first deleted aircraft have shifted down
+        for i in range(int(idxlist.min()), len(self.id)):
+            self.idxmap[self.id[i]] = i
+
         # Update conditions list
         self.cond.delac(idx)
 
@@ -552,18 +517,13 @@ class Traffic(TrafficArrays):
         if not isinstance(acid, str):
 
             # id2idx is called for multiple id's
-            # Fast way of finding indices of all ACID's in a given list
-            tmp = dict((v, i) for i, v in enumerate(self.id))
-            return [tmp.get(acidi, -1) for acidi in acid]
+            return [self.idxmap.get(acidi, -1) for acidi in acid]
         else:
              # Catch last created id (* or # symbol)
             if acid in ('#','*'):
                 return self.ntraf-1
 
-            try:
-                return self.id.index(acid.upper())
-            except:
-                return -1
+            return self.idxmap.get(acid.upper(), -1)
 
     def setNoise(self, noise=None):
         """Noise (turbulence, ADBS-transmission noise, ADSB-truncated effect)"""
@@ -738,7 +698,7 @@ class Traffic(TrafficArrays):
 
 
                     # How many others?
-                    nother = bs.navdb.wpid.count(wp)-len(iwps)
+                    nother = len(bs.navdb.wpnameidx.get(wp, []))-len(iwps)
                     if nother>0:
                         verb = ["is ","are "][min(1,max(0,nother-1))]
                         lines = lines +"\nThere "+verb + str(nother) +\
@@ -1,7 +1,8 @@
 """ Wind implementation for BlueSky."""
 from numpy import array, sin, cos, arange, radians, ones, append, ndarray, \
                   amin, minimum, repeat, delete, zeros, around, maximum, floor, \
-                  interp, pi
+                  interp, pi, asarray, clip, diff, allclose, stack, einsum, \
+                  ascontiguousarray
 
 from bluesky.tools.aero import ft
 
@@ -23,6 +24,10 @@ class Windfield():
 
             remove(idx) = remove a defined profile using the index
 
+            setgrid(lat,lon,alt,vnorth,veast)
+                       = replace the wind vectors by a regular lat/lon/alt
+                         grid, which is interpolated trilinearly
+
         Members:
             lat(nvec)          = latitudes of wind definitions
             lon(nvec)          = longitudes of wind definitions
@@ -37,6 +42,12 @@ class Windfield():
                           2 = 2D field (no alt profiles),
                           3 = 3D field (alt dependent wind at some points)
 
+            grid      = Gridded wind field, or None when the wind vectors
+                        above are used
+
+        The inverse-distance weights of the wind vectors are kept for the last
+        aircraft positions, so that they are only recomputed when the
+        positions or the wind vectors change.
     """
     def __init__(self):
         # For altitude use fixed axis to allow vectorisation later
@@ -65,6 +76,9 @@ class Windfield():
         self.vnorth  = array([[]])
         self.veast   = array([[]])
         self.nvec    = 0
+        self.iprof   = []
+        self.grid    = None
+        self.weights = None
         return
 
     def addpoint(self,lat,lon,winddir,windspd,windalt=None):
@@ -95,7 +109,11 @@ class Windfield():
             vnaxis = interp(self.altaxis, alttab, altvn)
             veaxis = interp(self.altaxis, alttab, altve)
 
-#        print array([vnaxis]).transpose()
+        # A wind vector replaces a gridded wind field
+        if self.grid is not None:
+            self.clear()
+
+        self.weights = None
         self.lat    = append(self.lat,lat)
         self.lon    = append(self.lon,lon)
 
@@ -151,32 +169,20 @@ class Windfield():
             vnorth = ones(npos)*self.vnorth[0,0]
             veast  = ones(npos)*self.veast[0,0]
 
-        elif self.winddim >= 2: # 2D/3D field = more points defined but no altitude profile
-
-            #---- Get horizontal weight factors
+        elif self.grid is not None: # Gridded field: trilinear interpolation
+            vnorth, veast = self.grid.interpolate(lat[0], lon[0], alt)
 
-            # Average cosine for flat-eartyh approximation
-            cavelat = cos(radians(0.5*(lat+array([self.lat]).transpose())))
-
-            # Lat and lon distance in 60 nm units (1 lat degree)
-            dy = lat - array([self.lat]).transpose() #(nvec,npos)
-            dx = cavelat*(lon - array([self.lon]).transpose())
-
-            # Calulate invesre distance squared
-            invd2   = 1./(eps+dx*dx+dy*dy) # inverse of distance squared
-
-            # Normalize weights
-            sumsid2 = ones((1,self.nvec)).dot(invd2) # totals to normalize weights
-            totals = repeat(sumsid2,self.nvec,axis=0) # scale up dims to (nvec,npos)
+        elif self.winddim >= 2: # 2D/3D field = more points defined but no altitude profile
 
-            horfact = invd2/totals # rows x col = nvec x npos, weight factors
+            #---- Get horizontal weight factors (npos x nvec)
+            horfact = self.getweights(lat, lon)
 
             #---- Altitude interpolation
 
             # No altitude profiles used: do 2D planar interpolation only
-            if self.winddim == 2 or useralt==None: # 2D field no altitude interpolation
-                vnorth  = self.vnorth[0,:].dot(horfact)
-                veast   = self.veast[0,:].dot(horfact)
+            if self.winddim == 2 or useralt is None: # 2D field no altitude interpolation
+                vnorth  = horfact.dot(self.vnorth[0,:])
+                veast   = horfact.dot(self.veast[0,:])
 
             # 3D interpolation as one or more points contain altitude profile
             else:
@@ -185,21 +191,19 @@ class Windfield():
                 idxalt = maximum(0., minimum(self.altaxis[-1]-eps, alt) / self.altstep) # find right index
 
                 # Convert to index and factor
-                ialt   = floor(idxalt).astype(int) # index array for lower altitude
+                ialt   = minimum(floor(idxalt).astype(int), self.nalt - 2) # index array for lower altitude
                 falt   = idxalt-ialt  # factor for upper value
 
                 # Altitude interpolation combined with horizontal
-                nvec   = len(self.lon) # Get number of definition points
-
                 # North wind (y-direction ot lat direction)
-                vn0    = (self.vnorth[ialt,:]*horfact.T).dot(ones((nvec,1))) # hor interpolate lower alt (npos x)
-                vn1    = (self.vnorth[ialt+1,:]*horfact.T).dot(ones((nvec,1))) # hor interpolate lower alts (npos x)
-                vnorth = (1.-falt)*(vn0.reshape(npos)) + falt*(vn1.reshape(npos)) # As 1D array
+                vn0    = einsum('ij,ij->i', self.vnorth[ialt,:], horfact) # hor interpolate lower alt (npos)
+                vn1    = einsum('ij,ij->i', self.vnorth[ialt+1,:], horfact) # hor interpolate upper alt (npos)
+                vnorth = (1.-falt)*vn0 + falt*vn1
 
                 # East wind (x-direction or lon direction)
-                ve0    = (self.veast[ialt,:]*horfact.T).dot(ones((nvec,1)))
-                ve1    = (self.veast[ialt+1,:]*horfact.T).dot(ones((nvec,1)))
-                veast  = (1.-falt)*(ve0.reshape(npos)) + falt*(ve1.reshape(npos)) # As 1D array
+                ve0    = einsum('ij,ij->i', self.veast[ialt,:], horfact)
+                ve1    = einsum('ij,ij->i', self.veast[ialt+1,:], horfact)
+                veast  = (1.-falt)*ve0 + falt*ve1
 
         # Return same type as positons were given
         if type(userlat)==ndarray:
@@ -211,18 +215,113 @@ class Windfield():
         else:
             return float(vnorth),float(veast)
 
+    def getweights(self, lat, lon):
+        """ Return the inverse-distance weights (npos x nvec) of the wind
+            vectors for the positions lat, lon (1 x npos). The weights of the
+            last positions are reused when the positions are unchanged. """
+        if self.weights is not None:
+            oldlat, oldlon, horfact = self.weights
+            if oldlat.shape == lat.shape and (oldlat == lat).all() and \
+                    (oldlon == lon).all():
+                return horfact
+
+        eps = 1e-20 # [m2] to avoid divison by zero for using exact same points
+
+        # Average cosine for flat-earth approximation
+        cavelat = cos(radians(0.5*(lat+array([self.lat]).transpose())))
+
+        # Lat and lon distance in 60 nm units (1 lat degree)
+        dy = lat - array([self.lat]).transpose() #(nvec,npos)
+        dx = cavelat*(lon - array([self.lon]).transpose())
+
+        # Calulate inverse distance squared, and normalize weights
+        invd2   = 1./(eps+dx*dx+dy*dy)
+        horfact = ascontiguousarray((invd2/invd2.sum(axis=0)).T)
+
+        self.weights = (lat.copy(), lon.copy(), horfact)
+        return horfact
+
+    def setgrid(self, lat, lon, alt, vnorth, veast):
+        """ setgrid: replace the wind field by a regular grid with axes lat
+            [deg], lon [deg] and alt [m], which must be ascending and evenly
+            spaced. vnorth and veast [m/s] have shape (nalt, nlat, nlon). """
+        grid = WindGrid(lat, lon, alt, vnorth, veast)
+        self.clear()
+        self.grid    = grid
+        self.winddim = 3 if grid.nalt > 1 else 2
+        return True
+
     def remove(self,idx): # remove a point using the returned index when it was added
         if idx<len(self.lat):
             self.lat = delete(self.lat,idx)
-            self.lon = delete(self.lat,idx)
+            self.lon = delete(self.lon,idx)
+            self.nvec = len(self.lat)
+            self.weights = None
 
             self.vnorth = delete(self.vnorth,idx,axis=1)
             self.veast  = delete(self.veast ,idx,axis=1)
 
             if idx in self.iprof:
                 self.iprof.remove(idx)
+            self.iprof = [i - 1 if i > idx else i for i in self.iprof]
 
             if self.winddim<3 or len(self.iprof)==0 or len(self.lat)==0:
                 self.winddim = min(2,len(self.lat)) # Check for 0, 1D, 2D or 3D
 
         return
+
+
+class WindGrid():
+    """ Regular lat/lon/alt wind grid. Positions outside the grid get the
+        wind at the nearest edge of the grid. """
+    def __init__(self, lat, lon, alt, vnorth, veast):
+        axes   = [asarray(x, dtype=float).reshape(-1) for x in (alt, lat, lon)]
+        shape  = tuple(len(x) for x in axes)
+        self.nalt, self.nlat, self.nlon = shape
+        vnorth = asarray(vnorth, dtype=float)
+        veast  = asarray(veast, dtype=float)
+        if vnorth.shape != shape or veast.shape != shape:
+            raise ValueError('Wind grid should have shape %s (alt, lat, lon)' % (shape,))
+
+        # Axes with only one value are repeated, so that every axis has a
+        # lower and an upper neighbour
+        table = stack((vnorth, veast), axis=-1)
+        for dim, x in enumerate(axes):
+            if len(x) == 0:
+                raise ValueError('Wind grid axes cannot be empty')
+            if len(x) == 1:
+                axes[dim] = append(x, x[0] + 1.)
+                table     = table.repeat(2, axis=dim)
+            step = diff(axes[dim])
+            if step[0] <= 0. or not allclose(step, step[0]):
+                raise ValueError('Wind grid axes should be ascending and evenly spaced')
+
+        self.axes  = axes
+        self.start = [x[0] for x in axes]
+        self.step  = [x[1] - x[0] for x in axes]
+        self.shape = table.shape[:3]
+
+        # Wind vectors as (npoints, 2) table of north and east components
+        self.table = table.reshape(-1, 2)
+
+    def interpolate(self, lat, lon, alt):
+        """ Return the north and east wind [m/s] at lat, lon [deg] and
+            alt [m], with trilinear interpolation between the grid points. """
+        idx    = 0
+        frac   = []
+        for x, x0, dx, n in zip((alt, lat, lon), self.start, self.step, self.shape):
+            # Index of lower grid point, and factor for the upper one
+            f = clip((asarray(x, dtype=float) - x0) / dx, 0., n - 1.)
+            i = minimum(floor(f).astype(int), n - 2)
+            idx = idx * n + i
+            frac.append(f - i)
+
+        falt, flat, flon = frac
+        nlat, nlon = self.shape[1:]
+        v = zeros((len(idx), 2))
+        for dalt, walt in ((0, 1. - falt), (nlat * nlon, falt)):
+            for dlat, wlat in ((0, 1. - flat), (nlon, flat)):
+                w = walt * wlat
+                v += (w * (1. - flon))[:, None] * self.table[idx + dalt + dlat]
+                v += (w * flon)[:, None] * self.table[idx + dalt + dlat + 1]
+        return v[:, 0], v[:, 1]
@@ -1,6 +1,9 @@
+import os
 from numpy import arctan2,degrees,array,sqrt # to allow arrays, their functions and types
+import numpy as np
 from .windfield import *
-from bluesky.tools.aero import kts
+from bluesky.tools.aero import kts, ft
+from bluesky import settings
 import bluesky as bs
 
 
@@ -51,3 +54,47 @@ class WindSim(Windfield):
         txt  = "WIND AT %.5f, %.5f: %03d/%d" % (lat,lon,wdir,wspd/kts)
 
         return True, txt
+
+    def loadgrid(self, fname):
+        """ Load a regular wind grid from a CSV (.csv/.txt) or NumPy (.npy)
+            table with the columns lat, lon, alt [ft], dir [deg] and
+            spd [kts], with one row per grid point. """
+        if not os.path.isfile(fname):
+            fname = os.path.join(settings.scenario_path, fname)
+        if not os.path.isfile(fname):
+            return False, "WINDGRID: cannot find file " + fname
+
+        try:
+            if fname.lower().endswith('.npy'):
+                table = np.load(fname)
+            else:
+                table = np.loadtxt(fname, delimiter=',', comments='#', ndmin=2)
+        except (OSError, ValueError) as e:
+            return False, "WINDGRID: cannot read %s: %s" % (fname, e)
+
+        if table.ndim != 2 or table.shape[1] != 5:
+            return False, "WINDGRID: expected columns lat,lon,alt,dir,spd"
+
+        # Grid axes, and the position of each row in the grid
+        axes, pos = zip(*[np.unique(table[:, col], return_inverse=True)
+                          for col in (2, 0, 1)])
+        shape = tuple(len(x) for x in axes)
+        flat  = np.ravel_multi_index(pos, shape)
+        if len(table) != np.prod(shape) or len(np.unique(flat)) != len(table):
+            return False, "WINDGRID: table does not contain each grid point once"
+
+        wdir   = np.radians(table[:, 3]) + np.pi
+        wspd   = table[:, 4] * kts
+        vnorth = np.zeros(len(table))
+        veast  = np.zeros(len(table))
+        vnorth[flat] = wspd * np.cos(wdir)
+        veast[flat]  = wspd * np.sin(wdir)
+
+        try:
+            self.setgrid(axes[1], axes[2], axes[0] * ft,
+                         vnorth.reshape(shape), veast.reshape(shape))
+        except ValueError as e:
+            return False, "WINDGRID: " + e.args[0]
+
+        return True, "WINDGRID: loaded %d x %d x %d (lat x lon x alt) wind grid" % \
+            (shape[1], shape[2], shape[0])
@@ -6,7 +6,9 @@ except ImportError:
 
 import numpy as np
 
+from bluesky import settings
 from bluesky.network import Client
+from bluesky.network.acdata import ACDataDecoder
 from bluesky.tools import Signal
 from bluesky.tools.aero import ft
 
@@ -14,10 +16,13 @@ from bluesky.tools.aero import ft
 UPDATE_ALL = ['SHAPE', 'TRAILS', 'CUSTWPT', 'PANZOOM', 'ECHOTEXT']
 ACTNODE_TOPICS = [b'ACDATA', b'ROUTEDATA']
 
+# Register settings defaults
+settings.set_variable_defaults(acdata_viewfilter=False)
+
 
 class GuiClient(Client):
     def __init__(self):
-        super(GuiClient, self).__init__(ACTNODE_TOPICS)
+        super(GuiClient, self).__init__(list(ACTNODE_TOPICS))
         self.nodedata = dict()
         self.timer = None
         self.ref_nodedata = nodeData()
@@ -49,6 +54,11 @@ class GuiClient(Client):
         if name == b'RESET':
             sender_data.clear_scen_data()
             data_changed = list(UPDATE_ALL)
+            # The node forgets its clients at a reset: ask again for our own
+            # aircraft data stream
+            if sender_id == self.act:
+                self.acdata_stream(1)
+                self.send_event(b'ACDATAVERSION', dict(version=2))
         elif name == b'SHAPE':
             sender_data.update_poly_data(**data)
             data_changed.append('SHAPE')
@@ -66,6 +76,10 @@ class GuiClient(Client):
         elif name == b'SIMSTATE':
             sender_data.siminit(**data)
             data_changed = list(UPDATE_ALL)
+        elif name == b'ACDATAVERSION':
+            # The node tells which aircraft data stream it sends us
+            if sender_id == self.act:
+                self.acdata_stream(data['version'])
         else:
             self.event_received.emit(name, data, sender_id)
 
@@ -73,11 +87,45 @@ class GuiClient(Client):
             self.actnodedata_changed.emit(sender_id, sender_data, data_changed)
 
     def stream(self, name, data, sender_id):
+        if name == b'ACDATA':
+            data = self.get_nodedata(sender_id).acdata.decode(data)
         self.stream_received.emit(name, data, sender_id)
 
     def actnode_changed(self, newact):
         self.actnodedata_changed.emit(newact, self.get_nodedata(newact), UPDATE_ALL)
 
+    def actnode(self, newact=None):
+        changed = newact and newact != self.act
+        if changed:
+            # Stop the aircraft data stream of the previous node to this
+            # client, and receive the broadcast stream of the new node until
+            # it confirms that it sends this client its own compact stream
+            self.leave()
+            self.acdata_stream(1)
+        act = super(GuiClient, self).actnode(newact)
+        if changed and act == newact:
+            self.send_event(b'ACDATAVERSION', dict(version=2))
+        return act
+
+    def leave(self):
+        ''' Tell the active node to stop the aircraft data stream to this
+            client, when the client selects another node or quits. '''
+        if self.act:
+            self.send_event(b'ACDATAVERSION', dict(version=1), target=self.act)
+
+    def acdata_stream(self, version):
+        ''' Subscribe to the aircraft data of the active node in the broadcast
+            ACDATA stream (version 1), or in the compact stream to this client
+            only (version 2). Nodes that don't support version 2 don't reply
+            to ACDATAVERSION, so the broadcast stream is used. '''
+        own = b'ACDATA' + self.client_id
+        topic, other = (own, b'ACDATA') if version >= 2 else (b'ACDATA', own)
+        if topic not in self.acttopics:
+            if self.act:
+                self.unsubscribe(other, self.act)
+                self.subscribe(topic, self.act)
+            self.acttopics = [topic if t == other else t for t in self.acttopics]
+
     def get_nodedata(self, nodeid=None):
         nodeid = nodeid or self.act
         if not nodeid:
@@ -116,6 +164,9 @@ class nodeData(object):
         # Network route to this node
         self._route    = route
 
+        # Decoder of the compact aircraft data stream of this node
+        self.acdata    = ACDataDecoder()
+
     def clear_scen_data(self):
         # Clear all scenario-specific data for sender node
         self.polynames = dict()
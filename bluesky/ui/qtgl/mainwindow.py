@@ -222,6 +222,8 @@ class MainWindow(QMainWindow):
         return True
 
     def closeEvent(self, event=None):
+        # Stop the aircraft data stream of the active node to this client
+        bs.net.leave()
         # Send quit to server if we own the host
         if not bs.settings.is_client:
             bs.net.send_event(b'QUIT')
@@ -138,6 +138,7 @@ class RadarWidget(QGLWidget):
         self.routedata      = RouteDataEvent()
 
         self.panzoomchanged = False
+        self.viewfilter     = None
         self.mousedragged   = False
         self.mousepos       = (0, 0)
         self.prevmousepos   = (0, 0)
@@ -189,6 +190,7 @@ class RadarWidget(QGLWidget):
         # Update pan/zoom
         if 'PANZOOM' in changed_elems:
             self.panzoom(pan=nodedata.pan, zoom=nodedata.zoom, absolute=True)
+            self.update_viewfilter(force=True)
 
     def create_objects(self):
         if not self.isValid():
@@ -610,10 +612,20 @@ class RadarWidget(QGLWidget):
         if streamname == b'ACDATA':
             self.acdata = ACDataEvent(data)
             self.update_aircraft_data(self.acdata)
+            self.update_viewfilter()
         elif streamname == b'ROUTEDATA':
             self.routedata = RouteDataEvent(data)
             self.update_route_data(self.routedata)
 
+    def update_viewfilter(self, force=False):
+        ''' Send the current view to the active node when it has changed, when
+            the node only sends the aircraft in view (acdata_viewfilter). '''
+        view = (self.panlat, self.panlon, self.zoom, self.ar)
+        if settings.acdata_viewfilter and (force or view != self.viewfilter):
+            self.viewfilter = view
+            bs.net.send_event(b'VIEWFILTER', dict(enabled=True, pan=view[:2],
+                                                  zoom=self.zoom, ar=self.ar))
+
     def update_route_data(self, data):
         if not self.initialized:
             return